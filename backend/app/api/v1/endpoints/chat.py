@@ -2,9 +2,10 @@
 Chat API endpoints for conversation management and RAG queries
 """
 
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
+from typing import List, Optional, AsyncIterator
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 import structlog
 
 from app.core.database import get_db
@@ -12,9 +13,11 @@ from app.models.schemas import (
     QueryRequest, 
     QueryResponse, 
     ConversationResponse,
-    ConversationCreate
+    ConversationCreate,
+    StreamingChunk
 )
 from app.services.chat_service import ChatService
+from app.services.container import get_chat_service, get_rag_service
 from app.services.rag_service import RAGService
 from app.core.exceptions import ValidationError, NotFoundError
 
@@ -25,9 +28,9 @@ router = APIRouter()
 async def query_chat(
     request: QueryRequest,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-    chat_service: ChatService = Depends(),
-    rag_service: RAGService = Depends()
+    db: AsyncSession = Depends(get_db),
+    chat_service: ChatService = Depends(get_chat_service),
+    rag_service: RAGService = Depends(get_rag_service)
 ):
     """
     Process a chat query using RAG pipeline
@@ -73,12 +76,97 @@ async def query_chat(
         logger.error("Failed to process chat query", error=str(e))
         raise HTTPException(status_code=500, detail="Failed to process query")
 
+async def _stream_and_persist(
+    request: QueryRequest,
+    rag_service: RAGService,
+    chat_service: ChatService
+) -> AsyncIterator[StreamingChunk]:
+    """Relay pipeline frames and save the exchange once the answer is complete"""
+    sources = None
+    parts = []
+    
+    async for frame in rag_service.stream_query(
+        query=request.message,
+        conversation_id=request.conversation_id,
+        options=request.options
+    ):
+        if frame.type == "source":
+            sources = frame.sources
+        elif frame.type == "text":
+            parts.append(frame.content)
+        
+        yield frame
+        
+        # Persist once, after the client already has the full answer
+        if frame.type == "done" and request.conversation_id:
+            try:
+                await chat_service.add_message_to_conversation(
+                    request.conversation_id,
+                    request.message,
+                    "".join(parts),
+                    sources=sources,
+                    model_used=request.options.model if request.options else None
+                )
+            except Exception as e:
+                logger.error("Failed to save streamed conversation", error=str(e))
+
+@router.post("/stream")
+async def stream_chat(
+    request: QueryRequest,
+    chat_service: ChatService = Depends(get_chat_service),
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """
+    Process a chat query and stream the answer as Server-Sent Events
+    
+    Each event carries a StreamingChunk: one "source" frame once reranking
+    finishes, "text" frames as tokens arrive, then "done" (or "error").
+    """
+    logger.info("Processing streaming chat query", query=request.message[:100])
+    
+    async def event_stream():
+        async for frame in _stream_and_persist(request, rag_service, chat_service):
+            yield f"data: {frame.json(exclude_none=True)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/ws")
+async def chat_websocket(
+    websocket: WebSocket,
+    chat_service: ChatService = Depends(get_chat_service),
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """
+    Stream chat answers over a WebSocket
+    
+    The client sends QueryRequest JSON messages; each one is answered with
+    the same StreamingChunk frames as the SSE endpoint.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            payload = await websocket.receive_text()
+            try:
+                request = QueryRequest.parse_raw(payload)
+            except ValueError as e:
+                await websocket.send_text(StreamingChunk(type="error", error=str(e)).json(exclude_none=True))
+                continue
+            
+            async for frame in _stream_and_persist(request, rag_service, chat_service):
+                await websocket.send_text(frame.json(exclude_none=True))
+    except WebSocketDisconnect:
+        logger.info("Chat WebSocket disconnected")
+
 @router.get("/conversations", response_model=List[ConversationResponse])
 async def get_conversations(
     limit: int = 50,
     offset: int = 0,
-    db: Session = Depends(get_db),
-    chat_service: ChatService = Depends()
+    db: AsyncSession = Depends(get_db),
+    chat_service: ChatService = Depends(get_chat_service)
 ):
     """Get user conversations"""
     try:
@@ -94,8 +182,8 @@ async def get_conversations(
 @router.post("/conversations", response_model=ConversationResponse)
 async def create_conversation(
     conversation: ConversationCreate,
-    db: Session = Depends(get_db),
-    chat_service: ChatService = Depends()
+    db: AsyncSession = Depends(get_db),
+    chat_service: ChatService = Depends(get_chat_service)
 ):
     """Create a new conversation"""
     try:
@@ -109,8 +197,8 @@ async def create_conversation(
 @router.get("/conversations/{conversation_id}", response_model=ConversationResponse)
 async def get_conversation(
     conversation_id: str,
-    db: Session = Depends(get_db),
-    chat_service: ChatService = Depends()
+    db: AsyncSession = Depends(get_db),
+    chat_service: ChatService = Depends(get_chat_service)
 ):
     """Get a specific conversation"""
     try:
@@ -127,8 +215,8 @@ async def get_conversation(
 @router.delete("/conversations/{conversation_id}")
 async def delete_conversation(
     conversation_id: str,
-    db: Session = Depends(get_db),
-    chat_service: ChatService = Depends()
+    db: AsyncSession = Depends(get_db),
+    chat_service: ChatService = Depends(get_chat_service)
 ):
     """Delete a conversation"""
     try:
@@ -3,27 +3,43 @@ Document management API endpoints
 """
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Header
+from sqlalchemy.ext.asyncio import AsyncSession
+import os
+import uuid
+import zipfile
 import structlog
 
 from app.core.database import get_db
-from app.models.schemas import DocumentResponse, DocumentUploadResponse
+from app.models.schemas import DocumentResponse, DocumentUploadResponse, IngestionJobResponse
+from app.services.container import get_document_service, get_job_queue
 from app.services.document_service import DocumentService
-from app.services.ingestion_service import IngestionService
+from app.services.job_queue import JobQueue, job_to_response
 from app.core.exceptions import ValidationError, FileProcessingError
 from app.core.config import settings
 
 logger = structlog.get_logger()
 router = APIRouter()
 
+def get_tenant_id(x_tenant_id: Optional[str] = Header(None)) -> str:
+    """
+    Tenant used for ingestion concurrency limits.
+
+    The API has no authentication yet, so this is whatever the client sends
+    and the per-tenant cap is advisory: a caller can sidestep it with a new
+    X-Tenant-ID on each request. INGESTION_MAX_CONCURRENT_JOBS still bounds
+    the total. Derive the tenant from the authenticated identity once there
+    is one.
+    """
+    return x_tenant_id or "default"
+
 @router.post("/upload", response_model=DocumentUploadResponse)
 async def upload_document(
     file: UploadFile = File(...),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
-    db: Session = Depends(get_db),
-    document_service: DocumentService = Depends(),
-    ingestion_service: IngestionService = Depends()
+    tenant_id: str = Depends(get_tenant_id),
+    db: AsyncSession = Depends(get_db),
+    document_service: DocumentService = Depends(get_document_service),
+    job_queue: JobQueue = Depends(get_job_queue)
 ):
     """
     Upload and process a document for RAG ingestion
@@ -47,26 +63,24 @@ async def upload_document(
                 "content_type"
             )
         
-        # Check file size
-        contents = await file.read()
-        if len(contents) > settings.MAX_FILE_SIZE:
-            raise ValidationError("File too large", "file_size")
-        
-        # Reset file pointer
-        await file.seek(0)
-        
+        # Stream to disk, enforcing the size limit and hashing as we go
+        spool_path, size, content_hash = await document_service.spool_upload(file)
+
         # Save document metadata
         document = await document_service.create_document(
             filename=file.filename,
             content_type=file.content_type,
-            size=len(contents)
+            size=size,
+            content_hash=content_hash,
+            spool_path=spool_path
         )
-        
-        # Queue for processing
-        background_tasks.add_task(
-            ingestion_service.process_document,
+
+        # Queue for processing; the job reads the stored file, not the request
+        job = await job_queue.enqueue(
             document.id,
-            file
+            "ingest",
+            tenant_id=tenant_id,
+            payload={"file_path": document_service.storage_path(document.id, file.filename)}
         )
         
         logger.info("Document uploaded successfully", document_id=document.id)
@@ -75,7 +89,8 @@ async def upload_document(
             id=document.id,
             filename=file.filename,
             status="uploaded",
-            message="Document uploaded and queued for processing"
+            message="Document uploaded and queued for processing",
+            job_id=job.id
         )
         
     except ValidationError:
@@ -84,13 +99,73 @@ async def upload_document(
         logger.error("Document upload failed", error=str(e), filename=file.filename)
         raise HTTPException(status_code=500, detail="Upload failed")
 
+@router.post("/bulk")
+async def bulk_upload_documents(
+    file: UploadFile = File(...),
+    tenant_id: str = Depends(get_tenant_id),
+    document_service: DocumentService = Depends(get_document_service),
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """
+    Import a zip archive of documents
+    
+    Supported files in the archive are ingested by a background job; poll
+    GET /documents/bulk/{job_id} for progress and throughput.
+    """
+    try:
+        logger.info("Bulk upload started", filename=file.filename)
+        
+        spool_path, size, _ = await document_service.spool_upload(file, max_size=settings.BULK_MAX_ARCHIVE_SIZE)
+        if not zipfile.is_zipfile(spool_path):
+            os.remove(spool_path)
+            raise ValidationError("Bulk uploads must be zip archives", "content_type")
+        
+        bulk_dir = os.path.join(settings.LOCAL_STORAGE_PATH, "bulk")
+        os.makedirs(bulk_dir, exist_ok=True)
+        archive_path = os.path.join(bulk_dir, f"{uuid.uuid4().hex}.zip")
+        os.replace(spool_path, archive_path)
+        
+        try:
+            job = await job_queue.enqueue(
+                None,
+                "bulk",
+                tenant_id=tenant_id,
+                payload={"archive_path": archive_path, "filename": file.filename, "size": size}
+            )
+        except Exception:
+            os.remove(archive_path)
+            raise
+        
+        logger.info("Bulk upload queued", job_id=job.id, size=size)
+        return {"message": "Archive uploaded and queued for import", "job_id": job.id}
+        
+    except ValidationError:
+        raise
+    except Exception as e:
+        logger.error("Bulk upload failed", error=str(e), filename=file.filename)
+        raise HTTPException(status_code=500, detail="Bulk upload failed")
+
+@router.get("/bulk/{job_id}", response_model=IngestionJobResponse)
+async def get_bulk_upload(
+    job_id: str,
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """Get the progress and throughput of a bulk import"""
+    try:
+        job = await job_queue.get_job(str(uuid.UUID(job_id)))
+    except ValueError:
+        job = None
+    if not job or job.job_type != "bulk":
+        raise HTTPException(status_code=404, detail="Bulk import not found")
+    return job_to_response(job)
+
 @router.get("", response_model=List[DocumentResponse])
 async def get_documents(
     limit: int = 50,
     offset: int = 0,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
-    document_service: DocumentService = Depends()
+    db: AsyncSession = Depends(get_db),
+    document_service: DocumentService = Depends(get_document_service)
 ):
     """Get list of uploaded documents"""
     try:
@@ -107,8 +182,8 @@ async def get_documents(
 @router.get("/{document_id}", response_model=DocumentResponse)
 async def get_document(
     document_id: str,
-    db: Session = Depends(get_db),
-    document_service: DocumentService = Depends()
+    db: AsyncSession = Depends(get_db),
+    document_service: DocumentService = Depends(get_document_service)
 ):
     """Get document details"""
     try:
@@ -125,21 +200,25 @@ async def get_document(
 @router.delete("/{document_id}")
 async def delete_document(
     document_id: str,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-    document_service: DocumentService = Depends()
+    tenant_id: str = Depends(get_tenant_id),
+    db: AsyncSession = Depends(get_db),
+    document_service: DocumentService = Depends(get_document_service),
+    job_queue: JobQueue = Depends(get_job_queue)
 ):
     """Delete document and remove from vector index"""
     try:
+        document = await document_service.get_document(document_id)
+        if not document:
+            raise HTTPException(status_code=404, detail="Document not found")
+
         # Queue for deletion (removes from vector DB too)
-        background_tasks.add_task(
-            document_service.delete_document,
-            document_id
-        )
+        job = await job_queue.enqueue(document_id, "delete", tenant_id=tenant_id)
         
         logger.info("Document deletion queued", document_id=document_id)
-        return {"message": "Document deletion queued"}
+        return {"message": "Document deletion queued", "job_id": job.id}
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("Failed to delete document", error=str(e), document_id=document_id)
         raise HTTPException(status_code=500, detail="Failed to delete document")
@@ -147,10 +226,10 @@ async def delete_document(
 @router.post("/{document_id}/reprocess")
 async def reprocess_document(
     document_id: str,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-    document_service: DocumentService = Depends(),
-    ingestion_service: IngestionService = Depends()
+    tenant_id: str = Depends(get_tenant_id),
+    db: AsyncSession = Depends(get_db),
+    document_service: DocumentService = Depends(get_document_service),
+    job_queue: JobQueue = Depends(get_job_queue)
 ):
     """Reprocess a document (re-chunk and re-embed)"""
     try:
@@ -159,13 +238,10 @@ async def reprocess_document(
             raise HTTPException(status_code=404, detail="Document not found")
         
         # Queue for reprocessing
-        background_tasks.add_task(
-            ingestion_service.reprocess_document,
-            document_id
-        )
+        job = await job_queue.enqueue(document_id, "reprocess", tenant_id=tenant_id)
         
         logger.info("Document reprocessing queued", document_id=document_id)
-        return {"message": "Document reprocessing queued"}
+        return {"message": "Document reprocessing queued", "job_id": job.id}
         
     except HTTPException:
         raise
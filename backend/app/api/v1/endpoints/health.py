@@ -3,11 +3,17 @@ Health check and system status endpoints
 """
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import structlog
 
 from app.core.database import get_db, check_db_connection, check_redis_connection
+from app.core.cache import single_flight_stats
 from app.core.config import settings
+from app.services.embedding_service import EmbeddingService
+from app.services.llm_service import LLMService
+from app.services.rate_limiter import llm_governor_stats
+from app.services.response_cache import get_response_cache
+from app.services.vector_service import local_index_stats
 
 logger = structlog.get_logger()
 router = APIRouter()
@@ -23,7 +29,7 @@ async def health_check():
     }
 
 @router.get("/detailed")
-async def detailed_health_check(db: Session = Depends(get_db)):
+async def detailed_health_check(db: AsyncSession = Depends(get_db)):
     """Detailed health check including dependencies"""
     
     # Check database
@@ -44,6 +50,15 @@ async def detailed_health_check(db: Session = Depends(get_db)):
             "database": "healthy" if db_healthy else "unhealthy",
             "redis": "healthy" if redis_healthy else "unhealthy"
         },
+        "caches": {
+            "query_embeddings": EmbeddingService.cache_stats(),
+            "embedding_batches": EmbeddingService.coalescer_stats(),
+            "responses": get_response_cache().stats() if settings.RESPONSE_CACHE_ENABLED else None
+        },
+        "single_flight": single_flight_stats(),
+        "llm_rate": llm_governor_stats(),
+        "llm_usage": LLMService.usage_stats(),
+        "vector_index": local_index_stats() if settings.VECTOR_DB_TYPE == "local" else None,
         "config": {
             "vector_db_type": settings.VECTOR_DB_TYPE,
             "openai_model": settings.OPENAI_MODEL,
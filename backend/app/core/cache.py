@@ -0,0 +1,110 @@
+"""
+In-process caching utilities
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+from collections import OrderedDict
+import asyncio
+import threading
+import weakref
+
+T = TypeVar("T")
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with hit/miss counters"""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._items: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            try:
+                value = self._items[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._items.pop(key, None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._items), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+
+# Every SingleFlight by name, for the health endpoint
+_single_flights: Dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """
+    De-duplicates concurrent calls: while a call for a key is in flight,
+    later callers with the same key await its result (or exception)
+    instead of starting their own.
+
+    The call runs as its own task, so a caller that is cancelled, such as
+    a disconnected client, does not cancel it for the others. Nothing is
+    kept once the call finishes; that is what the caches are for.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        # Tasks belong to a loop, so in-flight calls are tracked per loop
+        self._calls: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, asyncio.Task]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.calls = 0
+        self.shared = 0
+        _single_flights[name] = self
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        calls = self._calls.setdefault(asyncio.get_running_loop(), {})
+        task = calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            calls[key] = task
+            task.add_done_callback(lambda done: self._finish(calls, key, done))
+            self.calls += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _finish(calls: Dict[Hashable, asyncio.Task], key: Hashable, task: asyncio.Task) -> None:
+        if calls.get(key) is task:
+            del calls[key]
+        # Mark the exception retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        in_flight = sum(len(calls) for calls in self._calls.values())
+        return {"calls": self.calls, "shared": self.shared, "in_flight": in_flight}
+
+
+def single_flight_stats() -> Dict[str, Dict[str, int]]:
+    return {name: flight.stats() for name, flight in _single_flights.items()}
@@ -2,7 +2,7 @@
 Application configuration using Pydantic Settings
 """
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseSettings, validator
 import os
 
@@ -25,17 +25,40 @@ class Settings(BaseSettings):
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: int = 5  # seconds to wait for a free pooled connection
+    REDIS_SOCKET_TIMEOUT: float = 2.0
     CACHE_TTL: int = 3600  # 1 hour
     
     # OpenAI
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4"
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-large"
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_SIZE: int = 2048  # query embeddings kept in process memory
+    EMBEDDING_COALESCE_ENABLED: bool = True
+    EMBEDDING_BATCH_MAX_SIZE: int = 64
+    EMBEDDING_BATCH_MAX_WAIT_MS: int = 5
     OPENAI_MAX_TOKENS: int = 4000
     OPENAI_TEMPERATURE: float = 0.1
+    LLM_CONTEXT_WINDOW: int = 0  # tokens; 0 looks OPENAI_MODEL up in context_packer.MODEL_CONTEXT_WINDOWS
+    LLM_REQUESTS_PER_MINUTE: int = 0  # 0 learns the limit from the provider's rate-limit headers
+    LLM_TOKENS_PER_MINUTE: int = 0
+    LLM_MAX_CONCURRENCY: int = 16  # chat completions in flight per process
+    LLM_RATE_LIMIT_RETRIES: int = 3
     
     # Vector Database
-    VECTOR_DB_TYPE: str = "pinecone"  # pinecone, weaviate, chromadb
+    VECTOR_DB_TYPE: str = "local"  # only local is implemented by VectorService
+    LOCAL_VECTOR_INDEX_PATH: str = "./storage/vector_index"
+    LOCAL_INDEX_TYPE: str = "flat"  # flat, ivf, hnsw, int8, pq
+    IVF_NLIST: int = 256
+    IVF_NPROBE: int = 8
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCTION: int = 200
+    HNSW_EF_SEARCH: int = 64
+    PQ_SUBQUANTIZERS: int = 64  # bytes per vector in pq mode
+    QUANTIZED_RESCORE_FACTOR: int = 4  # int8/pq candidates rescored exactly, per result
+    VECTOR_COMPACTION_RATIO: float = 0.2  # share of deleted rows that triggers a background compaction
     PINECONE_API_KEY: str = ""
     PINECONE_ENVIRONMENT: str = ""
     PINECONE_INDEX_NAME: str = "amrikyy-ai"
@@ -44,19 +67,51 @@ class Settings(BaseSettings):
     
     # Document Processing
     MAX_FILE_SIZE: int = 50 * 1024 * 1024  # 50MB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # bytes read per step when spooling uploads
     ALLOWED_FILE_TYPES: List[str] = [
         "application/pdf",
         "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         "text/plain",
         "text/markdown"
     ]
-    CHUNK_SIZE: int = 1000
-    CHUNK_OVERLAP: int = 200
+    CHUNK_SIZE: int = 1000  # tokens of OPENAI_EMBEDDING_MODEL's encoding
+    CHUNK_OVERLAP: int = 200  # tokens shared by consecutive chunks
+    PARSE_WORKERS: int = 2  # parser processes; 0 parses in a thread of the API process
+    PARSE_MAX_IN_FLIGHT: int = 4
+    PARSE_TIMEOUT_SECONDS: int = 120
+    
+    # Ingestion jobs
+    INGESTION_WORKERS: int = 2  # job runners in the API process that owns the local vector index; 0 leaves jobs queued
+    INGESTION_MAX_CONCURRENT_JOBS: int = 4  # across all workers
+    INGESTION_MAX_JOBS_PER_TENANT: int = 2  # advisory: tenants come from the unauthenticated X-Tenant-ID header
+    INGESTION_MAX_ATTEMPTS: int = 3
+    INGESTION_RETRY_BASE_SECONDS: float = 5.0
+    INGESTION_RETRY_MAX_SECONDS: float = 300.0
+    INGESTION_LEASE_SECONDS: int = 60
+    BULK_INGEST_CONCURRENCY: int = 4  # files in flight per bulk import
+    BULK_MAX_ARCHIVE_SIZE: int = 2 * 1024 * 1024 * 1024  # 2GB
+    BULK_PROGRESS_INTERVAL_SECONDS: float = 5.0
     
     # RAG Configuration
     RETRIEVAL_TOP_K: int = 10
     RERANK_TOP_K: int = 5
     MIN_CONFIDENCE_THRESHOLD: float = 0.3
+    VECTOR_NAMESPACES: List[str] = ["default", "bio", "coding"]  # searched concurrently per query
+    NAMESPACE_SEARCH_TIMEOUT_MS: int = 300
+    NAMESPACE_SEARCH_TIMEOUTS_MS: Dict[str, int] = {}  # per-namespace overrides
+    HYBRID_SEARCH_ENABLED: bool = True
+    HYBRID_FUSION: str = "rrf"  # rrf, weighted
+    HYBRID_RRF_K: int = 60
+    HYBRID_VECTOR_WEIGHT: float = 0.5  # weighted fusion only
+    BM25_K1: float = 1.5
+    BM25_B: float = 0.75
+    RESPONSE_CACHE_ENABLED: bool = False
+    RESPONSE_CACHE_THRESHOLD: float = 0.95  # cosine similarity between queries
+    RESPONSE_CACHE_SIZE: int = 1000
+    RAG_CONTEXT_MAX_TOKENS: int = 0  # cap on retrieved context per prompt; 0 uses what the context window leaves
+    SINGLE_FLIGHT_ENABLED: bool = True  # identical in-flight queries, embeddings and prompts run once
     
     # File Storage
     STORAGE_TYPE: str = "local"  # local, s3
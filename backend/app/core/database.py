@@ -2,17 +2,26 @@
 Database configuration and session management
 """
 
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, MetaData, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
-import redis
+from typing import Dict, List, Optional
+import redis.asyncio as aioredis
 from app.core.config import settings
 import structlog
 
 logger = structlog.get_logger()
 
-# SQLAlchemy engine
+def _async_database_url(url: str) -> str:
+    """Point a PostgreSQL URL at the asyncpg driver"""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+# Synchronous engine, used by scripts and startup jobs that run outside request handling
 engine = create_engine(
     settings.DATABASE_URL,
     pool_size=settings.DATABASE_POOL_SIZE,
@@ -24,28 +33,79 @@ engine = create_engine(
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the API so queries don't block the event loop
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    pool_pre_ping=True,
+    echo=settings.ENVIRONMENT == "development"
+)
+
+# Objects stay readable after commit; lazy loads are not available on async sessions
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Base class for models
 Base = declarative_base()
 
-# Redis connection
-redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+# Redis connection pool, created on startup (or on first use outside the app)
+_redis_pool: Optional[aioredis.BlockingConnectionPool] = None
+_redis_client: Optional[aioredis.Redis] = None
 
 # Dependency to get database session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+async def init_redis() -> aioredis.Redis:
+    """Create the shared Redis pool; callers wait for a free connection once it is full"""
+    global _redis_pool, _redis_client
+    if _redis_client is None:
+        _redis_pool = aioredis.BlockingConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT
+        )
+        # Values are returned as bytes so packed vectors and text share one pool
+        _redis_client = aioredis.Redis(connection_pool=_redis_pool)
+    return _redis_client
+
+async def close_redis():
+    """Close pooled Redis connections"""
+    global _redis_pool, _redis_client
+    if _redis_pool is not None:
+        await _redis_pool.disconnect()
+    _redis_pool = None
+    _redis_client = None
 
 # Dependency to get Redis client
-def get_redis():
-    return redis_client
+async def get_redis() -> aioredis.Redis:
+    return _redis_client or await init_redis()
+
+async def redis_get_many(keys: List[str]) -> List[Optional[bytes]]:
+    """Read many keys in one round trip"""
+    if not keys:
+        return []
+    client = await get_redis()
+    return await client.mget(keys)
+
+async def redis_set_many(items: Dict[str, bytes], ttl: Optional[int] = None) -> None:
+    """Write many keys, each with the same TTL, in one pipelined round trip"""
+    if not items:
+        return
+    client = await get_redis()
+    async with client.pipeline(transaction=False) as pipe:
+        for key, value in items.items():
+            pipe.set(key, value, ex=ttl)
+        await pipe.execute()
 
 async def create_tables():
     """Create all database tables"""
     try:
-        Base.metadata.create_all(bind=engine)
+        async with async_engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
         logger.info("Database tables created successfully")
     except Exception as e:
         logger.error("Failed to create database tables", error=str(e))
@@ -54,19 +114,23 @@ async def create_tables():
 async def check_db_connection():
     """Check database connectivity"""
     try:
-        db = SessionLocal()
-        db.execute("SELECT 1")
-        db.close()
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT 1"))
         logger.info("Database connection verified")
         return True
     except Exception as e:
         logger.error("Database connection failed", error=str(e))
         return False
 
+async def close_db_connections():
+    """Release pooled database connections"""
+    await async_engine.dispose()
+
 async def check_redis_connection():
     """Check Redis connectivity"""
     try:
-        redis_client.ping()
+        client = await get_redis()
+        await client.ping()
         logger.info("Redis connection verified")
         return True
     except Exception as e:
@@ -2,6 +2,10 @@
 Persona configuration for Amrikyy AI - Based on محمد عبدالعزيز (Amrikyy)
 """
 
+from typing import Any, Dict, NamedTuple, Optional
+import hashlib
+import json
+
 AMRIKYY_PERSONA = {
     "name": "محمد عبدالعزيز",
     "nickname": "Amrikyy", 
@@ -129,7 +133,7 @@ AMRIKYY_PERSONA = {
     }
 }
 
-def get_persona_system_prompt() -> str:
+def _render_system_prompt() -> str:
     """Generate system prompt incorporating Amrikyy's persona"""
     
     return f"""أنت محمد عبدالعزيز (Amrikyy) - خبير برمجة ومطور ذكي مدعوم بتقنية RAG. إليك شخصيتك وخلفيتك:
@@ -173,7 +177,7 @@ def get_persona_system_prompt() -> str:
 
 تذكر: أنت خبير برمجة متمرس وليس مجرد مساعد، بل شخصية حقيقية بخلفية غنية وخبرات متنوعة في التكنولوجيا والبرمجة المتقدمة."""
 
-def get_persona_context() -> str:
+def _render_persona_context() -> str:
     """Get persona context for RAG queries"""
     
     context = f"""
@@ -202,3 +206,61 @@ def get_persona_context() -> str:
     """
     
     return context.strip()
+
+
+class PersonaPrompts(NamedTuple):
+    fingerprint: str  # hash of the persona the prompts were rendered from
+    system_prompt: str
+    context: str
+
+
+_compiled: Optional[PersonaPrompts] = None
+# System prompts extended with caller rules, by rules text; cleared with _compiled
+_extended: Dict[str, str] = {}
+
+
+def _fingerprint(persona: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(persona, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def compile_persona_prompts() -> PersonaPrompts:
+    """
+    Render the persona prompts, reusing the last rendering while the persona
+    is unchanged; called on startup and whenever the persona is updated.
+
+    Every LLM call then sends the same system prompt string, byte for byte,
+    which the provider's prompt cache needs to match the prefix.
+    """
+    global _compiled
+    fingerprint = _fingerprint(AMRIKYY_PERSONA)
+    if _compiled is None or _compiled.fingerprint != fingerprint:
+        _compiled = PersonaPrompts(fingerprint, _render_system_prompt(), _render_persona_context())
+        _extended.clear()
+    return _compiled
+
+
+def update_persona(changes: Dict[str, Any]) -> PersonaPrompts:
+    """Change persona fields and recompile the prompts built from them"""
+    AMRIKYY_PERSONA.update(changes)
+    return compile_persona_prompts()
+
+
+def get_persona_system_prompt(rules: str = "") -> str:
+    """
+    The compiled persona system prompt, followed by ``rules`` when given.
+
+    Callers append their fixed instructions here rather than to the user
+    message, so the whole static part of a prompt forms one stable prefix.
+    """
+    prompts = _compiled or compile_persona_prompts()
+    if not rules:
+        return prompts.system_prompt
+    extended = _extended.get(rules)
+    if extended is None:
+        extended = _extended[rules] = f"{prompts.system_prompt}\n\n{rules}"
+    return extended
+
+
+def get_persona_context() -> str:
+    """The compiled persona context for RAG queries"""
+    return (_compiled or compile_persona_prompts()).context
@@ -12,9 +12,15 @@ from sentry_sdk.integrations.fastapi import FastApiIntegration
 from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
 
 from app.core.config import settings
-from app.core.database import create_tables
+from app.core.database import create_tables, close_db_connections, init_redis, close_redis
 from app.api.v1.router import api_router
 from app.core.exceptions import AmrikyyException
+from app.core.persona import compile_persona_prompts
+from app.services.container import init_services, close_services
+from app.services.vector_service import claim_local_index, release_local_index, load_local_indexes, persist_local_index
+from app.services.lexical_index import get_lexical_index
+from app.services.document_parser import shutdown_parse_pool
+from app.services.ingestion_worker import start_ingestion_workers, stop_ingestion_workers
 
 # Configure structured logging
 structlog.configure(
@@ -96,15 +102,54 @@ async def general_exception_handler(request: Request, exc: Exception):
 async def startup_event():
     logger.info("Starting Amrikyy AI API", version="1.0.0")
     
+    # Refuse to start rather than fail every query
+    if settings.VECTOR_DB_TYPE != "local":
+        raise RuntimeError(f"Vector store '{settings.VECTOR_DB_TYPE}' is not supported; set VECTOR_DB_TYPE=local")
+    
+    # The local index is held in memory by one process; a second worker or script would overwrite it
+    claim_local_index()
+    
+    # Read the saved vector indexes before serving, in a worker thread
+    await load_local_indexes()
+    
     # Create database tables
     await create_tables()
     
+    # Open the shared Redis pool used by caches and health checks
+    await init_redis()
+    
     # Initialize services
+    # Built once and shared by every request, so provider connections and caches persist
+    init_services()
+    
+    # Render the persona prompts once; every LLM call reuses the same strings
+    compile_persona_prompts()
+    
+    if settings.HYBRID_SEARCH_ENABLED:
+        # Build the BM25 index now rather than on the first query
+        get_lexical_index()
+    
+    # Run queued ingestion jobs in this process, which owns the local vector index
+    await start_ingestion_workers()
+    
     logger.info("API startup completed")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down Amrikyy AI API")
+    
+    # Stop taking jobs first; unfinished ones are recovered on the next start
+    await stop_ingestion_workers()
+    
+    # Flush the in-process vector index so it survives restarts
+    if settings.VECTOR_DB_TYPE == "local":
+        persist_local_index()
+        release_local_index()
+    
+    shutdown_parse_pool()
+    await close_services()
+    await close_db_connections()
+    await close_redis()
 
 # Health check endpoint
 @app.get("/health")
@@ -2,7 +2,7 @@
 SQLAlchemy database models
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey, JSON, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
@@ -66,6 +66,45 @@ class DocumentChunk(Base):
     # Relationships
     document = relationship("Document", back_populates="chunks")
 
+class ChunkEmbedding(Base):
+    """Raw embedding of a chunk's content, so indexes can be rebuilt without the provider"""
+    __tablename__ = "chunk_embeddings"
+    
+    content_hash = Column(String(64), primary_key=True)  # DocumentChunk.content_hash
+    model = Column(String(100), primary_key=True)
+    dimension = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)  # float32, 4 bytes per dimension
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class IngestionJob(Base):
+    """Background job that ingests, reprocesses or deletes a document, or imports an archive"""
+    __tablename__ = "ingestion_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Not a foreign key: delete jobs outlive their document
+    document_id = Column(UUID(as_uuid=True), nullable=True, index=True)  # None for bulk imports
+    job_type = Column(String(20), nullable=False)  # ingest, reprocess, delete, bulk
+    tenant_id = Column(String(100), nullable=False, default="default")
+    payload = Column(JSON, nullable=True)
+    
+    # Execution state
+    status = Column(String(20), default="queued")  # queued, running, retrying, completed, failed
+    stage = Column(String(20), nullable=True)  # parse, chunk, embed, index
+    progress = Column(JSON, nullable=True)  # fraction done per stage
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    last_error = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    next_run_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class Conversation(Base):
     """Conversation model for chat history"""
     __tablename__ = "conversations"
@@ -157,7 +196,7 @@ class SystemMetrics(Base):
     
     # Context
     component = Column(String(100), nullable=True)  # e.g., "retrieval", "llm", "embedding"
-    metadata = Column(JSON, nullable=True)
+    metric_metadata = Column("metadata", JSON, nullable=True)  # "metadata" is reserved on declarative models
     
     # Timestamps
     timestamp = Column(DateTime, default=datetime.utcnow)
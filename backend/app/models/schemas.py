@@ -19,6 +19,13 @@ class DocumentStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    RETRYING = "retrying"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
 # Request Models
 class QueryOptions(BaseModel):
     temperature: Optional[float] = 0.1
@@ -92,6 +99,22 @@ class DocumentUploadResponse(BaseModel):
     filename: str
     status: DocumentStatus
     message: str
+    job_id: Optional[str] = None
+
+class IngestionJobResponse(BaseModel):
+    id: str
+    job_type: str
+    status: JobStatus
+    stage: Optional[str] = None
+    progress: Dict[str, float] = {}
+    attempts: int = 0
+    max_attempts: int
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    next_run_at: Optional[datetime] = None
 
 class DocumentResponse(BaseModel):
     id: str
@@ -108,6 +131,7 @@ class DocumentResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     processed_at: Optional[datetime] = None
+    job: Optional[IngestionJobResponse] = None  # latest ingestion job
 
 class DocumentChunkResponse(BaseModel):
     id: str
@@ -118,6 +142,15 @@ class DocumentChunkResponse(BaseModel):
     page_number: Optional[int] = None
     created_at: datetime
 
+class IngestionResult(BaseModel):
+    document_id: str
+    chunks_total: int = 0
+    chunks_unchanged: int = 0  # kept with their existing vectors
+    chunks_reused: int = 0  # new rows whose embedding was copied from an identical chunk
+    chunks_embedded: int = 0
+    chunks_deleted: int = 0
+    embeddings_saved: int = 0
+
 # Analytics Models
 class QueryAnalytics(BaseModel):
     query_count: int
@@ -140,12 +173,13 @@ class ErrorResponse(BaseModel):
     error_code: str
     timestamp: datetime = datetime.utcnow()
 
-# Streaming Models (for future WebSocket support)
+# Streaming Models (SSE and WebSocket chat)
 class StreamingChunk(BaseModel):
     type: str  # "text", "source", "done", "error"
     content: Optional[str] = None
     sources: Optional[List[Source]] = None
     error: Optional[str] = None
+    conversation_id: Optional[str] = None
 
 # Configuration Models
 class RAGConfig(BaseModel):
@@ -0,0 +1,447 @@
+"""
+Approximate Nearest-Neighbour Indexes - IVF and HNSW options for the local vector store
+"""
+
+from typing import List, Optional, Dict, Any, Iterable, Tuple, Sequence
+import heapq
+import threading
+
+import numpy as np
+import structlog
+
+from app.services.vector_index import (
+    LocalVectorIndex,
+    SearchHit,
+    write_index_files,
+    read_index_files,
+)
+
+logger = structlog.get_logger()
+
+
+class IVFIndex:
+    """
+    Inverted-file index: vectors are grouped under their nearest k-means centroid
+    and a query only scans the ``nprobe`` closest lists.
+
+    Until ``train_size`` vectors have been added the index behaves as a flat
+    index. Adds after training are assigned to an existing list, and deletes
+    tombstone the row in its list, so neither ever forces a rebuild.
+    """
+
+    def __init__(
+        self,
+        dimension: Optional[int] = None,
+        nlist: int = 256,
+        nprobe: int = 8,
+        train_size: Optional[int] = None,
+        kmeans_iterations: int = 10,
+    ):
+        self._lock = threading.RLock()
+        self.nlist = nlist
+        self.nprobe = nprobe
+        # Faiss' rule of thumb: at least ~39 training points per centroid
+        self.train_size = train_size or nlist * 39
+        self.kmeans_iterations = kmeans_iterations
+        self._flat = LocalVectorIndex(dimension=dimension)
+        self._centroids: Optional[np.ndarray] = None
+        self._training = False
+        self._lists: List[LocalVectorIndex] = []
+        self._assignments: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        if self._centroids is None:
+            return len(self._flat)
+        return len(self._assignments)
+
+    def __contains__(self, vector_id: str) -> bool:
+        if self._centroids is None:
+            return vector_id in self._flat
+        return vector_id in self._assignments
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    @property
+    def dimension(self) -> Optional[int]:
+        return self._flat.dimension
+
+    @property
+    def nbytes(self) -> int:
+        centroid_bytes = self._centroids.nbytes if self._centroids is not None else 0
+        return self._flat.nbytes + centroid_bytes + sum(inverted.nbytes for inverted in self._lists)
+
+    @property
+    def tombstone_ratio(self) -> float:
+        parts = [self._flat, *self._lists]
+        rows = sum(len(part) + part.tombstones for part in parts)
+        return sum(part.tombstones for part in parts) / rows if rows else 0.0
+
+    def upsert(self, vector_id: str, embedding: Sequence[float], metadata: Optional[Dict[str, Any]] = None) -> str:
+        self.upsert_batch([vector_id], [embedding], [metadata or {}])
+        return vector_id
+
+    def upsert_batch(
+        self,
+        vector_ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: Optional[Sequence[Optional[Dict[str, Any]]]] = None
+    ) -> List[str]:
+        if not vector_ids:
+            return []
+        if metadatas is None:
+            metadatas = [None] * len(vector_ids)
+
+        with self._lock:
+            if self._centroids is None:
+                self._flat.upsert_batch(vector_ids, embeddings, metadatas)
+                train = not self._training and len(self._flat) >= self.train_size
+                if train:
+                    self._training = True
+            else:
+                train = False
+                vectors = LocalVectorIndex._normalise(LocalVectorIndex._as_matrix(embeddings))
+                targets = np.argmax(vectors @ self._centroids.T, axis=1)
+
+                for vector_id, vector, metadata, target in zip(vector_ids, vectors, metadatas, targets):
+                    current = self._assignments.get(vector_id)
+                    if current is not None and current != target:
+                        self._lists[current].delete(vector_id)
+                    self._lists[target].upsert(vector_id, vector, metadata)
+                    self._assignments[vector_id] = int(target)
+
+        if train:
+            self._train()
+        return list(vector_ids)
+
+    def delete(self, vector_id: str) -> bool:
+        return self.delete_batch([vector_id]) == 1
+
+    def delete_batch(self, vector_ids: Iterable[str]) -> int:
+        """Tombstone many vectors, with one call per affected list"""
+        with self._lock:
+            if self._centroids is None:
+                return self._flat.delete_batch(vector_ids)
+            by_list: Dict[int, List[str]] = {}
+            for vector_id in vector_ids:
+                target = self._assignments.pop(vector_id, None)
+                if target is not None:
+                    by_list.setdefault(target, []).append(vector_id)
+            return sum(self._lists[target].delete_batch(ids) for target, ids in by_list.items())
+
+    def compact(self) -> int:
+        """Drop tombstoned rows from the buffer and every inverted list"""
+        with self._lock:
+            return self._flat.compact() + sum(inverted.compact() for inverted in self._lists)
+
+    def get(self, vector_id: str) -> Optional[np.ndarray]:
+        with self._lock:
+            if self._centroids is None:
+                return self._flat.get(vector_id)
+            target = self._assignments.get(vector_id)
+            return None if target is None else self._lists[target].get(vector_id)
+
+    def get_metadata(self, vector_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if self._centroids is None:
+                return self._flat.get_metadata(vector_id)
+            target = self._assignments.get(vector_id)
+            return None if target is None else self._lists[target].get_metadata(vector_id)
+
+    def search(self, query: Sequence[float], top_k: int = 10, nprobe: Optional[int] = None) -> List[SearchHit]:
+        return self.search_batch([query], top_k, nprobe)[0]
+
+    def search_batch(
+        self,
+        queries: Sequence[Sequence[float]],
+        top_k: int = 10,
+        nprobe: Optional[int] = None
+    ) -> List[List[SearchHit]]:
+        """Scan the ``nprobe`` nearest lists for each query and merge their top-k"""
+        with self._lock:
+            if self._centroids is None:
+                return self._flat.search_batch(queries, top_k)
+
+            query_matrix = LocalVectorIndex._normalise(LocalVectorIndex._as_matrix(queries))
+            nprobe = min(nprobe or self.nprobe, len(self._centroids))
+            centroid_scores = query_matrix @ self._centroids.T
+            probes = np.argpartition(-centroid_scores, nprobe - 1, axis=1)[:, :nprobe]
+
+            # Group queries by list so each list is scanned once with a batched product
+            routed: Dict[int, List[int]] = {}
+            for query_no, lists in enumerate(probes):
+                for list_no in lists:
+                    routed.setdefault(int(list_no), []).append(query_no)
+
+            partial: List[List[SearchHit]] = [[] for _ in range(len(query_matrix))]
+            for list_no, query_nos in routed.items():
+                inverted = self._lists[list_no]
+                if not len(inverted):
+                    continue
+                for query_no, hits in zip(query_nos, inverted.search_batch(query_matrix[query_nos], top_k)):
+                    partial[query_no].extend(hits)
+
+            return [heapq.nlargest(top_k, hits, key=lambda hit: hit[1]) for hits in partial]
+
+    def export(self) -> Tuple[List[str], np.ndarray, List[Dict[str, Any]]]:
+        with self._lock:
+            if self._centroids is None:
+                return self._flat.export()
+            ids, vectors, metadata = [], [], []
+            for inverted in self._lists:
+                list_ids, list_vectors, list_metadata = inverted.export()
+                ids.extend(list_ids)
+                vectors.append(list_vectors)
+                metadata.extend(list_metadata)
+            return ids, np.concatenate(vectors) if vectors else np.zeros((0, self.dimension or 0), dtype=np.float32), metadata
+
+    def save(self, path: str) -> None:
+        ids, matrix, metadata = self.export()
+        write_index_files(path, self.dimension, ids, matrix, metadata)
+        logger.info("IVF index saved", path=path, vectors=len(ids))
+
+    @classmethod
+    def load(cls, path: str, **params) -> "IVFIndex":
+        dimension, ids, matrix, metadata = read_index_files(path)
+        index = cls(dimension=dimension, **params)
+        index.upsert_batch(ids, matrix, metadata)
+        logger.info("IVF index loaded", path=path, vectors=len(index), trained=index.is_trained)
+        return index
+
+    def _train(self) -> None:
+        """
+        Fit centroids on the buffered vectors, then move them into inverted lists.
+
+        The fit runs without the lock, so searches (a flat scan until the
+        centroids exist) and writes carry on meanwhile; vectors written or
+        deleted during the fit are routed with the rest once it is done.
+        """
+        try:
+            with self._lock:
+                _, vectors, _ = self._flat.export()
+
+            nlist = min(self.nlist, len(vectors))
+            centroids = self._kmeans(vectors, nlist)
+
+            with self._lock:
+                ids, vectors, metadata = self._flat.export()
+                lists = [LocalVectorIndex(dimension=vectors.shape[1], initial_capacity=64) for _ in range(nlist)]
+                targets = np.argmax(vectors @ centroids.T, axis=1)
+                for list_no in range(nlist):
+                    rows = np.flatnonzero(targets == list_no)
+                    if len(rows):
+                        lists[list_no].upsert_batch([ids[row] for row in rows], vectors[rows], [metadata[row] for row in rows])
+                self._centroids = centroids
+                self._lists = lists
+                self._assignments = {vector_id: int(target) for vector_id, target in zip(ids, targets)}
+                self._flat = LocalVectorIndex(dimension=vectors.shape[1])
+        finally:
+            self._training = False
+
+        logger.info("IVF index trained", vectors=len(ids), nlist=nlist)
+
+    def _kmeans(self, vectors: np.ndarray, nlist: int) -> np.ndarray:
+        """Spherical k-means (cosine) on a sample of at most 256 points per centroid"""
+        rng = np.random.default_rng(0)
+        sample_size = min(len(vectors), nlist * 256)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self.kmeans_iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for list_no in range(nlist):
+                members = sample[assignment == list_no]
+                if len(members):
+                    centroids[list_no] = members.sum(axis=0)
+                else:
+                    # Re-seed empty clusters so every list stays usable
+                    centroids[list_no] = sample[rng.integers(sample_size)]
+            centroids = LocalVectorIndex._normalise(centroids)
+
+        return centroids.astype(np.float32)
+
+
+class HNSWIndex:
+    """
+    Hierarchical navigable small-world graph backed by ``hnswlib``.
+
+    New vectors are linked into the graph on insert and deletes only mark the
+    node, so both stay incremental. Marked slots are reused by later inserts
+    rather than compacted. ``ef_search`` trades recall for latency.
+    """
+
+    def __init__(
+        self,
+        dimension: Optional[int] = None,
+        m: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        initial_capacity: int = 1024,
+    ):
+        import hnswlib  # Imported lazily so flat/IVF deployments do not need it
+
+        self._hnswlib = hnswlib
+        self._lock = threading.RLock()
+        self._dimension = dimension
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._initial_capacity = max(1, initial_capacity)
+        self._graph = None
+        self._labels: Dict[str, int] = {}
+        self._ids: Dict[int, str] = {}
+        self._metadata: Dict[int, Dict[str, Any]] = {}
+        self._next_label = 0
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def __contains__(self, vector_id: str) -> bool:
+        return vector_id in self._labels
+
+    @property
+    def dimension(self) -> Optional[int]:
+        return self._dimension
+
+    @property
+    def tombstone_ratio(self) -> float:
+        # Deleted slots are refilled by replace_deleted, so there is nothing to compact
+        return 0.0
+
+    def upsert(self, vector_id: str, embedding: Sequence[float], metadata: Optional[Dict[str, Any]] = None) -> str:
+        self.upsert_batch([vector_id], [embedding], [metadata or {}])
+        return vector_id
+
+    def upsert_batch(
+        self,
+        vector_ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: Optional[Sequence[Optional[Dict[str, Any]]]] = None
+    ) -> List[str]:
+        if not vector_ids:
+            return []
+        if metadatas is None:
+            metadatas = [None] * len(vector_ids)
+
+        vectors = LocalVectorIndex._normalise(LocalVectorIndex._as_matrix(embeddings))
+
+        with self._lock:
+            self._ensure_graph(vectors.shape[1])
+            labels = []
+            added = 0
+            for vector_id, metadata in zip(vector_ids, metadatas):
+                label = self._labels.get(vector_id)
+                if label is None:
+                    label = self._next_label
+                    self._next_label += 1
+                    self._labels[vector_id] = label
+                    self._ids[label] = vector_id
+                    added += 1
+                self._metadata[label] = metadata or {}
+                labels.append(label)
+
+            # Labels already in the graph are updated in place and take no new slot
+            needed = self._graph.get_current_count() + added
+            if needed > self._graph.get_max_elements():
+                self._graph.resize_index(max(needed, self._graph.get_max_elements() * 2))
+
+            # Existing labels are updated in place; deleted slots are reused
+            self._graph.add_items(vectors, np.asarray(labels), replace_deleted=True)
+
+        return list(vector_ids)
+
+    def delete(self, vector_id: str) -> bool:
+        return self.delete_batch([vector_id]) == 1
+
+    def delete_batch(self, vector_ids: Iterable[str]) -> int:
+        with self._lock:
+            deleted = 0
+            for vector_id in vector_ids:
+                label = self._labels.pop(vector_id, None)
+                if label is None:
+                    continue
+                self._graph.mark_deleted(label)
+                del self._ids[label]
+                del self._metadata[label]
+                deleted += 1
+            return deleted
+
+    def compact(self) -> int:
+        return 0
+
+    def get(self, vector_id: str) -> Optional[np.ndarray]:
+        with self._lock:
+            label = self._labels.get(vector_id)
+            if label is None:
+                return None
+            return np.asarray(self._graph.get_items([label])[0], dtype=np.float32)
+
+    def get_metadata(self, vector_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            label = self._labels.get(vector_id)
+            return None if label is None else self._metadata[label]
+
+    def search(self, query: Sequence[float], top_k: int = 10, ef_search: Optional[int] = None) -> List[SearchHit]:
+        return self.search_batch([query], top_k, ef_search)[0]
+
+    def search_batch(
+        self,
+        queries: Sequence[Sequence[float]],
+        top_k: int = 10,
+        ef_search: Optional[int] = None
+    ) -> List[List[SearchHit]]:
+        query_matrix = LocalVectorIndex._normalise(LocalVectorIndex._as_matrix(queries))
+
+        with self._lock:
+            k = min(top_k, len(self._labels))
+            if k <= 0:
+                return [[] for _ in range(len(query_matrix))]
+
+            # ef must be at least k for hnswlib to return k results
+            self._graph.set_ef(max(ef_search or self.ef_search, k))
+            labels, distances = self._graph.knn_query(query_matrix, k=k)
+
+            return [
+                [
+                    (self._ids[int(label)], float(1.0 - distance), self._metadata[int(label)])
+                    for label, distance in zip(row_labels, row_distances)
+                ]
+                for row_labels, row_distances in zip(labels, distances)
+            ]
+
+    def export(self) -> Tuple[List[str], np.ndarray, List[Dict[str, Any]]]:
+        with self._lock:
+            labels = list(self._ids)
+            if not labels:
+                return [], np.zeros((0, self._dimension or 0), dtype=np.float32), []
+            vectors = np.asarray(self._graph.get_items(labels), dtype=np.float32)
+            return [self._ids[label] for label in labels], vectors, [self._metadata[label] for label in labels]
+
+    def save(self, path: str) -> None:
+        ids, matrix, metadata = self.export()
+        write_index_files(path, self._dimension, ids, matrix, metadata)
+        logger.info("HNSW index saved", path=path, vectors=len(ids))
+
+    @classmethod
+    def load(cls, path: str, **params) -> "HNSWIndex":
+        dimension, ids, matrix, metadata = read_index_files(path)
+        index = cls(dimension=dimension, initial_capacity=max(len(ids), 1), **params)
+        index.upsert_batch(ids, matrix, metadata)
+        logger.info("HNSW index loaded", path=path, vectors=len(index))
+        return index
+
+    def _ensure_graph(self, dimension: int) -> None:
+        if self._dimension is None:
+            self._dimension = dimension
+        elif dimension != self._dimension:
+            raise ValueError(f"Embedding dimension {dimension} does not match index dimension {self._dimension}")
+
+        if self._graph is None:
+            self._graph = self._hnswlib.Index(space="ip", dim=self._dimension)
+            self._graph.init_index(
+                max_elements=self._initial_capacity,
+                ef_construction=self.ef_construction,
+                M=self.m,
+                allow_replace_deleted=True,
+            )
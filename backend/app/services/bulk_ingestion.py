@@ -0,0 +1,225 @@
+"""
+Bulk Ingestion - Import directories and zip archives through the ingestion pipeline
+"""
+
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+import zipfile
+import structlog
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import ValidationError
+from app.models.database import Document
+from app.services.container import get_services
+from app.services.document_parser import DOCX_TYPE, PDF_TYPE, PPTX_TYPE, XLSX_TYPE
+from app.services.embedding_service import EmbeddingService
+
+logger = structlog.get_logger()
+
+EXTENSION_TYPES = {
+    ".pdf": PDF_TYPE,
+    ".docx": DOCX_TYPE,
+    ".pptx": PPTX_TYPE,
+    ".xlsx": XLSX_TYPE,
+    ".md": "text/markdown",
+    ".markdown": "text/markdown",
+    ".txt": "text/plain",
+}
+
+# Called with a stats snapshot every BULK_PROGRESS_INTERVAL_SECONDS and at the end
+ProgressHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class BulkEntry(NamedTuple):
+    name: str  # path inside the directory or archive
+    content_type: str
+    open: Callable[[], BinaryIO]
+
+
+class BulkIngestionStats:
+    """Running totals for one import; embedding counters are process-wide deltas"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.documents = 0
+        self.skipped = 0
+        self.failed = 0
+        self.chunks = 0
+        self.errors: List[str] = []
+        self.started = time.perf_counter()
+        self._provider_start = EmbeddingService.provider_stats()
+
+    def snapshot(self) -> Dict[str, Any]:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        provider = EmbeddingService.provider_stats()
+        return {
+            "total": self.total,
+            "documents": self.documents,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "chunks": self.chunks,
+            "embedding_requests": provider["requests"] - self._provider_start["requests"],
+            "embedded_texts": provider["inputs"] - self._provider_start["inputs"],
+            "elapsed_seconds": round(elapsed, 2),
+            "docs_per_second": round(self.documents / elapsed, 2),
+            "chunks_per_second": round(self.chunks / elapsed, 2),
+            "errors": self.errors[-10:],
+        }
+
+
+class BulkIngestionService:
+    """
+    Imports many files at once.
+
+    Entries are copied into storage and ingested one per task, with at most
+    ``concurrency`` files in flight, so memory stays flat however large the
+    import. Files whose content hash matches an existing document are
+    skipped, which makes re-running an interrupted import cheap.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None, skip_existing: bool = True):
+        self.concurrency = concurrency or settings.BULK_INGEST_CONCURRENCY
+        self.skip_existing = skip_existing
+        services = get_services()
+        self.document_service = services.document_service
+        self.ingestion_service = services.ingestion_service
+
+    async def ingest_directory(self, path: str, on_progress: Optional[ProgressHandler] = None) -> Dict[str, Any]:
+        """Import every supported file under path, recursively"""
+        entries = await asyncio.to_thread(self._directory_entries, path)
+        return await self._run(entries, on_progress)
+
+    async def ingest_archive(self, path: str, on_progress: Optional[ProgressHandler] = None) -> Dict[str, Any]:
+        """Import every supported file in a zip archive"""
+        if not zipfile.is_zipfile(path):
+            raise ValidationError("Not a zip archive", "file")
+        with zipfile.ZipFile(path) as archive:
+            return await self._run(self._archive_entries(archive), on_progress)
+
+    async def _run(self, entries: List[BulkEntry], on_progress: Optional[ProgressHandler]) -> Dict[str, Any]:
+        stats = BulkIngestionStats(total=len(entries))
+        slots = asyncio.Semaphore(self.concurrency)
+        pending: Set[asyncio.Task] = set()
+
+        def finished(task: asyncio.Task) -> None:
+            slots.release()
+            pending.discard(task)
+
+        reporter = asyncio.create_task(self._report(stats, on_progress))
+        try:
+            for entry in entries:
+                await slots.acquire()
+                task = asyncio.create_task(self._ingest_entry(entry, stats))
+                task.add_done_callback(finished)
+                pending.add(task)
+            await asyncio.gather(*pending)
+        finally:
+            reporter.cancel()
+
+        summary = stats.snapshot()
+        if on_progress:
+            await on_progress(summary)
+        logger.info("Bulk ingestion finished", **{k: v for k, v in summary.items() if k != "errors"})
+        return summary
+
+    async def _ingest_entry(self, entry: BulkEntry, stats: BulkIngestionStats) -> None:
+        filename = os.path.basename(entry.name)
+        spool_dir = os.path.join(settings.LOCAL_STORAGE_PATH, "spool")
+        os.makedirs(spool_dir, exist_ok=True)
+        spool_path = os.path.join(spool_dir, f"{uuid.uuid4().hex}.part")
+
+        try:
+            size, content_hash = await asyncio.to_thread(self._spool, entry, spool_path)
+            if self.skip_existing and await self._already_ingested(content_hash):
+                os.remove(spool_path)
+                stats.skipped += 1
+                return
+
+            document = await self.document_service.create_document(
+                filename=filename,
+                content_type=entry.content_type,
+                size=size,
+                content_hash=content_hash,
+                spool_path=spool_path
+            )
+            result = await self.ingestion_service.process_document(
+                document.id,
+                self.document_service.storage_path(document.id, filename)
+            )
+            stats.documents += 1
+            stats.chunks += result.chunks_total
+        except Exception as e:
+            stats.failed += 1
+            stats.errors.append(f"{entry.name}: {e}")
+            logger.warning("Bulk ingestion entry failed", entry=entry.name, error=str(e))
+            if os.path.exists(spool_path):
+                os.remove(spool_path)
+
+    async def _already_ingested(self, content_hash: str) -> bool:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Document.id)
+                .where(Document.content_hash == content_hash, Document.status == "completed")
+                .limit(1)
+            )
+            return result.first() is not None
+
+    async def _report(self, stats: BulkIngestionStats, on_progress: Optional[ProgressHandler]) -> None:
+        while True:
+            await asyncio.sleep(settings.BULK_PROGRESS_INTERVAL_SECONDS)
+            snapshot = stats.snapshot()
+            logger.info("Bulk ingestion progress", **{k: v for k, v in snapshot.items() if k != "errors"})
+            if on_progress:
+                try:
+                    await on_progress(snapshot)
+                except Exception as e:
+                    logger.warning("Bulk ingestion progress handler failed", error=str(e))
+
+    @staticmethod
+    def _spool(entry: BulkEntry, spool_path: str) -> Tuple[int, str]:
+        """Copy an entry to spool_path, enforcing MAX_FILE_SIZE; returns (size, sha256)"""
+        digest = hashlib.sha256()
+        size = 0
+        with entry.open() as source, open(spool_path, "wb") as out:
+            for block in iter(lambda: source.read(settings.UPLOAD_CHUNK_SIZE), b""):
+                size += len(block)
+                # Archive headers can understate sizes, so count what is actually read
+                if size > settings.MAX_FILE_SIZE:
+                    raise ValidationError("File too large", "file_size")
+                digest.update(block)
+                out.write(block)
+        return size, digest.hexdigest()
+
+    @staticmethod
+    def _content_type(name: str) -> Optional[str]:
+        # Skip macOS metadata that archive tools add alongside real files
+        if name.startswith("__MACOSX/") or os.path.basename(name).startswith("._"):
+            return None
+        content_type = EXTENSION_TYPES.get(os.path.splitext(name)[1].lower())
+        return content_type if content_type in settings.ALLOWED_FILE_TYPES else None
+
+    def _directory_entries(self, root: str) -> List[BulkEntry]:
+        entries = []
+        for directory, subdirectories, filenames in os.walk(root):
+            subdirectories.sort()
+            for filename in sorted(filenames):
+                content_type = self._content_type(filename)
+                if content_type:
+                    path = os.path.join(directory, filename)
+                    entries.append(BulkEntry(os.path.relpath(path, root), content_type, lambda path=path: open(path, "rb")))
+        return entries
+
+    def _archive_entries(self, archive: zipfile.ZipFile) -> List[BulkEntry]:
+        entries = []
+        for info in archive.infolist():
+            content_type = self._content_type(info.filename)
+            if info.is_dir() or not content_type or info.flag_bits & 0x1:  # 0x1: encrypted
+                continue
+            entries.append(BulkEntry(info.filename, content_type, lambda info=info: archive.open(info)))
+        return entries
@@ -0,0 +1,327 @@
+"""
+Bulk Loader - Seed curated datasets from data/*.json into the database and vector index
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+import uuid
+import structlog
+from sqlalchemy import delete, insert, select, update
+
+from app.core.database import AsyncSessionLocal
+from app.models.database import Document, DocumentChunk
+from app.services.document_service import DocumentService
+from app.services.embedding_service import EmbeddingService
+from app.services.embedding_store import EmbeddingStore
+from app.services.vector_service import VectorService
+
+logger = structlog.get_logger()
+
+# backend/data, wherever the repository is checked out
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_CONCURRENCY = 4
+
+# Seeded chunk IDs are derived from document, content and occurrence, so
+# re-running a load addresses the same rows and vectors
+_SEED_NAMESPACE = uuid.UUID("8f0c1c3e-5a51-4a4c-9a0f-7f1e2f9b6d11")
+
+
+class SeedChunk(NamedTuple):
+    content: str
+    section_title: Optional[str] = None
+    metadata: Dict[str, Any] = {}
+
+
+class SeedDocument(NamedTuple):
+    filename: str
+    title: str
+    author: str
+    language: str
+    namespace: str
+    chunks: List[SeedChunk]
+    content_type: str = "text/markdown"
+
+    @property
+    def file_path(self) -> str:
+        """Virtual path that identifies the seeded document across loads"""
+        return f"/virtual/{self.namespace}/{self.filename}"
+
+
+class LoadResult(NamedTuple):
+    document_id: str
+    chunks_total: int
+    chunks_inserted: int
+    chunks_deleted: int
+    chunks_embedded: int
+
+
+class SeedDataset(NamedTuple):
+    files: Sequence[str]  # JSON lists of items, relative to the data directory
+    build: Callable[[List[Dict[str, Any]]], List[SeedDocument]]
+
+
+def bio_documents(items: List[Dict[str, Any]]) -> List[SeedDocument]:
+    """Personal bio sections, one chunk each"""
+    chunks = [
+        SeedChunk(
+            content=f"{section['title']}\n{section['text']}",
+            section_title=section["title"],
+            metadata={
+                "title": section["title"],
+                "category": section["metadata"]["category"],
+                "source": section["metadata"]["source"],
+                "language": section["metadata"]["lang"],
+            }
+        )
+        for section in items
+    ]
+    return [SeedDocument(
+        filename="amrikyy_bio.md",
+        title="السيرة الذاتية - محمد عبدالعزيز (Amrikyy)",
+        author="محمد عبدالعزيز",
+        language="ar",
+        namespace="bio",
+        chunks=chunks
+    )]
+
+
+def coding_documents(items: List[Dict[str, Any]]) -> List[SeedDocument]:
+    """Coding expertise topics, one chunk each"""
+    chunks = []
+    for item in items:
+        category = item.get("category", "general")
+        difficulty = item.get("difficulty", "intermediate")
+        language = item.get("language", "python")
+        tags = item.get("tags", [])
+        content = f"""# {item['title']}
+
+**Category**: {category}
+**Difficulty**: {difficulty}
+**Language**: {language}
+**Tags**: {', '.join(tags)}
+
+{item['content']}
+
+---
+This is part of Amrikyy's programming expertise. محمد عبدالعزيز has extensive experience in {item.get('category', 'programming')} and specializes in {', '.join(tags)}.
+"""
+        chunks.append(SeedChunk(
+            content=content,
+            section_title=item["title"],
+            metadata={
+                "title": item["title"],
+                "category": category,
+                "difficulty": difficulty,
+                "language": language,
+                "tags": tags,
+                "content_type": "coding_expertise",
+                "author": "Amrikyy",
+            }
+        ))
+    return [SeedDocument(
+        filename="amrikyy_coding_expertise.md",
+        title="Amrikyy's Complete Coding Expertise",
+        author="محمد عبدالعزيز (Amrikyy)",
+        language="en",
+        namespace="coding",
+        chunks=chunks
+    )]
+
+
+DATASETS: Dict[str, SeedDataset] = {
+    "bio": SeedDataset(("bio_data.json",), bio_documents),
+    "coding": SeedDataset(("coding_expertise_dataset.json", "advanced_programming_patterns.json"), coding_documents),
+}
+
+
+def dataset_documents(name: str, data_dir: Path = DATA_DIR) -> List[SeedDocument]:
+    dataset = DATASETS[name]
+    items: List[Dict[str, Any]] = []
+    for filename in dataset.files:
+        with open(data_dir / filename, encoding="utf-8") as f:
+            items.extend(json.load(f))
+    return dataset.build(items)
+
+
+def unclaimed_files(data_dir: Path = DATA_DIR) -> List[str]:
+    """data/*.json files that no dataset reads"""
+    claimed = {filename for dataset in DATASETS.values() for filename in dataset.files}
+    return sorted(path.name for path in data_dir.glob("*.json") if path.name not in claimed)
+
+
+class BulkLoader:
+    """
+    Loads seed documents with bulk inserts and batched embedding.
+
+    Loads are idempotent: chunks are identified by content hash, so a re-run
+    inserts and embeds only what changed, deletes what was removed, and
+    re-indexes chunks whose vectors are missing from the index, from the
+    embedding store where it has them.
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, concurrency: int = DEFAULT_CONCURRENCY):
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.embedding_service = EmbeddingService()
+        self.embedding_store = EmbeddingStore()
+        self.vector_service = VectorService()
+
+    async def load_datasets(self, names: Optional[Sequence[str]] = None, data_dir: Path = DATA_DIR) -> List[LoadResult]:
+        results = []
+        for name in names or DATASETS:
+            for document in dataset_documents(name, data_dir):
+                results.append(await self.load_document(document))
+        return results
+
+    async def load_document(self, seed: SeedDocument) -> LoadResult:
+        """Bring one seeded document's chunks and vectors in line with seed"""
+        content = "\n\n".join(chunk.content for chunk in seed.chunks)
+
+        async with AsyncSessionLocal() as db:
+            try:
+                result = await db.execute(
+                    select(Document).where(Document.file_path == seed.file_path).order_by(Document.created_at)
+                )
+                documents = list(result.scalars().all())
+                # Earlier populate runs created a new copy of the document each time
+                duplicates = [str(duplicate.id) for duplicate in documents[1:]]
+                document = documents[0] if documents else None
+                if document is None:
+                    document = Document(id=uuid.uuid4(), file_path=seed.file_path)
+                    db.add(document)
+                document.filename = seed.filename
+                document.original_filename = seed.filename
+                document.content_type = seed.content_type
+                document.size = len(content.encode("utf-8"))
+                document.content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+                document.status = "completed"
+                document.title = seed.title
+                document.author = seed.author
+                document.language = seed.language
+                document.processed_at = datetime.utcnow()
+                await db.flush()
+
+                rows = self._chunk_rows(document.id, seed.chunks)
+                existing = await db.execute(
+                    select(DocumentChunk.id, DocumentChunk.embedding_id).where(DocumentChunk.document_id == document.id)
+                )
+                existing_ids = {chunk_id: embedding_id for chunk_id, embedding_id in existing.all()}
+
+                new_rows = [row for row in rows if row["id"] not in existing_ids]
+                kept_rows = [row for row in rows if row["id"] in existing_ids]
+                vanished = [chunk_id for chunk_id in existing_ids if chunk_id not in {row["id"] for row in rows}]
+
+                if vanished:
+                    await self.vector_service.delete_vectors(
+                        [existing_ids[chunk_id] for chunk_id in vanished if existing_ids[chunk_id]],
+                        namespace=seed.namespace
+                    )
+                    await db.execute(delete(DocumentChunk).where(DocumentChunk.id.in_(vanished)))
+                if new_rows:
+                    await db.execute(insert(DocumentChunk), new_rows)
+                if kept_rows:
+                    # Positions shift when seed items are added or removed
+                    await db.execute(
+                        update(DocumentChunk),
+                        [{"id": row["id"], "chunk_index": row["chunk_index"]} for row in kept_rows]
+                    )
+
+                # Kept chunks are re-indexed only if their vector is gone
+                present = await self.vector_service.get_vectors(
+                    [row["embedding_id"] for row in kept_rows], namespace=seed.namespace
+                )
+                to_index = new_rows + [row for row in kept_rows if row["embedding_id"] not in present]
+                metadata = {row["id"]: chunk.metadata for row, chunk in zip(rows, seed.chunks)}
+                embedded = await self._index(document, seed.namespace, to_index, metadata)
+
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+
+        for duplicate_id in duplicates:
+            await DocumentService().delete_document(duplicate_id)
+
+        result = LoadResult(
+            document_id=str(document.id),
+            chunks_total=len(rows),
+            chunks_inserted=len(new_rows),
+            chunks_deleted=len(vanished),
+            chunks_embedded=embedded
+        )
+        logger.info("Seed document loaded", namespace=seed.namespace, **result._asdict())
+        return result
+
+    async def _index(
+        self,
+        document: Document,
+        namespace: str,
+        rows: List[Dict[str, Any]],
+        metadata: Dict[uuid.UUID, Dict[str, Any]]
+    ) -> int:
+        """
+        Upsert rows' vectors, embedding only content the embedding store lacks
+        in batch_size batches, up to concurrency batches at a time. Returns
+        the number of texts sent to the provider.
+        """
+        stored = await self.embedding_store.get_many(row["content_hash"] for row in rows)
+        vectors: Dict[str, List[float]] = {content_hash: vector.tolist() for content_hash, vector in stored.items()}
+        missing = {row["content_hash"]: row["content"] for row in rows if row["content_hash"] not in vectors}
+        hashes = list(missing)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def embed_batch(batch: List[str]) -> None:
+            async with semaphore:
+                embeddings = await self.embedding_service.embed_batch([missing[content_hash] for content_hash in batch])
+            fresh = dict(zip(batch, embeddings))
+            await self.embedding_store.put_many(fresh)
+            vectors.update(fresh)
+
+        await asyncio.gather(*(
+            embed_batch(hashes[start:start + self.batch_size])
+            for start in range(0, len(hashes), self.batch_size)
+        ))
+
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            await self.vector_service.upsert_vectors(
+                [row["embedding_id"] for row in batch],
+                [vectors[row["content_hash"]] for row in batch],
+                [
+                    {
+                        **metadata[row["id"]],
+                        "document_id": str(document.id),
+                        "chunk_id": str(row["id"]),
+                        "content": row["content"][:500]
+                    }
+                    for row in batch
+                ],
+                namespace=namespace
+            )
+        return len(hashes)
+
+    @staticmethod
+    def _chunk_rows(document_id: uuid.UUID, chunks: Sequence[SeedChunk]) -> List[Dict[str, Any]]:
+        occurrences: Counter = Counter()
+        rows = []
+        for index, chunk in enumerate(chunks):
+            content_hash = hashlib.sha256(chunk.content.encode("utf-8")).hexdigest()
+            occurrences[content_hash] += 1
+            chunk_id = uuid.uuid5(_SEED_NAMESPACE, f"{document_id}:{content_hash}:{occurrences[content_hash]}")
+            rows.append({
+                "id": chunk_id,
+                "document_id": document_id,
+                "content": chunk.content,
+                "chunk_index": index,
+                "section_title": chunk.section_title,
+                "content_hash": content_hash,
+                "embedding_id": str(chunk_id),
+            })
+        return rows
@@ -0,0 +1,157 @@
+"""
+Chat Service - Conversation and message persistence
+"""
+
+from typing import List, Optional
+from datetime import datetime
+import json
+import uuid
+import structlog
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import NotFoundError
+from app.models.database import Conversation, Message
+from app.models.schemas import (
+    ConversationCreate,
+    ConversationResponse,
+    MessageResponse,
+    Source
+)
+
+logger = structlog.get_logger()
+
+def parse_conversation_id(conversation_id: str) -> Optional[uuid.UUID]:
+    """Parse a conversation ID, returning None if it is not a valid UUID"""
+    try:
+        return uuid.UUID(str(conversation_id))
+    except ValueError:
+        return None
+
+class ChatService:
+    """Service for storing conversations and their messages"""
+
+    async def get_conversations(self, limit: int = 50, offset: int = 0) -> List[ConversationResponse]:
+        """List conversations, most recently active first"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Conversation)
+                .order_by(Conversation.updated_at.desc())
+                .offset(offset)
+                .limit(limit)
+            )
+            return [self._to_response(conversation) for conversation in result.scalars().all()]
+
+    async def create_conversation(self, conversation: ConversationCreate) -> ConversationResponse:
+        """Create an empty conversation"""
+        async with AsyncSessionLocal() as db:
+            try:
+                new_conversation = Conversation(title=conversation.title)
+                db.add(new_conversation)
+                await db.commit()
+                await db.refresh(new_conversation)
+                return self._to_response(new_conversation)
+            except Exception:
+                await db.rollback()
+                raise
+
+    async def get_conversation(self, conversation_id: str) -> Optional[ConversationResponse]:
+        """Get a conversation with its messages"""
+        parsed_id = parse_conversation_id(conversation_id)
+        if parsed_id is None:
+            return None
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Conversation)
+                .options(selectinload(Conversation.messages))
+                .where(Conversation.id == parsed_id)
+            )
+            conversation = result.scalar_one_or_none()
+            return self._to_response(conversation, include_messages=True) if conversation else None
+
+    async def delete_conversation(self, conversation_id: str) -> None:
+        """Delete a conversation and its messages"""
+        parsed_id = parse_conversation_id(conversation_id)
+        async with AsyncSessionLocal() as db:
+            conversation = await db.get(Conversation, parsed_id) if parsed_id else None
+            if not conversation:
+                raise NotFoundError("Conversation not found", "conversation")
+            await db.delete(conversation)
+            await db.commit()
+
+    async def add_message_to_conversation(
+        self,
+        conversation_id: str,
+        user_message: str,
+        assistant_message: str,
+        sources: Optional[List[Source]] = None,
+        model_used: Optional[str] = None,
+        tokens_used: Optional[int] = None,
+        processing_time: Optional[float] = None
+    ) -> None:
+        """Append a user/assistant exchange, creating the conversation if needed"""
+        parsed_id = parse_conversation_id(conversation_id)
+        if parsed_id is None:
+            logger.warning("Skipping message persistence for invalid conversation ID", conversation_id=conversation_id)
+            return
+
+        async with AsyncSessionLocal() as db:
+            try:
+                conversation = await db.get(Conversation, parsed_id)
+                if not conversation:
+                    conversation = Conversation(id=parsed_id, title=user_message[:100], message_count=0)
+                    db.add(conversation)
+
+                index = conversation.message_count or 0
+                now = datetime.utcnow()
+                db.add(Message(
+                    conversation_id=parsed_id,
+                    role="user",
+                    content=user_message,
+                    message_index=index
+                ))
+                db.add(Message(
+                    conversation_id=parsed_id,
+                    role="assistant",
+                    content=assistant_message,
+                    sources_used=[json.loads(source.json()) for source in sources] if sources else None,
+                    model_used=model_used,
+                    tokens_used=tokens_used,
+                    processing_time=processing_time,
+                    message_index=index + 1
+                ))
+                conversation.message_count = index + 2
+                conversation.last_message_at = now
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.error("Failed to save messages", error=str(e), conversation_id=conversation_id)
+                raise
+
+    def _to_response(self, conversation: Conversation, include_messages: bool = False) -> ConversationResponse:
+        messages = None
+        if include_messages:
+            messages = [
+                MessageResponse(
+                    id=str(message.id),
+                    role=message.role,
+                    content=message.content,
+                    timestamp=message.created_at,
+                    sources=[Source(**source) for source in message.sources_used] if message.sources_used else None,
+                    tokens_used=message.tokens_used,
+                    processing_time=message.processing_time
+                )
+                for message in sorted(conversation.messages, key=lambda message: message.message_index)
+            ]
+
+        return ConversationResponse(
+            id=str(conversation.id),
+            title=conversation.title,
+            message_count=conversation.message_count or 0,
+            last_message_at=conversation.last_message_at,
+            created_at=conversation.created_at,
+            updated_at=conversation.updated_at,
+            messages=messages
+        )
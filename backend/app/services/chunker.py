@@ -0,0 +1,194 @@
+"""
+Chunker - Streaming, token-aware text chunking on sentence boundaries
+"""
+
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+from typing import Deque, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import re
+import structlog
+
+logger = structlog.get_logger()
+
+# Sentence ends: Latin and Arabic terminators (؟ ۔ …) plus closing quotes and
+# brackets, then whitespace; or a blank line between paragraphs
+_SENTENCE_END = re.compile(r"[.!?؟۔…]+[\"'”’)\]»]*\s+|\n\s*\n")
+_WORD = re.compile(r"\s*\S+\s*")
+# Rough BPE stand-in used only when the tokenizer cannot be loaded
+_APPROX_TOKEN = re.compile(r"\w{1,4}|[^\w\s]")
+
+# Text with no sentence end is cut at whitespace after this many characters
+MAX_SENTENCE_CHARS = 10_000
+# Sentences tokenized per batch call
+TOKENIZE_BATCH = 512
+
+# (page number or None, text); concatenating the texts gives the document text
+Segment = Tuple[Optional[int], str]
+
+
+class Sentence(NamedTuple):
+    start: int  # character offset in the document text
+    end: int
+    page: Optional[int]
+    text: str
+
+
+class Chunk(NamedTuple):
+    content: str
+    start_offset: int
+    end_offset: int
+    page_number: Optional[int]
+    token_count: int
+
+
+class Tokenizer:
+    """Counts model tokens with tiktoken, estimating if the encoding is unavailable"""
+
+    def __init__(self, model: str):
+        self.model = model
+        self._encoding = None
+        try:
+            import tiktoken
+
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            # tiktoken downloads its BPE files on first use, which fails offline
+            logger.warning("Tokenizer unavailable; estimating token counts", model=model, error=str(e))
+
+    def count(self, texts: List[str]) -> List[int]:
+        if self._encoding is not None:
+            return [len(tokens) for tokens in self._encoding.encode_ordinary_batch(texts)]
+        return [len(_APPROX_TOKEN.findall(text)) for text in texts]
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model: str) -> Tokenizer:
+    """One tokenizer per model per process; loading an encoding is expensive"""
+    return Tokenizer(model)
+
+
+def iter_sentences(segments: Iterable[Segment]) -> Iterator[Sentence]:
+    """
+    Split streamed text into sentences with exact character offsets.
+
+    Only the unfinished tail of the text is buffered, and it never grows past
+    MAX_SENTENCE_CHARS, so memory stays bounded whatever the input size.
+    A page change always ends the current sentence.
+    """
+    offset = 0  # document offset of buffer[0]
+    buffer = ""
+    page: Optional[int] = None
+
+    for segment_page, text in segments:
+        if segment_page != page and buffer:
+            yield Sentence(offset, offset + len(buffer), page, buffer)
+            offset += len(buffer)
+            buffer = ""
+        page = segment_page
+        buffer += text
+
+        start = 0
+        for match in _SENTENCE_END.finditer(buffer):
+            yield Sentence(offset + start, offset + match.end(), page, buffer[start:match.end()])
+            start = match.end()
+
+        while len(buffer) - start > MAX_SENTENCE_CHARS:
+            cut = buffer.rfind(" ", start, start + MAX_SENTENCE_CHARS) + 1
+            if cut <= start:
+                cut = start + MAX_SENTENCE_CHARS
+            yield Sentence(offset + start, offset + cut, page, buffer[start:cut])
+            start = cut
+
+        offset += start
+        buffer = buffer[start:]
+
+    if buffer:
+        yield Sentence(offset, offset + len(buffer), page, buffer)
+
+
+def chunk_segments(
+    segments: Iterable[Segment],
+    chunk_size: int,
+    chunk_overlap: int,
+    model: str
+) -> Iterator[Chunk]:
+    """
+    Pack sentences into chunks of at most chunk_size tokens.
+
+    Consecutive chunks share up to chunk_overlap tokens of whole sentences.
+    Sentences longer than a chunk are split between words. Token counts are
+    summed per sentence, so they can differ slightly from encoding the chunk
+    as a whole.
+    """
+    tokenizer = get_tokenizer(model)
+    window: Deque[Tuple[Sentence, int]] = deque()
+    window_tokens = 0
+
+    sentences = iter_sentences(segments)
+    while True:
+        batch = list(islice(sentences, TOKENIZE_BATCH))
+        if not batch:
+            break
+        for sentence, tokens in zip(batch, tokenizer.count([sentence.text for sentence in batch])):
+            for piece, piece_tokens in _fit(sentence, tokens, chunk_size, tokenizer):
+                if window and window_tokens + piece_tokens > chunk_size:
+                    chunk = _make_chunk(window, window_tokens)
+                    if chunk:
+                        yield chunk
+                    # Carry trailing sentences forward as overlap
+                    while window and (window_tokens > chunk_overlap or window_tokens + piece_tokens > chunk_size):
+                        window_tokens -= window.popleft()[1]
+                window.append((piece, piece_tokens))
+                window_tokens += piece_tokens
+
+    # Chunks are emitted before a piece is added, so the final window always holds unemitted text
+    if window:
+        chunk = _make_chunk(window, window_tokens)
+        if chunk:
+            yield chunk
+
+
+def _fit(sentence: Sentence, tokens: int, chunk_size: int, tokenizer: Tokenizer) -> Iterator[Tuple[Sentence, int]]:
+    """Yield the sentence, or pieces of it, each at most chunk_size tokens"""
+    if tokens <= chunk_size:
+        yield sentence, tokens
+        return
+
+    words = [match.span() for match in _WORD.finditer(sentence.text)]
+    counts = tokenizer.count([sentence.text[start:end] for start, end in words])
+    piece_start = piece_end = 0
+    piece_tokens = 0
+    for (start, end), count in zip(words, counts):
+        if piece_tokens and piece_tokens + count > chunk_size:
+            yield _slice(sentence, piece_start, piece_end), piece_tokens
+            piece_start, piece_tokens = start, 0
+        if count > chunk_size:
+            # A single "word" longer than a chunk (e.g. an encoded blob) is cut by characters
+            step = max(1, (end - start) * chunk_size // count)
+            for cut in range(start, end, step):
+                part = _slice(sentence, cut, min(cut + step, end))
+                yield part, tokenizer.count([part.text])[0]
+            piece_start, piece_tokens = end, 0
+        else:
+            piece_tokens += count
+        piece_end = end
+    if piece_tokens:
+        yield _slice(sentence, piece_start, piece_end), piece_tokens
+
+
+def _slice(sentence: Sentence, start: int, end: int) -> Sentence:
+    return Sentence(sentence.start + start, sentence.start + end, sentence.page, sentence.text[start:end])
+
+
+def _make_chunk(window: Deque[Tuple[Sentence, int]], tokens: int) -> Optional[Chunk]:
+    text = "".join(sentence.text for sentence, _ in window)
+    content = text.strip()
+    if not content:
+        return None
+    start = window[0][0].start + len(text) - len(text.lstrip())
+    page = next((sentence.page for sentence, _ in window if sentence.text.strip()), None)
+    return Chunk(content, start, start + len(content), page, tokens)
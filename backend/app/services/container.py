@@ -0,0 +1,89 @@
+"""
+Service Container - Services built once per process and shared by every request
+"""
+
+from typing import Optional
+import openai
+import structlog
+
+from app.core.config import settings
+from app.services.chat_service import ChatService
+from app.services.document_service import DocumentService
+from app.services.embedding_service import EmbeddingService
+from app.services.embedding_store import EmbeddingStore
+from app.services.ingestion_service import IngestionService
+from app.services.job_queue import JobQueue
+from app.services.llm_service import LLMService
+from app.services.rag_service import RAGService
+from app.services.retrieval_service import RetrievalService
+from app.services.vector_service import VectorService
+
+logger = structlog.get_logger()
+
+
+class ServiceContainer:
+    """
+    The application's long-lived services, wired to each other.
+
+    The services keep no per-request state, so one instance of each serves
+    every request. Embedding and chat calls share one OpenAI client, whose
+    HTTP pool keeps provider connections (and their TLS sessions) open
+    between requests instead of opening new ones per request.
+    """
+
+    def __init__(self):
+        self.openai_client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.vector_service = VectorService()
+        self.embedding_service = EmbeddingService(client=self.openai_client)
+        self.llm_service = LLMService(client=self.openai_client)
+        self.retrieval_service = RetrievalService(self.vector_service, self.embedding_service)
+        self.rag_service = RAGService(self.retrieval_service, self.llm_service, self.embedding_service)
+        self.chat_service = ChatService()
+        self.document_service = DocumentService(self.vector_service)
+        self.ingestion_service = IngestionService(self.embedding_service, EmbeddingStore(), self.vector_service)
+        self.job_queue = JobQueue()
+
+    async def close(self) -> None:
+        await self.openai_client.close()
+
+
+_services: Optional[ServiceContainer] = None
+
+
+def init_services() -> ServiceContainer:
+    """Build the shared services; called on startup"""
+    global _services
+    if _services is None:
+        _services = ServiceContainer()
+        logger.info("Services initialised")
+    return _services
+
+
+def get_services() -> ServiceContainer:
+    """Shared services, built on first use outside the app (scripts, workers)"""
+    return _services or init_services()
+
+
+async def close_services() -> None:
+    """Close the shared provider connections"""
+    global _services
+    if _services is not None:
+        await _services.close()
+    _services = None
+
+
+# FastAPI dependencies
+def get_chat_service() -> ChatService:
+    return get_services().chat_service
+
+
+def get_rag_service() -> RAGService:
+    return get_services().rag_service
+
+
+def get_document_service() -> DocumentService:
+    return get_services().document_service
+
+
+def get_job_queue() -> JobQueue:
+    return get_services().job_queue
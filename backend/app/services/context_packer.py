@@ -0,0 +1,199 @@
+"""
+Context Packer - Fit retrieved passages into the prompt's token budget
+"""
+
+from typing import Any, Dict, List, NamedTuple, Set, Tuple
+import re
+
+from app.core.config import settings
+from app.services.chunker import get_tokenizer
+
+# Context windows by model name prefix; the longest matching prefix wins
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4.1": 1047576,
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4-32k": 32768,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Share of a passage's word shingles already packed above which it is dropped
+DUPLICATE_THRESHOLD = 0.8
+SHINGLE_WORDS = 5
+# A passage cut to fit the budget must keep at least this many tokens
+MIN_PASSAGE_TOKENS = 64
+# Separators and citation labels between passages
+PASSAGE_SEPARATOR = "\n\n"
+_WORDS = re.compile(r"\w+")
+
+
+def context_window(model: str) -> int:
+    """Tokens the model accepts for prompt and completion together"""
+    if settings.LLM_CONTEXT_WINDOW:
+        return settings.LLM_CONTEXT_WINDOW
+    prefixes = [prefix for prefix in MODEL_CONTEXT_WINDOWS if model.startswith(prefix)]
+    return MODEL_CONTEXT_WINDOWS[max(prefixes, key=len)] if prefixes else DEFAULT_CONTEXT_WINDOW
+
+
+class PackedContext(NamedTuple):
+    text: str
+    documents: List[Dict[str, Any]]  # one per [Source n], in citation order
+    tokens: int
+    merged: int  # passages joined into a neighbour from the same document
+    duplicates: int
+    truncated: int  # passages cut or left out for the budget
+
+
+class ContextPacker:
+    """
+    Packs reranked passages into at most ``budget`` tokens, best first.
+
+    Passages from the same document whose character ranges overlap or
+    follow one another are merged, with the shared text written once; a
+    merged passage that does not fit is replaced by its best-ranked chunk.
+    Passages whose word shingles mostly repeat text already packed are
+    dropped. Each passage is labelled ``[Source n]`` with its title and
+    page or section, which the prompt's citation rules refer to; the
+    returned documents are numbered the same way.
+    """
+
+    def __init__(self, model: str, duplicate_threshold: float = DUPLICATE_THRESHOLD):
+        self.tokenizer = get_tokenizer(model)
+        self.duplicate_threshold = duplicate_threshold
+
+    def pack(self, documents: List[Dict[str, Any]], budget: int) -> PackedContext:
+        passages, merged = self._merge(documents)
+
+        seen: Set[int] = set()
+        packed: List[Dict[str, Any]] = []
+        parts: List[str] = []
+        used = duplicates = truncated = 0
+
+        for passage in passages:
+            shingles = self._shingles(passage["content"])
+            if shingles and len(shingles & seen) / len(shingles) >= self.duplicate_threshold:
+                duplicates += 1
+                continue
+
+            best_chunk = passage.pop("best_chunk", None)
+            label = self._label(len(packed) + 1, passage)
+            text = f"{label}\n{passage['content']}"
+            tokens = self.tokenizer.count([PASSAGE_SEPARATOR + text])[0]
+            if used + tokens > budget:
+                truncated += 1
+                if best_chunk is not None:
+                    # A merged span that does not fit falls back to its best-ranked chunk,
+                    # so cutting it never drops that chunk in favour of its neighbours
+                    passage, shingles = best_chunk, self._shingles(best_chunk["content"])
+                    label = self._label(len(packed) + 1, passage)
+                    text = f"{label}\n{passage['content']}"
+                    tokens = self.tokenizer.count([PASSAGE_SEPARATOR + text])[0]
+            if used + tokens > budget:
+                remaining = budget - used - self.tokenizer.count([PASSAGE_SEPARATOR + label])[0]
+                if remaining < MIN_PASSAGE_TOKENS:
+                    continue
+                passage = {**passage, "content": self._truncate(passage["content"], remaining)}
+                text = f"{label}\n{passage['content']}"
+                tokens = self.tokenizer.count([PASSAGE_SEPARATOR + text])[0]
+
+            seen |= shingles
+            packed.append(passage)
+            parts.append(text)
+            used += tokens
+
+        return PackedContext(PASSAGE_SEPARATOR.join(parts), packed, used, merged, duplicates, truncated)
+
+    def _merge(self, documents: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """Join overlapping or consecutive chunks of one document; returns passages in rank order"""
+        runs: Dict[Any, List[Dict[str, Any]]] = {}
+        passages: List[Tuple[int, Dict[str, Any]]] = []
+        for rank, document in enumerate(documents):
+            doc_id = (document.get("metadata") or {}).get("doc_id")
+            if doc_id is None or document.get("start_offset") is None:
+                passages.append((rank, dict(document)))
+            else:
+                runs.setdefault(doc_id, []).append({**document, "rank": rank})
+
+        merged = 0
+        for members in runs.values():
+            members.sort(key=lambda member: member["start_offset"])
+            current = members[0]
+            for member in members[1:]:
+                if self._joinable(current, member):
+                    current = self._join(current, member)
+                    merged += 1
+                else:
+                    passages.append((current.pop("rank"), current))
+                    current = member
+            passages.append((current.pop("rank"), current))
+
+        passages.sort(key=lambda item: item[0])
+        return [passage for _, passage in passages], merged
+
+    @staticmethod
+    def _joinable(first: Dict[str, Any], second: Dict[str, Any]) -> bool:
+        if second["start_offset"] <= first["end_offset"]:
+            return True
+        # Chunks without overlap are separated only by the whitespace stripped from their edges
+        return (
+            first.get("chunk_index") is not None
+            and second.get("chunk_index") == first["chunk_index"] + 1
+        )
+
+    @staticmethod
+    def _join(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge second into first; the better-ranked chunk keeps its ID, score and metadata"""
+        overlap = first["end_offset"] - second["start_offset"]
+        if overlap >= 0:
+            content = first["content"] + second["content"][overlap:]
+        else:
+            content = first["content"] + " " + second["content"]
+        best = first if first["rank"] <= second["rank"] else second
+        # The best-ranked member as it was retrieved, for when the merged span must be cut
+        best_chunk = best.get("best_chunk") or {key: value for key, value in best.items() if key != "rank"}
+        pages = [page for page in (first.get("first_page"), first.get("page_number"), second.get("page_number")) if page]
+        return {
+            **best,
+            "content": content,
+            "start_offset": first["start_offset"],
+            "end_offset": max(first["end_offset"], second["end_offset"]),
+            "chunk_index": second.get("chunk_index"),
+            "first_page": min(pages) if pages else None,
+            "page_number": max(pages) if pages else None,
+            "rank": min(first["rank"], second["rank"]),
+            "best_chunk": best_chunk,
+        }
+
+    @staticmethod
+    def _label(number: int, passage: Dict[str, Any]) -> str:
+        parts = [f"[Source {number}] {passage.get('title') or 'Untitled'}"]
+        metadata = passage.get("metadata") or {}
+        first_page, last_page = passage.get("first_page"), passage.get("page_number")
+        if first_page and last_page and first_page != last_page:
+            parts.append(f"pp. {first_page}-{last_page}")
+        elif last_page:
+            parts.append(f"p. {last_page}")
+        section = metadata.get("section")
+        if section and section != passage.get("title"):
+            parts.append(section)
+        return " | ".join(parts)
+
+    @staticmethod
+    def _shingles(text: str) -> Set[int]:
+        words = _WORDS.findall(text.casefold())
+        if len(words) < SHINGLE_WORDS:
+            return {hash(tuple(words))} if words else set()
+        return {hash(tuple(words[i:i + SHINGLE_WORDS])) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+    def _truncate(self, text: str, tokens: int) -> str:
+        """Cut text to at most tokens, at a word boundary, marking the cut"""
+        total = self.tokenizer.count([text])[0]
+        cut = len(text)
+        while total > tokens and cut > 0:
+            cut = int(cut * tokens / total * 0.95)
+            space = text.rfind(" ", 0, cut)
+            cut = space if space > 0 else cut
+            total = self.tokenizer.count([text[:cut] + " …"])[0]
+        return text[:cut].rstrip() + " …"
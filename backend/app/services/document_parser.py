@@ -0,0 +1,190 @@
+"""
+Document Parser - Text extraction and chunking in a worker process pool
+"""
+
+from typing import Iterator, List, NamedTuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import hashlib
+import multiprocessing
+import threading
+import structlog
+
+from app.core.config import settings
+from app.core.exceptions import FileProcessingError
+from app.services.chunker import Segment, chunk_segments
+
+logger = structlog.get_logger()
+
+PDF_TYPE = "application/pdf"
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+PPTX_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+TEXT_TYPES = ("text/plain", "text/markdown")
+
+# Characters of plain text read per step
+TEXT_READ_SIZE = 1024 * 1024
+
+
+class ParsedChunk(NamedTuple):
+    """Compact chunk record sent back from a parser process"""
+    index: int
+    content: str
+    content_hash: str
+    start_offset: Optional[int] = None  # character offsets in the extracted text
+    end_offset: Optional[int] = None
+    page_number: Optional[int] = None
+    token_count: Optional[int] = None
+
+
+def iter_text(file_path: str, content_type: str) -> Iterator[Segment]:
+    """
+    Stream (page number, text) segments from supported file types.
+
+    Pages are PDF pages, slides or worksheets; Word and text files have no
+    pages. Plain text is read in TEXT_READ_SIZE blocks rather than all at once.
+    """
+    if content_type == PDF_TYPE:
+        from PyPDF2 import PdfReader
+
+        for number, page in enumerate(PdfReader(file_path).pages, start=1):
+            yield number, ("\n\n" if number > 1 else "") + (page.extract_text() or "")
+        return
+
+    if content_type == DOCX_TYPE:
+        import docx
+
+        for index, paragraph in enumerate(docx.Document(file_path).paragraphs):
+            yield None, ("\n\n" if index else "") + paragraph.text
+        return
+
+    if content_type == PPTX_TYPE:
+        from pptx import Presentation
+
+        for number, slide in enumerate(Presentation(file_path).slides, start=1):
+            texts = [shape.text_frame.text for shape in slide.shapes if shape.has_text_frame]
+            yield number, ("\n\n" if number > 1 else "") + "\n".join(text for text in texts if text)
+        return
+
+    if content_type == XLSX_TYPE:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            for number, sheet in enumerate(workbook.worksheets, start=1):
+                rows = [
+                    "\t".join(str(value) for value in row if value is not None)
+                    for row in sheet.iter_rows(values_only=True)
+                ]
+                yield number, ("\n\n" if number > 1 else "") + "\n".join([sheet.title] + [row for row in rows if row])
+        finally:
+            workbook.close()
+        return
+
+    if content_type in TEXT_TYPES:
+        with open(file_path, encoding="utf-8", errors="replace") as f:
+            for block in iter(lambda: f.read(TEXT_READ_SIZE), ""):
+                yield None, block
+        return
+
+    raise FileProcessingError(f"Unsupported content type: {content_type}")
+
+
+def extract_text(file_path: str, content_type: str) -> str:
+    """Extract plain text from supported file types"""
+    return "".join(text for _, text in iter_text(file_path, content_type))
+
+
+def parse_document(
+    file_path: str,
+    content_type: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    model: str
+) -> List[ParsedChunk]:
+    """Extract and chunk one file; runs inside a worker process"""
+    chunks = chunk_segments(iter_text(file_path, content_type), chunk_size, chunk_overlap, model)
+    return [
+        ParsedChunk(
+            index,
+            chunk.content,
+            hashlib.sha256(chunk.content.encode("utf-8")).hexdigest(),
+            chunk.start_offset,
+            chunk.end_offset,
+            chunk.page_number,
+            chunk.token_count
+        )
+        for index, chunk in enumerate(chunks)
+    ]
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_in_flight: Optional[asyncio.Semaphore] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Spawned workers don't inherit the API process's sockets, threads or event loop
+                _pool = ProcessPoolExecutor(
+                    max_workers=settings.PARSE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _pool
+
+
+def _recycle_pool(pool: ProcessPoolExecutor) -> None:
+    """Route new work to a fresh pool; the old one exits once its queued tasks end"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def shutdown_parse_pool() -> None:
+    """Stop the parser processes"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def parse_in_pool(file_path: str, content_type: str) -> List[ParsedChunk]:
+    """
+    Parse and chunk a document off the event loop.
+
+    At most PARSE_MAX_IN_FLIGHT documents are parsed at once, and each must
+    finish within PARSE_TIMEOUT_SECONDS. With PARSE_WORKERS=0 parsing runs in
+    a thread of this process instead of a worker pool.
+    """
+    global _in_flight
+    if _in_flight is None:
+        _in_flight = asyncio.Semaphore(settings.PARSE_MAX_IN_FLIGHT)
+
+    args = (file_path, content_type, settings.CHUNK_SIZE, settings.CHUNK_OVERLAP, settings.OPENAI_EMBEDDING_MODEL)
+
+    async with _in_flight:
+        pool = _get_pool() if settings.PARSE_WORKERS > 0 else None
+        if pool is None:
+            job = asyncio.to_thread(parse_document, *args)
+        else:
+            job = asyncio.get_running_loop().run_in_executor(pool, parse_document, *args)
+
+        try:
+            return await asyncio.wait_for(job, settings.PARSE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("Document parsing timed out", file_path=file_path, timeout=settings.PARSE_TIMEOUT_SECONDS)
+            if pool is not None:
+                # A worker may be stuck on this file, so stop sending it new work
+                _recycle_pool(pool)
+            raise FileProcessingError(f"Parsing timed out after {settings.PARSE_TIMEOUT_SECONDS}s")
+        except BrokenProcessPool:
+            logger.error("Parser process pool broke; starting a new one", file_path=file_path)
+            _recycle_pool(pool)
+            raise FileProcessingError("Parser process exited unexpectedly")
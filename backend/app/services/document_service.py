@@ -0,0 +1,230 @@
+"""
+Document Service - Document metadata management and removal
+"""
+
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import os
+import uuid
+import structlog
+from fastapi import UploadFile
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import ValidationError
+from app.models.database import Document, DocumentChunk, IngestionJob
+from app.models.schemas import DocumentResponse
+from app.services.job_queue import job_to_response
+from app.services.lexical_index import remove_chunks
+from app.services.response_cache import invalidate_documents
+from app.services.vector_service import VectorService
+
+logger = structlog.get_logger()
+
+def parse_document_id(document_id: str) -> Optional[uuid.UUID]:
+    """Parse a document ID, returning None if it is not a valid UUID"""
+    try:
+        return uuid.UUID(str(document_id))
+    except ValueError:
+        return None
+
+class DocumentService:
+    """Service for managing uploaded documents"""
+
+    def __init__(self, vector_service: Optional[VectorService] = None):
+        self.vector_service = vector_service or VectorService()
+
+    @staticmethod
+    def storage_path(document_id: str, filename: str) -> str:
+        """Where a document's original file is kept"""
+        return os.path.join(settings.LOCAL_STORAGE_PATH, f"{document_id}_{os.path.basename(filename)}")
+
+    async def spool_upload(self, file: UploadFile, max_size: Optional[int] = None) -> Tuple[str, int, str]:
+        """
+        Stream an upload to a spool file in UPLOAD_CHUNK_SIZE pieces.
+
+        The size limit is enforced as bytes arrive and the SHA-256 is computed
+        on the fly, so memory use stays at one chunk whatever the file size.
+        max_size defaults to MAX_FILE_SIZE. Returns (spool_path, size, sha256 hex digest).
+        """
+        spool_dir = os.path.join(settings.LOCAL_STORAGE_PATH, "spool")
+        os.makedirs(spool_dir, exist_ok=True)
+        spool_path = os.path.join(spool_dir, f"{uuid.uuid4().hex}.part")
+
+        max_size = max_size or settings.MAX_FILE_SIZE
+        digest = hashlib.sha256()
+        size = 0
+
+        def write_chunk(out, chunk: bytes) -> None:
+            out.write(chunk)
+            digest.update(chunk)
+
+        try:
+            with open(spool_path, "wb") as out:
+                while True:
+                    chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_size:
+                        raise ValidationError("File too large", "file_size")
+                    # Disk writes and hashing run off the event loop
+                    await asyncio.to_thread(write_chunk, out, chunk)
+        except Exception:
+            os.remove(spool_path)
+            raise
+
+        return spool_path, size, digest.hexdigest()
+
+    async def create_document(
+        self,
+        filename: str,
+        content_type: str,
+        size: int,
+        content_hash: Optional[str] = None,
+        spool_path: Optional[str] = None
+    ) -> DocumentResponse:
+        """Create the document record for a new upload, moving its spooled file into storage"""
+        document_id = uuid.uuid4()
+        file_path = self.storage_path(str(document_id), filename)
+
+        async with AsyncSessionLocal() as db:
+            try:
+                document = Document(
+                    id=document_id,
+                    filename=os.path.basename(file_path),
+                    original_filename=filename,
+                    content_type=content_type,
+                    size=size,
+                    file_path=file_path,
+                    content_hash=content_hash,
+                    status="uploaded"
+                )
+                db.add(document)
+                if spool_path:
+                    # Same filesystem as the spool, so the move is an atomic rename
+                    os.replace(spool_path, file_path)
+                await db.commit()
+                await db.refresh(document)
+                return self._to_response(document, chunks_count=0)
+            except Exception:
+                await db.rollback()
+                if spool_path and os.path.exists(file_path):
+                    os.remove(file_path)
+                raise
+
+    async def get_documents(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        status: Optional[str] = None
+    ) -> List[DocumentResponse]:
+        """List documents, newest first"""
+        async with AsyncSessionLocal() as db:
+            query = select(Document)
+            if status:
+                query = query.where(Document.status == status)
+            result = await db.execute(query.order_by(Document.created_at.desc()).offset(offset).limit(limit))
+            documents = result.scalars().all()
+            counts = await self._chunk_counts(db, [document.id for document in documents])
+            return [self._to_response(document, counts.get(document.id, 0)) for document in documents]
+
+    async def get_document(self, document_id: str) -> Optional[DocumentResponse]:
+        """Get a single document with its latest ingestion job"""
+        parsed_id = parse_document_id(document_id)
+        if parsed_id is None:
+            return None
+
+        async with AsyncSessionLocal() as db:
+            document = await db.get(Document, parsed_id)
+            if not document:
+                return None
+            counts = await self._chunk_counts(db, [document.id])
+            job = await db.execute(
+                select(IngestionJob)
+                .where(IngestionJob.document_id == document.id)
+                .order_by(IngestionJob.created_at.desc())
+                .limit(1)
+            )
+            return self._to_response(document, counts.get(document.id, 0), job.scalar_one_or_none())
+
+    async def delete_document(self, document_id: str) -> bool:
+        """Delete a document, its chunks, its vectors and its stored file"""
+        parsed_id = parse_document_id(document_id)
+        if parsed_id is None:
+            return False
+
+        async with AsyncSessionLocal() as db:
+            try:
+                document = await db.get(Document, parsed_id)
+                if not document:
+                    logger.warning("Document to delete not found", document_id=document_id)
+                    return False
+
+                result = await db.execute(
+                    select(DocumentChunk.embedding_id)
+                    .where(DocumentChunk.document_id == parsed_id, DocumentChunk.embedding_id.isnot(None))
+                )
+                embedding_ids = list(result.scalars().all())
+
+                # Vector deletes are keyed by embedding_id, so no reindex is needed.
+                # Seeded documents live outside the default namespace, so try them all.
+                if embedding_ids:
+                    for namespace in settings.VECTOR_NAMESPACES:
+                        await self.vector_service.delete_vectors(embedding_ids, namespace=namespace)
+
+                file_path = document.file_path
+                # Bulk-delete chunks so the ORM cascade has nothing left to load
+                await db.execute(delete(DocumentChunk).where(DocumentChunk.document_id == parsed_id))
+                await db.delete(document)
+                await db.commit()
+                remove_chunks(embedding_ids)
+                invalidate_documents([document_id])
+            except Exception as e:
+                await db.rollback()
+                logger.error("Failed to delete document", error=str(e), document_id=document_id)
+                raise
+
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+
+        logger.info("Document deleted", document_id=document_id, vectors_removed=len(embedding_ids))
+        return True
+
+    async def _chunk_counts(self, db: AsyncSession, document_ids: List[uuid.UUID]) -> Dict[uuid.UUID, int]:
+        """Chunk count per document in one grouped query"""
+        if not document_ids:
+            return {}
+        result = await db.execute(
+            select(DocumentChunk.document_id, func.count(DocumentChunk.id))
+            .where(DocumentChunk.document_id.in_(document_ids))
+            .group_by(DocumentChunk.document_id)
+        )
+        return dict(result.all())
+
+    def _to_response(
+        self,
+        document: Document,
+        chunks_count: int,
+        job: Optional[IngestionJob] = None
+    ) -> DocumentResponse:
+        return DocumentResponse(
+            id=str(document.id),
+            filename=document.filename,
+            original_filename=document.original_filename,
+            content_type=document.content_type,
+            size=document.size,
+            status=document.status,
+            processing_error=document.processing_error,
+            title=document.title,
+            author=document.author,
+            language=document.language or "ar",
+            chunks_count=chunks_count,
+            created_at=document.created_at,
+            updated_at=document.updated_at,
+            processed_at=document.processed_at,
+            job=job_to_response(job) if job else None
+        )
@@ -0,0 +1,298 @@
+"""
+Embedding Service - Generate vector embeddings for queries and document chunks
+"""
+
+import openai
+from typing import List, Optional, Dict, Any, Set, Tuple, Callable, Awaitable
+import asyncio
+import hashlib
+import unicodedata
+import weakref
+import numpy as np
+import structlog
+
+from app.core.config import settings
+from app.core.cache import LRUCache, SingleFlight
+from app.core.database import get_redis, redis_get_many, redis_set_many
+from app.core.exceptions import EmbeddingError
+
+logger = structlog.get_logger()
+
+# Query embeddings shared by every EmbeddingService instance in the process
+_query_cache = LRUCache(settings.EMBEDDING_CACHE_SIZE)
+_redis_stats = {"hits": 0, "misses": 0, "errors": 0}
+# Embeddings requests sent to the provider by this process, and texts in them
+_provider_stats = {"requests": 0, "inputs": 0}
+# Query embeddings being fetched, by cache key
+_embedding_flights = SingleFlight("query_embeddings")
+
+# The provider accepts at most this many inputs per embeddings request
+MAX_INPUTS_PER_REQUEST = 2048
+
+class EmbeddingCoalescer:
+    """
+    Gathers single-text embedding requests that arrive within ``max_wait``
+    seconds of each other and sends them as one batched provider call.
+
+    A batch is flushed when it reaches ``max_batch_size`` or when the wait
+    expires, whichever comes first; each caller gets its own vector back.
+    """
+
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], Awaitable[List[List[float]]]],
+        max_batch_size: int = 64,
+        max_wait: float = 0.005
+    ):
+        self._embed_batch = embed_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # The loop only keeps weak references to tasks, so in-flight batches are held here
+        self._running: Set[asyncio.Task] = set()
+        self.requests = 0
+        self.batches = 0
+
+    async def embed(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        self.requests += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0
+        }
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self.batches += 1
+            task = asyncio.create_task(self._run(batch))
+            task.add_done_callback(self._running.discard)
+            self._running.add(task)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        # Identical texts in one window are embedded once
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = dict(zip(unique_texts, await self._embed_batch(unique_texts)))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for text, future in batch:
+            if not future.done():
+                future.set_result(vectors[text])
+
+# One coalescer per event loop, since its futures and timers belong to a loop
+_coalescers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, EmbeddingCoalescer]" = weakref.WeakKeyDictionary()
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a query for cache keys: NFKC, collapsed whitespace, casefolded"""
+    return " ".join(unicodedata.normalize("NFKC", query).split()).casefold()
+
+class EmbeddingService:
+    """Service for generating text embeddings"""
+
+    def __init__(self, client: Optional[openai.AsyncOpenAI] = None):
+        self.client = client or openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.model = settings.OPENAI_EMBEDDING_MODEL
+
+    async def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a user query, checking the in-process LRU and then Redis first.
+
+        Vectors are cached as packed float32 bytes (4 bytes per dimension).
+        """
+        key = self._cache_key(query)
+        if not settings.EMBEDDING_CACHE_ENABLED:
+            return await self._share(key, lambda: self._embed_uncached_query(query))
+
+        vector = _query_cache.get(key)
+        if vector is None:
+            # Concurrent misses for one query share a Redis lookup and provider call
+            vector = await self._share(key, lambda: self._fetch_query_vector(key, query))
+
+        return vector.tolist()
+
+    async def _fetch_query_vector(self, key: str, query: str) -> np.ndarray:
+        vector = await self._redis_get(key)
+        if vector is None:
+            vector = np.asarray(await self._embed_uncached_query(query), dtype=np.float32)
+            await self._redis_set(key, vector)
+        _query_cache.set(key, vector)
+        return vector
+
+    @staticmethod
+    async def _share(key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await call()
+        return await _embedding_flights.do(key, call)
+
+    async def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed several queries with one pipelined Redis lookup and one
+        provider request for whatever neither cache tier holds.
+        """
+        if not settings.EMBEDDING_CACHE_ENABLED:
+            return await self.embed_batch(queries)
+
+        keys = [self._cache_key(query) for query in queries]
+        vectors: Dict[str, np.ndarray] = {}
+        for key in keys:
+            vector = _query_cache.get(key)
+            if vector is not None:
+                vectors[key] = vector
+
+        missing = list(dict.fromkeys(key for key in keys if key not in vectors))
+        for key, vector in zip(missing, await self._redis_get_many(missing)):
+            if vector is not None:
+                vectors[key] = vector
+                _query_cache.set(key, vector)
+
+        to_embed = {key: query for key, query in zip(keys, queries) if key not in vectors}
+        if to_embed:
+            embedded = await self.embed_batch(list(to_embed.values()))
+            fresh = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(to_embed, embedded)}
+            for key, vector in fresh.items():
+                vectors[key] = vector
+                _query_cache.set(key, vector)
+            await self._redis_set_many(fresh)
+
+        return [vectors[key].tolist() for key in keys]
+
+    async def embed_text(self, text: str) -> List[float]:
+        """Embed a single piece of text"""
+        try:
+            response = await self.client.embeddings.create(
+                model=self.model,
+                input=text
+            )
+            _provider_stats["requests"] += 1
+            _provider_stats["inputs"] += 1
+            return response.data[0].embedding
+
+        except openai.APIError as e:
+            logger.error("OpenAI embedding API error", error=str(e))
+            raise EmbeddingError(f"Embedding request failed: {str(e)}")
+
+        except Exception as e:
+            logger.error("Unexpected error in embedding service", error=str(e))
+            raise EmbeddingError(f"Embedding generation failed: {str(e)}")
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed many texts, one provider request per MAX_INPUTS_PER_REQUEST inputs"""
+        embeddings: List[List[float]] = []
+        try:
+            for start in range(0, len(texts), MAX_INPUTS_PER_REQUEST):
+                batch = texts[start:start + MAX_INPUTS_PER_REQUEST]
+                response = await self.client.embeddings.create(model=self.model, input=batch)
+                _provider_stats["requests"] += 1
+                _provider_stats["inputs"] += len(batch)
+                embeddings.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+            return embeddings
+
+        except openai.APIError as e:
+            logger.error("OpenAI embedding API error", error=str(e), batch_size=len(texts))
+            raise EmbeddingError(f"Embedding request failed: {str(e)}")
+
+        except Exception as e:
+            logger.error("Unexpected error in embedding service", error=str(e), batch_size=len(texts))
+            raise EmbeddingError(f"Embedding generation failed: {str(e)}")
+
+    @staticmethod
+    def cache_stats() -> Dict[str, Any]:
+        """Hit/miss counters for both cache tiers"""
+        return {"memory": _query_cache.stats(), "redis": dict(_redis_stats)}
+
+    @staticmethod
+    def provider_stats() -> Dict[str, int]:
+        """Embeddings requests made to the provider and the texts they carried"""
+        return dict(_provider_stats)
+
+    @staticmethod
+    def coalescer_stats() -> Dict[str, Any]:
+        """Request and batch counters for the coalescer on the running loop"""
+        try:
+            coalescer = _coalescers.get(asyncio.get_running_loop())
+        except RuntimeError:
+            coalescer = None
+        return coalescer.stats() if coalescer else {"requests": 0, "batches": 0, "avg_batch_size": 0.0}
+
+    async def _embed_uncached_query(self, query: str) -> List[float]:
+        if not settings.EMBEDDING_COALESCE_ENABLED:
+            return await self.embed_text(query)
+
+        loop = asyncio.get_running_loop()
+        coalescer = _coalescers.get(loop)
+        if coalescer is None:
+            coalescer = EmbeddingCoalescer(
+                self.embed_batch,
+                max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                max_wait=settings.EMBEDDING_BATCH_MAX_WAIT_MS / 1000
+            )
+            _coalescers[loop] = coalescer
+        return await coalescer.embed(query)
+
+    def _cache_key(self, query: str) -> str:
+        digest = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+        return f"embedding:{self.model}:{digest}"
+
+    async def _redis_get(self, key: str) -> Optional[np.ndarray]:
+        # The Redis tier is best-effort: failures fall through to the provider
+        try:
+            packed = await (await get_redis()).get(key)
+        except Exception as e:
+            _redis_stats["errors"] += 1
+            logger.warning("Embedding cache read failed", error=str(e))
+            return None
+
+        if packed is None:
+            _redis_stats["misses"] += 1
+            return None
+        _redis_stats["hits"] += 1
+        return np.frombuffer(packed, dtype=np.float32)
+
+    async def _redis_set(self, key: str, vector: np.ndarray) -> None:
+        try:
+            await (await get_redis()).set(key, vector.tobytes(), ex=settings.CACHE_TTL)
+        except Exception as e:
+            _redis_stats["errors"] += 1
+            logger.warning("Embedding cache write failed", error=str(e))
+
+    async def _redis_get_many(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        try:
+            packed_values = await redis_get_many(keys)
+        except Exception as e:
+            _redis_stats["errors"] += 1
+            logger.warning("Embedding cache read failed", error=str(e))
+            return [None] * len(keys)
+
+        vectors = []
+        for packed in packed_values:
+            _redis_stats["hits" if packed is not None else "misses"] += 1
+            vectors.append(np.frombuffer(packed, dtype=np.float32) if packed is not None else None)
+        return vectors
+
+    async def _redis_set_many(self, vectors: Dict[str, np.ndarray]) -> None:
+        try:
+            await redis_set_many({key: vector.tobytes() for key, vector in vectors.items()}, ttl=settings.CACHE_TTL)
+        except Exception as e:
+            _redis_stats["errors"] += 1
+            logger.warning("Embedding cache write failed", error=str(e))
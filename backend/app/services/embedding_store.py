@@ -0,0 +1,85 @@
+"""
+Embedding Store - Raw chunk embeddings kept in the database by content hash and model
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+from datetime import datetime
+import numpy as np
+import structlog
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.database import ChunkEmbedding
+
+logger = structlog.get_logger()
+
+# Hashes per lookup query and rows per insert, well under asyncpg's bind limit
+STORE_BATCH_SIZE = 1000
+
+
+class EmbeddingStore:
+    """
+    Durable copy of the chunk embeddings returned by the provider.
+
+    Vectors are packed float32 bytes keyed by (content hash, model), so a
+    given text is paid for once per model, and vector indexes can be rebuilt
+    from here at database speed instead of through the provider.
+    """
+
+    def __init__(self, model: Optional[str] = None):
+        self.model = model or settings.OPENAI_EMBEDDING_MODEL
+
+    async def get_many(self, content_hashes: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Stored vectors for whichever of content_hashes this model has"""
+        hashes = list(set(content_hashes))
+        vectors: Dict[str, np.ndarray] = {}
+        if not hashes:
+            return vectors
+
+        async with AsyncSessionLocal() as db:
+            for start in range(0, len(hashes), STORE_BATCH_SIZE):
+                result = await db.execute(
+                    select(ChunkEmbedding.content_hash, ChunkEmbedding.vector)
+                    .where(
+                        ChunkEmbedding.model == self.model,
+                        ChunkEmbedding.content_hash.in_(hashes[start:start + STORE_BATCH_SIZE])
+                    )
+                )
+                for content_hash, packed in result.all():
+                    vectors[content_hash] = self.unpack(packed)
+        return vectors
+
+    async def put_many(self, vectors: Dict[str, Sequence[float]]) -> None:
+        """Store vectors by content hash; hashes already stored for this model are kept as they are"""
+        if not vectors:
+            return
+
+        now = datetime.utcnow()
+        rows: List[dict] = [
+            {
+                "content_hash": content_hash,
+                "model": self.model,
+                "dimension": len(vector),
+                "vector": self.pack(vector),
+                "created_at": now,
+            }
+            for content_hash, vector in vectors.items()
+        ]
+        async with AsyncSessionLocal() as db:
+            for start in range(0, len(rows), STORE_BATCH_SIZE):
+                await db.execute(
+                    insert(ChunkEmbedding)
+                    .values(rows[start:start + STORE_BATCH_SIZE])
+                    .on_conflict_do_nothing(index_elements=["content_hash", "model"])
+                )
+            await db.commit()
+
+    @staticmethod
+    def pack(vector: Sequence[float]) -> bytes:
+        return np.asarray(vector, dtype=np.float32).tobytes()
+
+    @staticmethod
+    def unpack(packed: bytes) -> np.ndarray:
+        return np.frombuffer(packed, dtype=np.float32)
@@ -0,0 +1,163 @@
+"""
+Index Rebuild - Repopulate the local vector indexes from the embedding store
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+import time
+import numpy as np
+import structlog
+from sqlalchemy import and_, select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.database import ChunkEmbedding, Document, DocumentChunk
+from app.services.embedding_service import EmbeddingService
+from app.services.embedding_store import EmbeddingStore
+from app.services.vector_service import (
+    DEFAULT_NAMESPACE,
+    LocalIndex,
+    get_local_index,
+    new_local_index,
+    persist_local_index,
+    replace_local_index,
+)
+
+logger = structlog.get_logger()
+
+REBUILD_BATCH_SIZE = 1000
+
+# Seeded documents are stored under /virtual/<namespace>/ (see SeedDocument.file_path)
+VIRTUAL_PREFIX = "/virtual/"
+
+
+def document_namespace(file_path: str) -> str:
+    """Vector namespace that holds a document's chunks"""
+    if file_path.startswith(VIRTUAL_PREFIX):
+        return file_path[len(VIRTUAL_PREFIX):].split("/", 1)[0]
+    return DEFAULT_NAMESPACE
+
+
+class IndexRebuilder:
+    """
+    Rebuilds every namespace's local index from document_chunks, reading
+    vectors from the embedding store in streamed batches.
+
+    A chunk the store lacks takes its vector from the current index when
+    ``reuse_index`` is set, and is embedded otherwise; either way the vector
+    is stored, so the next rebuild reads everything from the store. Vector
+    metadata already in the current index is carried over, which keeps the
+    extra fields of seeded chunks.
+    """
+
+    def __init__(self, batch_size: int = REBUILD_BATCH_SIZE, reuse_index: bool = True):
+        self.batch_size = batch_size
+        # Only safe while the current index was built with OPENAI_EMBEDDING_MODEL
+        self.reuse_index = reuse_index
+        self.embedding_service = EmbeddingService()
+        self.embedding_store = EmbeddingStore()
+
+    async def rebuild(self) -> Dict[str, Any]:
+        """Build fresh indexes, swap them in and persist them; returns counts per vector source"""
+        started = time.perf_counter()
+        current: Dict[str, LocalIndex] = {}
+        fresh: Dict[str, LocalIndex] = {namespace: new_local_index() for namespace in settings.VECTOR_NAMESPACES}
+        stats = {"chunks": 0, "from_store": 0, "from_index": 0, "embedded": 0}
+
+        query = (
+            select(
+                DocumentChunk.id,
+                DocumentChunk.embedding_id,
+                DocumentChunk.content,
+                DocumentChunk.content_hash,
+                Document.id.label("document_id"),
+                Document.title,
+                Document.original_filename,
+                Document.file_path,
+                ChunkEmbedding.vector,
+            )
+            .join(Document, DocumentChunk.document_id == Document.id)
+            .outerjoin(
+                ChunkEmbedding,
+                and_(
+                    ChunkEmbedding.content_hash == DocumentChunk.content_hash,
+                    ChunkEmbedding.model == self.embedding_store.model
+                )
+            )
+            .where(DocumentChunk.embedding_id.isnot(None))
+            .execution_options(yield_per=self.batch_size)
+        )
+
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(query)
+            async for rows in result.partitions():
+                await self._add_batch(rows, current, fresh, stats)
+
+        for namespace, index in fresh.items():
+            replace_local_index(namespace, index)
+        persist_local_index()
+
+        stats["vectors"] = {namespace: len(index) for namespace, index in fresh.items()}
+        stats["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+        logger.info("Local vector indexes rebuilt", **stats)
+        return stats
+
+    async def _add_batch(
+        self,
+        rows: Sequence[Any],
+        current: Dict[str, LocalIndex],
+        fresh: Dict[str, LocalIndex],
+        stats: Dict[str, Any]
+    ) -> None:
+        vectors: List[Optional[np.ndarray]] = []
+        recovered: Dict[str, Sequence[float]] = {}  # vectors the store should keep
+        missing: Dict[str, str] = {}
+
+        for row in rows:
+            namespace = document_namespace(row.file_path)
+            if namespace not in current:
+                current[namespace] = get_local_index(namespace)
+
+            vector = EmbeddingStore.unpack(row.vector) if row.vector is not None else None
+            if vector is not None:
+                stats["from_store"] += 1
+            elif self.reuse_index:
+                vector = current[namespace].get(row.embedding_id)
+                if vector is not None:
+                    stats["from_index"] += 1
+                    if row.content_hash:
+                        recovered[row.content_hash] = vector
+            if vector is None:
+                # Chunks from before content hashing are keyed by embedding ID and not stored
+                missing.setdefault(row.content_hash or row.embedding_id, row.content)
+            vectors.append(vector)
+
+        embedded: Dict[str, List[float]] = {}
+        if missing:
+            keys = list(missing)
+            embedded = dict(zip(keys, await self.embedding_service.embed_batch([missing[key] for key in keys])))
+            stats["embedded"] += len(keys)
+            hashes = {row.content_hash for row in rows if row.content_hash}
+            recovered.update((key, vector) for key, vector in embedded.items() if key in hashes)
+        await self.embedding_store.put_many(recovered)
+
+        by_namespace: Dict[str, tuple] = {}
+        for row, vector in zip(rows, vectors):
+            if vector is None:
+                vector = embedded[row.content_hash or row.embedding_id]
+            namespace = document_namespace(row.file_path)
+            metadata = current[namespace].get_metadata(row.embedding_id) or {
+                "document_id": str(row.document_id),
+                "chunk_id": str(row.id),
+                "title": row.title or row.original_filename,
+                "content": row.content[:500]
+            }
+            ids, batch_vectors, metadatas = by_namespace.setdefault(namespace, ([], [], []))
+            ids.append(row.embedding_id)
+            batch_vectors.append(vector)
+            metadatas.append(metadata)
+
+        for namespace, (ids, batch_vectors, metadatas) in by_namespace.items():
+            if namespace not in fresh:
+                fresh[namespace] = new_local_index()
+            fresh[namespace].upsert_batch(ids, batch_vectors, metadatas)
+        stats["chunks"] += len(rows)
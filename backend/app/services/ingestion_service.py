@@ -0,0 +1,264 @@
+"""
+Ingestion Service - Parse, chunk, embed and index uploaded documents
+"""
+
+from typing import Dict, List, Optional
+from datetime import datetime
+import asyncio
+import hashlib
+import uuid
+import structlog
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import FileProcessingError
+from app.models.database import Document, DocumentChunk
+from app.models.schemas import IngestionResult
+from app.services.document_parser import parse_in_pool
+from app.services.document_service import parse_document_id
+from app.services.embedding_service import EmbeddingService
+from app.services.embedding_store import EmbeddingStore
+from app.services.job_queue import ProgressCallback
+from app.services.lexical_index import index_chunks, remove_chunks
+from app.services.response_cache import invalidate_documents
+from app.services.vector_service import VectorService
+
+logger = structlog.get_logger()
+
+# Texts per embedding call while ingesting, so progress advances between calls
+EMBED_PROGRESS_STEP = 256
+
+
+async def _no_progress(stage: str, done: int, total: int) -> None:
+    pass
+
+
+class IngestionService:
+    """Service for turning uploaded files into indexed chunks"""
+
+    def __init__(
+        self,
+        embedding_service: Optional[EmbeddingService] = None,
+        embedding_store: Optional[EmbeddingStore] = None,
+        vector_service: Optional[VectorService] = None
+    ):
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.embedding_store = embedding_store or EmbeddingStore()
+        self.vector_service = vector_service or VectorService()
+
+    async def process_document(
+        self,
+        document_id: str,
+        file_path: str,
+        progress: Optional[ProgressCallback] = None
+    ) -> IngestionResult:
+        """Ingest an uploaded file already stored at file_path"""
+        return await self._ingest(document_id, file_path, progress or _no_progress)
+
+    async def reprocess_document(
+        self,
+        document_id: str,
+        progress: Optional[ProgressCallback] = None
+    ) -> IngestionResult:
+        """Re-chunk the stored file, embedding only chunks whose content changed"""
+        document = await self._load_document(document_id)
+        return await self._ingest(document_id, document.file_path, progress or _no_progress)
+
+    async def _ingest(self, document_id: str, file_path: str, progress: ProgressCallback) -> IngestionResult:
+        """
+        Bring a document's chunks in line with its file.
+
+        New chunks are matched to stored ones by content hash: matches keep
+        their rows and vectors, chunks that vanished are deleted, and only
+        the rest are embedded (or copied from an identical chunk elsewhere).
+        Failures mark the document failed and are re-raised so the job can
+        be retried.
+        """
+        result = IngestionResult(document_id=str(document_id))
+
+        async with AsyncSessionLocal() as db:
+            try:
+                document = await db.get(Document, parse_document_id(document_id))
+                if not document:
+                    raise FileProcessingError(f"Document {document_id} not found")
+                document.status = "processing"
+                document.processing_error = None
+                await db.commit()
+
+                await progress("parse", 0, 1)
+                parsed_chunks = await parse_in_pool(file_path, document.content_type)
+                # Extraction and chunking both run in the parser process
+                await progress("parse", 1, 1)
+                await progress("chunk", len(parsed_chunks), len(parsed_chunks))
+                existing = await db.execute(
+                    select(DocumentChunk)
+                    .where(DocumentChunk.document_id == document.id)
+                    .order_by(DocumentChunk.chunk_index)
+                )
+
+                # Stored chunks by hash; repeated content is matched in order
+                unmatched: Dict[str, List[DocumentChunk]] = {}
+                for chunk in existing.scalars().all():
+                    unmatched.setdefault(chunk.content_hash, []).append(chunk)
+
+                kept, new_chunks = [], []
+                for parsed in parsed_chunks:
+                    candidates = unmatched.get(parsed.content_hash)
+                    if candidates:
+                        chunk = candidates.pop(0)
+                        # Edits elsewhere in the file shift a kept chunk's position
+                        chunk.chunk_index = parsed.index
+                        chunk.start_offset = parsed.start_offset
+                        chunk.end_offset = parsed.end_offset
+                        chunk.page_number = parsed.page_number
+                        kept.append(chunk)
+                        continue
+
+                    chunk_id = uuid.uuid4()
+                    new_chunks.append(DocumentChunk(
+                        id=chunk_id,
+                        document_id=document.id,
+                        content=parsed.content,
+                        chunk_index=parsed.index,
+                        start_offset=parsed.start_offset,
+                        end_offset=parsed.end_offset,
+                        page_number=parsed.page_number,
+                        embedding_id=str(chunk_id),
+                        content_hash=parsed.content_hash
+                    ))
+                vanished = [chunk for chunks in unmatched.values() for chunk in chunks]
+
+                # A kept chunk whose vector went missing is re-indexed like a new one
+                present = await self.vector_service.get_vectors([chunk.embedding_id for chunk in kept])
+                reindexed = [chunk for chunk in kept if chunk.embedding_id not in present]
+                to_index = new_chunks + reindexed
+
+                embeddings = await self._embeddings_for(db, to_index, result, progress)
+                await progress("index", 0, len(to_index))
+                await self.vector_service.upsert_vectors(
+                    [chunk.embedding_id for chunk in to_index],
+                    embeddings,
+                    [
+                        {
+                            "document_id": str(document.id),
+                            "chunk_id": str(chunk.id),
+                            "title": document.title or document.original_filename,
+                            "content": chunk.content[:500]
+                        }
+                        for chunk in to_index
+                    ]
+                )
+
+                vanished_ids = [chunk.embedding_id for chunk in vanished if chunk.embedding_id]
+                if vanished_ids:
+                    await self.vector_service.delete_vectors(vanished_ids)
+                for chunk in vanished:
+                    await db.delete(chunk)
+
+                lexical_entries = [(chunk.embedding_id, chunk.content) for chunk in new_chunks]
+                db.add_all(new_chunks)
+                document.status = "completed"
+                if not document.content_hash:
+                    # Uploads are hashed while spooling; older documents are hashed here
+                    document.content_hash = await asyncio.to_thread(self._file_sha256, file_path)
+                document.processed_at = datetime.utcnow()
+                await db.commit()
+
+                remove_chunks(vanished_ids)
+                index_chunks(lexical_entries)
+                if new_chunks or vanished:
+                    # Cached answers citing the old content, or lacking sources, may now be wrong
+                    invalidate_documents([document_id], include_unsourced=True)
+
+                result.chunks_total = len(parsed_chunks)
+                result.chunks_unchanged = len(kept) - len(reindexed)
+                result.chunks_deleted = len(vanished)
+                result.embeddings_saved = result.chunks_unchanged + result.chunks_reused
+                await progress("index", len(to_index), len(to_index))
+                logger.info("Document ingested", **result.dict())
+
+            except Exception as e:
+                await db.rollback()
+                logger.error("Document ingestion failed", error=str(e), document_id=document_id)
+                document = await db.get(Document, parse_document_id(document_id))
+                if document:
+                    document.status = "failed"
+                    document.processing_error = str(e)
+                    await db.commit()
+                raise
+
+        return result
+
+    async def _embeddings_for(
+        self,
+        db: AsyncSession,
+        chunks: List[DocumentChunk],
+        result: IngestionResult,
+        progress: ProgressCallback
+    ) -> List[List[float]]:
+        """
+        Embeddings for chunks, from the embedding store, then from indexed
+        chunks with the same content, and only then from the provider.
+        """
+        if not chunks:
+            await progress("embed", 0, 0)
+            return []
+
+        stored = await self.embedding_store.get_many(chunk.content_hash for chunk in chunks)
+        by_hash: Dict[str, List[float]] = {content_hash: vector.tolist() for content_hash, vector in stored.items()}
+
+        # Chunks indexed before the store existed can still donate their vectors
+        donor_ids: Dict[str, str] = {}
+        unstored = {chunk.content_hash for chunk in chunks} - set(stored)
+        if unstored:
+            donors = await db.execute(
+                select(DocumentChunk.content_hash, DocumentChunk.embedding_id)
+                .where(DocumentChunk.content_hash.in_(unstored), DocumentChunk.embedding_id.isnot(None))
+            )
+            for content_hash, embedding_id in donors.all():
+                donor_ids.setdefault(embedding_id, content_hash)
+
+        for namespace in settings.VECTOR_NAMESPACES:
+            pending = [embedding_id for embedding_id, content_hash in donor_ids.items() if content_hash not in by_hash]
+            if not pending:
+                break
+            for embedding_id, vector in (await self.vector_service.get_vectors(pending, namespace=namespace)).items():
+                by_hash.setdefault(donor_ids[embedding_id], vector)
+
+        # Repeated content within the document is embedded once
+        missing: Dict[str, str] = {}
+        for chunk in chunks:
+            if chunk.content_hash not in by_hash:
+                missing.setdefault(chunk.content_hash, chunk.content)
+        hashes, texts = list(missing), list(missing.values())
+        await progress("embed", 0, len(texts))
+        for start in range(0, len(texts), EMBED_PROGRESS_STEP):
+            batch = texts[start:start + EMBED_PROGRESS_STEP]
+            by_hash.update(zip(hashes[start:start + EMBED_PROGRESS_STEP], await self.embedding_service.embed_batch(batch)))
+            await progress("embed", start + len(batch), len(texts))
+        # Donated and fresh vectors are stored, so the next reprocess or rebuild skips both lookups
+        await self.embedding_store.put_many({
+            content_hash: vector for content_hash, vector in by_hash.items() if content_hash not in stored
+        })
+
+        result.chunks_embedded = len(missing)
+        result.chunks_reused = len(chunks) - len(missing)
+        return [by_hash[chunk.content_hash] for chunk in chunks]
+
+    async def _load_document(self, document_id: str) -> Document:
+        parsed_id = parse_document_id(document_id)
+        async with AsyncSessionLocal() as db:
+            document = await db.get(Document, parsed_id) if parsed_id else None
+            if not document:
+                raise FileProcessingError(f"Document {document_id} not found")
+            return document
+
+    @staticmethod
+    def _file_sha256(file_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(settings.UPLOAD_CHUNK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
@@ -0,0 +1,198 @@
+"""
+Ingestion Worker - Runs queued ingestion jobs under the queue's concurrency limits
+"""
+
+from typing import Any, Dict, List, Optional
+import asyncio
+import os
+import time
+import structlog
+
+from app.core.config import settings
+from app.models.database import IngestionJob
+from app.services.bulk_ingestion import BulkIngestionService
+from app.services.container import get_services
+from app.services.job_queue import JobQueue, RUNNABLE_STATUSES
+
+logger = structlog.get_logger()
+
+# Seconds before a job that found no free slot is offered again
+LEASE_RETRY_DELAY = 1.0
+# Minimum seconds between progress writes within one stage
+PROGRESS_INTERVAL = 0.5
+
+
+class _ProgressReporter:
+    """Progress callback that records per-stage fractions on the job, throttled"""
+
+    def __init__(self, queue: JobQueue, job_id: str):
+        self.queue = queue
+        self.job_id = job_id
+        self.progress: Dict[str, float] = {}
+        self.stage: Optional[str] = None
+        self.last_write = 0.0
+
+    async def __call__(self, stage: str, done: int, total: int) -> None:
+        self.progress[stage] = round(done / total, 4) if total else 1.0
+        now = time.monotonic()
+        # Always write stage changes and completions; throttle the steps in between
+        if stage == self.stage and done < total and now - self.last_write < PROGRESS_INTERVAL:
+            return
+        self.stage, self.last_write = stage, now
+        await self.queue.report_progress(self.job_id, stage, self.progress)
+
+
+class IngestionWorker:
+    """Pulls job IDs from the queue and runs them one at a time"""
+
+    def __init__(self, name: str, queue: Optional[JobQueue] = None):
+        services = get_services()
+        self.name = name
+        self.queue = queue or services.job_queue
+        self.ingestion_service = services.ingestion_service
+        self.document_service = services.document_service
+
+    async def run(self, stop: asyncio.Event) -> None:
+        logger.info("Ingestion worker started", worker=self.name)
+        while not stop.is_set():
+            try:
+                job_id = await self.queue.next_job_id(timeout=1)
+                if job_id:
+                    await self.handle(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Ingestion worker error", worker=self.name, error=str(e))
+                await asyncio.sleep(1)
+        logger.info("Ingestion worker stopped", worker=self.name)
+
+    async def handle(self, job_id: str) -> None:
+        """Run one job if it is still runnable and a slot is free"""
+        job = await self.queue.get_job(job_id)
+        if job is None or job.status not in RUNNABLE_STATUSES:
+            return
+
+        if not await self.queue.acquire_lease(job):
+            await self.queue.defer(job_id, LEASE_RETRY_DELAY)
+            return
+
+        try:
+            job = await self.queue.claim(job_id)
+            if job is None:
+                return
+
+            heartbeat = asyncio.create_task(self._heartbeat(job))
+            try:
+                result = await self._execute(job)
+            except Exception as e:
+                retrying = await self.queue.fail(job, str(e))
+                logger.warning(
+                    "Ingestion job failed",
+                    job_id=job_id,
+                    attempt=job.attempts,
+                    retrying=retrying,
+                    error=str(e)
+                )
+                if not retrying and job.job_type == "bulk":
+                    # The archive is kept only for retries
+                    self._remove_archive(job.payload["archive_path"])
+            else:
+                await self.queue.complete(job_id, result)
+                logger.info("Ingestion job completed", job_id=job_id, job_type=job.job_type)
+            finally:
+                heartbeat.cancel()
+        finally:
+            await self.queue.release_lease(job)
+
+    async def _execute(self, job: IngestionJob) -> Dict[str, Any]:
+        document_id = str(job.document_id)
+        progress = _ProgressReporter(self.queue, str(job.id))
+
+        if job.job_type == "ingest":
+            result = await self.ingestion_service.process_document(document_id, job.payload["file_path"], progress)
+            return result.dict()
+        if job.job_type == "reprocess":
+            result = await self.ingestion_service.reprocess_document(document_id, progress)
+            return result.dict()
+        if job.job_type == "delete":
+            return {"deleted": await self.document_service.delete_document(document_id)}
+        if job.job_type == "bulk":
+            return await self._execute_bulk(job)
+        raise ValueError(f"Unknown job type: {job.job_type}")
+
+    async def _execute_bulk(self, job: IngestionJob) -> Dict[str, Any]:
+        """Import an uploaded archive, publishing throughput as the job's running result"""
+        archive_path = job.payload["archive_path"]
+
+        async def publish(stats: Dict[str, Any]) -> None:
+            done = stats["documents"] + stats["skipped"] + stats["failed"]
+            fraction = round(done / stats["total"], 4) if stats["total"] else 1.0
+            await self.queue.report_progress(str(job.id), "documents", {"documents": fraction}, result=stats)
+
+        # A retried import skips files that were already ingested
+        summary = await BulkIngestionService().ingest_archive(archive_path, on_progress=publish)
+        self._remove_archive(archive_path)
+        return summary
+
+    @staticmethod
+    def _remove_archive(archive_path: str) -> None:
+        try:
+            os.remove(archive_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Failed to remove bulk archive", path=archive_path, error=str(e))
+
+    async def _heartbeat(self, job: IngestionJob) -> None:
+        """Keep the job's leases alive while it runs"""
+        while True:
+            await asyncio.sleep(settings.INGESTION_LEASE_SECONDS / 3)
+            try:
+                await self.queue.renew_lease(job)
+            except Exception as e:
+                logger.warning("Failed to renew ingestion lease", job_id=str(job.id), error=str(e))
+
+
+async def _recovery_loop(queue: JobQueue, stop: asyncio.Event) -> None:
+    """Periodically re-dispatch jobs orphaned by crashed workers or lost Redis state"""
+    while not stop.is_set():
+        try:
+            await queue.recover()
+        except Exception as e:
+            logger.error("Ingestion job recovery failed", error=str(e))
+        try:
+            await asyncio.wait_for(stop.wait(), settings.INGESTION_LEASE_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+_stop: Optional[asyncio.Event] = None
+_tasks: List[asyncio.Task] = []
+
+
+async def start_ingestion_workers(count: Optional[int] = None) -> None:
+    """Start worker tasks on the running loop, plus the recovery sweep"""
+    global _stop
+    count = settings.INGESTION_WORKERS if count is None else count
+    if count <= 0 or _tasks:
+        return
+
+    _stop = asyncio.Event()
+    queue = get_services().job_queue
+    _tasks.append(asyncio.create_task(_recovery_loop(queue, _stop)))
+    for index in range(count):
+        _tasks.append(asyncio.create_task(IngestionWorker(f"worker-{index}", queue).run(_stop)))
+    logger.info("Ingestion workers started", count=count)
+
+
+async def stop_ingestion_workers(timeout: float = 10.0) -> None:
+    """Let running jobs finish for up to timeout seconds, then cancel them"""
+    if not _tasks:
+        return
+    _stop.set()
+    done, pending = await asyncio.wait(_tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    _tasks.clear()
+    logger.info("Ingestion workers stopped", cancelled=len(pending))
@@ -0,0 +1,277 @@
+"""
+Job Queue - Durable ingestion jobs with Redis dispatch and concurrency leases
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from datetime import datetime, timedelta
+import random
+import time
+import uuid
+import structlog
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_redis
+from app.models.database import IngestionJob
+from app.models.schemas import IngestionJobResponse
+
+logger = structlog.get_logger()
+
+# Ready job IDs, pushed left and popped right (FIFO)
+QUEUE_KEY = "ingestion:queue"
+# Job ID -> epoch seconds when a retry or deferred job becomes ready
+DELAYED_KEY = "ingestion:delayed"
+# Job ID -> lease expiry, one sorted set per concurrency scope
+GLOBAL_LEASES_KEY = "ingestion:leases"
+TENANT_LEASES_KEY = "ingestion:leases:tenant:{}"
+DOCUMENT_LEASES_KEY = "ingestion:leases:document:{}"
+
+RUNNABLE_STATUSES = ("queued", "retrying")
+STAGES = ("parse", "chunk", "embed", "index")
+
+# Called by ingestion as work advances: (stage, done, total)
+ProgressCallback = Callable[[str, int, int], Awaitable[None]]
+
+
+def job_to_response(job: IngestionJob) -> IngestionJobResponse:
+    return IngestionJobResponse(
+        id=str(job.id),
+        job_type=job.job_type,
+        status=job.status,
+        stage=job.stage,
+        progress=job.progress or {},
+        attempts=job.attempts or 0,
+        max_attempts=job.max_attempts,
+        last_error=job.last_error,
+        result=job.result,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        next_run_at=job.next_run_at
+    )
+
+
+class JobQueue:
+    """
+    Ingestion job queue.
+
+    PostgreSQL holds the job records, so jobs survive restarts; Redis only
+    dispatches job IDs and tracks leases for the concurrency limits. Leases
+    expire on their own, so a crashed worker never holds a slot for long.
+    """
+
+    async def enqueue(
+        self,
+        document_id: Optional[str],
+        job_type: str,
+        tenant_id: str = "default",
+        payload: Optional[Dict[str, Any]] = None
+    ) -> IngestionJobResponse:
+        """Record a job and make it available to workers"""
+        async with AsyncSessionLocal() as db:
+            job = IngestionJob(
+                document_id=uuid.UUID(str(document_id)) if document_id else None,
+                job_type=job_type,
+                tenant_id=tenant_id,
+                payload=payload or {},
+                status="queued",
+                progress={},
+                attempts=0,
+                max_attempts=settings.INGESTION_MAX_ATTEMPTS
+            )
+            db.add(job)
+            await db.commit()
+            await db.refresh(job)
+
+        await (await get_redis()).lpush(QUEUE_KEY, str(job.id))
+        logger.info("Ingestion job queued", job_id=str(job.id), job_type=job_type, document_id=str(document_id) if document_id else None)
+        return job_to_response(job)
+
+    async def next_job_id(self, timeout: int = 1) -> Optional[str]:
+        """Pop the next ready job ID, waiting up to timeout seconds"""
+        await self._promote_due()
+        item = await (await get_redis()).brpop(QUEUE_KEY, timeout=timeout)
+        return item[1].decode() if item else None
+
+    async def get_job(self, job_id: str) -> Optional[IngestionJob]:
+        async with AsyncSessionLocal() as db:
+            return await db.get(IngestionJob, uuid.UUID(job_id))
+
+    async def claim(self, job_id: str) -> Optional[IngestionJob]:
+        """Mark a runnable job as running; None if another worker claimed it first"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == uuid.UUID(job_id), IngestionJob.status.in_(RUNNABLE_STATUSES))
+                .values(
+                    status="running",
+                    attempts=IngestionJob.attempts + 1,
+                    started_at=datetime.utcnow(),
+                    next_run_at=None
+                )
+                .returning(IngestionJob)
+            )
+            job = result.scalar_one_or_none()
+            await db.commit()
+            return job
+
+    async def report_progress(
+        self,
+        job_id: str,
+        stage: str,
+        progress: Dict[str, float],
+        result: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Record the current stage and per-stage fractions, plus running totals if given"""
+        values: Dict[str, Any] = {"stage": stage, "progress": dict(progress)}
+        if result is not None:
+            values["result"] = result
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(IngestionJob).where(IngestionJob.id == uuid.UUID(job_id)).values(**values))
+            await db.commit()
+
+    async def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == uuid.UUID(job_id))
+                .values(status="completed", result=result, last_error=None, finished_at=datetime.utcnow())
+            )
+            await db.commit()
+
+    async def fail(self, job: IngestionJob, error: str) -> bool:
+        """Record a failed attempt; returns True if a retry was scheduled"""
+        retry = job.attempts < job.max_attempts
+        values: Dict[str, Any] = {"last_error": error}
+        if retry:
+            delay = self.retry_delay(job.attempts)
+            values.update(status="retrying", next_run_at=datetime.utcnow() + timedelta(seconds=delay))
+        else:
+            values.update(status="failed", finished_at=datetime.utcnow())
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(IngestionJob).where(IngestionJob.id == job.id).values(**values))
+            await db.commit()
+
+        if retry:
+            await self.defer(str(job.id), delay)
+        return retry
+
+    async def defer(self, job_id: str, delay: float) -> None:
+        """Make a job ready again after delay seconds"""
+        await (await get_redis()).zadd(DELAYED_KEY, {job_id: time.time() + delay})
+
+    @staticmethod
+    def retry_delay(attempts: int) -> float:
+        """Exponential backoff with jitter: base * 2^(attempts - 1), capped"""
+        delay = settings.INGESTION_RETRY_BASE_SECONDS * 2 ** (attempts - 1) * random.uniform(0.8, 1.2)
+        return min(settings.INGESTION_RETRY_MAX_SECONDS, delay)
+
+    async def acquire_lease(self, job: IngestionJob) -> bool:
+        """
+        Take a slot under the global, per-tenant and per-document limits.
+
+        Each scope adds the lease and then counts; a job that pushed a scope
+        over its limit removes its lease again, so limits are never exceeded.
+        """
+        scopes = self._lease_scopes(job)
+        now = time.time()
+        expiry = now + settings.INGESTION_LEASE_SECONDS
+        job_id = str(job.id)
+
+        async with (await get_redis()).pipeline(transaction=False) as pipe:
+            for key, _ in scopes:
+                # Leases left by crashed workers expire here
+                pipe.zremrangebyscore(key, 0, now)
+                pipe.zadd(key, {job_id: expiry})
+                pipe.zcard(key)
+            results = await pipe.execute()
+
+        counts = results[2::3]
+        if all(count <= limit for (_, limit), count in zip(scopes, counts)):
+            return True
+        await self.release_lease(job)
+        return False
+
+    async def renew_lease(self, job: IngestionJob) -> None:
+        expiry = time.time() + settings.INGESTION_LEASE_SECONDS
+        async with (await get_redis()).pipeline(transaction=False) as pipe:
+            for key, _ in self._lease_scopes(job):
+                pipe.zadd(key, {str(job.id): expiry}, xx=True)
+            await pipe.execute()
+
+    async def release_lease(self, job: IngestionJob) -> None:
+        async with (await get_redis()).pipeline(transaction=False) as pipe:
+            for key, _ in self._lease_scopes(job):
+                pipe.zrem(key, str(job.id))
+            await pipe.execute()
+
+    async def recover(self) -> int:
+        """
+        Re-dispatch jobs that lost their Redis entry or their worker:
+        running jobs without a live lease, queued jobs missing from the
+        queue and retrying jobs missing from the delayed set.
+
+        Queued jobs touched within the last lease period are left alone: a
+        worker may have popped one and not claimed it yet, or enqueue may not
+        have pushed it yet.
+        """
+        client = await get_redis()
+        now = time.time()
+        settled_before = datetime.utcnow() - timedelta(seconds=settings.INGESTION_LEASE_SECONDS)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(IngestionJob).where(IngestionJob.status.in_(("queued", "retrying", "running")))
+            )
+            jobs: List[IngestionJob] = list(result.scalars().all())
+
+        recovered = 0
+        for job in jobs:
+            job_id = str(job.id)
+            if job.status == "running":
+                lease = await client.zscore(GLOBAL_LEASES_KEY, job_id)
+                if lease is not None and lease > now:
+                    continue
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(IngestionJob)
+                        .where(IngestionJob.id == job.id, IngestionJob.status == "running")
+                        .values(status="queued")
+                    )
+                    await db.commit()
+            elif job.status == "retrying":
+                if await client.zscore(DELAYED_KEY, job_id) is not None:
+                    continue
+                delay = max(0.0, (job.next_run_at - datetime.utcnow()).total_seconds()) if job.next_run_at else 0.0
+                await self.defer(job_id, delay)
+                recovered += 1
+                continue
+            elif job.updated_at is not None and job.updated_at > settled_before:
+                continue
+            elif await client.lpos(QUEUE_KEY, job_id) is not None or await client.zscore(DELAYED_KEY, job_id) is not None:
+                continue
+
+            await client.lpush(QUEUE_KEY, job_id)
+            recovered += 1
+
+        if recovered:
+            logger.info("Ingestion jobs recovered", count=recovered)
+        return recovered
+
+    async def _promote_due(self) -> None:
+        client = await get_redis()
+        for job_id in await client.zrangebyscore(DELAYED_KEY, 0, time.time()):
+            # Only the worker whose ZREM succeeds pushes the job, so it is queued once
+            if await client.zrem(DELAYED_KEY, job_id):
+                await client.lpush(QUEUE_KEY, job_id)
+
+    @staticmethod
+    def _lease_scopes(job: IngestionJob) -> List[tuple]:
+        scopes = [
+            (GLOBAL_LEASES_KEY, settings.INGESTION_MAX_CONCURRENT_JOBS),
+            (TENANT_LEASES_KEY.format(job.tenant_id), settings.INGESTION_MAX_JOBS_PER_TENANT),
+        ]
+        if job.document_id:
+            # Jobs on the same document never overlap
+            scopes.append((DOCUMENT_LEASES_KEY.format(job.document_id), 1))
+        return scopes
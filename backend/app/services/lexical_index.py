@@ -0,0 +1,176 @@
+"""
+Lexical Index - Arabic-aware BM25 inverted index over document chunks
+"""
+
+from typing import List, Optional, Dict, Tuple, Iterable
+import heapq
+import math
+import re
+import threading
+import structlog
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.database import DocumentChunk
+
+logger = structlog.get_logger()
+
+# Harakat, superscript alef and Quranic marks carry no lexical meaning for search
+_ARABIC_DIACRITICS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED]")
+_TATWEEL = "\u0640"
+_CHAR_MAP = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ئ": "ي",
+    "ؤ": "و",
+    "ة": "ه",
+    "٠": "0", "١": "1", "٢": "2", "٣": "3", "٤": "4",
+    "٥": "5", "٦": "6", "٧": "7", "٨": "8", "٩": "9",
+})
+_TOKEN_PATTERN = re.compile(r"\w+")
+_ARABIC_LETTER = re.compile(r"[\u0621-\u064A]")
+# Longest first so "وال" is stripped before "ال"
+_ARABIC_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+
+
+def normalize_text(text: str) -> str:
+    """Fold Arabic orthographic variants and case so equivalent spellings match"""
+    text = _ARABIC_DIACRITICS.sub("", text).replace(_TATWEEL, "")
+    return text.translate(_CHAR_MAP).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split normalised text into index terms.
+
+    Arabic words lose their definite-article/conjunction prefix; identifiers
+    such as ``circuit_breaker`` are kept whole and also split into parts.
+    """
+    terms = []
+    for token in _TOKEN_PATTERN.findall(normalize_text(text)):
+        if _ARABIC_LETTER.match(token):
+            for prefix in _ARABIC_PREFIXES:
+                if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+                    token = token[len(prefix):]
+                    break
+            terms.append(token)
+        else:
+            terms.append(token)
+            if "_" in token:
+                terms.extend(part for part in token.split("_") if part)
+    return terms
+
+
+class BM25Index:
+    """In-memory inverted index scored with Okapi BM25"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self._lock = threading.RLock()
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, List[str]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_lengths
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Index (or re-index) a document"""
+        self.add_batch([(doc_id, text)])
+
+    def add_batch(self, documents: Iterable[Tuple[str, str]]) -> None:
+        with self._lock:
+            for doc_id, text in documents:
+                if doc_id in self._doc_lengths:
+                    self.remove(doc_id)
+
+                frequencies: Dict[str, int] = {}
+                terms = tokenize(text)
+                for term in terms:
+                    frequencies[term] = frequencies.get(term, 0) + 1
+
+                for term, frequency in frequencies.items():
+                    self._postings.setdefault(term, {})[doc_id] = frequency
+                self._doc_terms[doc_id] = list(frequencies)
+                self._doc_lengths[doc_id] = len(terms)
+                self._total_length += len(terms)
+
+    def remove(self, doc_id: str) -> bool:
+        with self._lock:
+            terms = self._doc_terms.pop(doc_id, None)
+            if terms is None:
+                return False
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self._postings[term]
+            self._total_length -= self._doc_lengths.pop(doc_id)
+            return True
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """Score only documents that appear in the query terms' postings lists"""
+        query_terms = set(tokenize(query))
+
+        with self._lock:
+            doc_count = len(self._doc_lengths)
+            if not doc_count or not query_terms:
+                return []
+
+            average_length = self._total_length / doc_count
+            scores: Dict[str, float] = {}
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    length_norm = 1 - self.b + self.b * self._doc_lengths[doc_id] / average_length
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+
+            return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+_lexical_index: Optional[BM25Index] = None
+_lexical_index_lock = threading.Lock()
+
+
+def get_lexical_index() -> BM25Index:
+    """Return the process-wide BM25 index, building it from document_chunks on first use"""
+    global _lexical_index
+    if _lexical_index is None:
+        with _lexical_index_lock:
+            if _lexical_index is None:
+                index = BM25Index(k1=settings.BM25_K1, b=settings.BM25_B)
+                db = SessionLocal()
+                try:
+                    rows = (
+                        db.query(DocumentChunk.embedding_id, DocumentChunk.content)
+                        .filter(DocumentChunk.embedding_id.isnot(None))
+                        .yield_per(1000)
+                    )
+                    index.add_batch(rows)
+                finally:
+                    db.close()
+
+                logger.info("Lexical index built", chunks=len(index))
+                _lexical_index = index
+    return _lexical_index
+
+
+def index_chunks(chunks: Iterable[Tuple[str, str]]) -> None:
+    """Add (embedding_id, content) pairs if the index is loaded; otherwise the first load picks them up"""
+    if _lexical_index is not None:
+        _lexical_index.add_batch(chunks)
+
+
+def remove_chunks(embedding_ids: Iterable[str]) -> None:
+    """Remove chunks from the index if it is loaded"""
+    if _lexical_index is not None:
+        for embedding_id in embedding_ids:
+            _lexical_index.remove(embedding_id)
@@ -3,21 +3,39 @@ LLM Service - Interface with language models (OpenAI, etc.)
 """
 
 import openai
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, List
+import hashlib
+import json
 import structlog
 from datetime import datetime
 
+from app.core.cache import SingleFlight
 from app.core.config import settings
 from app.core.exceptions import LLMError, ExternalServiceError
 from app.core.persona import get_persona_system_prompt, get_persona_context
+from app.services.chunker import get_tokenizer
+from app.services.rate_limiter import get_llm_governor
 
 logger = structlog.get_logger()
 
+# Completions in flight, by a hash of their request parameters
+_completion_flights = SingleFlight("completions")
+# Prompt tokens billed by the provider, and how many it served from its prompt cache
+_usage_stats = {"completions": 0, "prompt_tokens": 0, "cached_tokens": 0}
+
+def _cached_tokens(usage: Any) -> Optional[int]:
+    """Prompt tokens the provider served from its prompt cache, if it reports them"""
+    # Providers without prompt caching omit the details
+    details = usage.prompt_tokens_details if usage else None
+    return details.cached_tokens if details else None
+
 class LLMService:
     """Service for interacting with Large Language Models"""
     
-    def __init__(self):
-        self.client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(self, client: Optional[openai.AsyncOpenAI] = None):
+        self.client = client or openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        # The governor retries 429s itself, so a rate limit holds back every caller, not just one
+        self._calls = self.client.with_options(max_retries=0)
         self.default_model = settings.OPENAI_MODEL
         self.default_temperature = settings.OPENAI_TEMPERATURE
         self.default_max_tokens = settings.OPENAI_MAX_TOKENS
@@ -57,8 +75,8 @@ class LLMService:
             
             start_time = datetime.utcnow()
             
-            # Call OpenAI API
-            response = await self.client.chat.completions.create(
+            # Call OpenAI API within the shared rate budget; identical in-flight prompts share one call
+            response = await self._complete_once(
                 model=model,
                 messages=messages,
                 temperature=temperature,
@@ -75,6 +93,7 @@ class LLMService:
             logger.info("LLM response generated successfully",
                        processing_time=processing_time,
                        tokens_used=tokens_used,
+                       cached_tokens=_cached_tokens(response.usage),
                        response_length=len(content) if content else 0)
             
             return content or "عذراً، لم أتمكن من توليد إجابة مناسبة."
@@ -95,6 +114,161 @@ class LLMService:
             logger.error("Unexpected error in LLM service", error=str(e))
             raise LLMError(f"فشل في توليد الإجابة: {str(e)}")
     
+    async def stream_response(
+        self,
+        prompt: str,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        model: Optional[str] = None,
+        system_prompt: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream response text deltas as the model produces them
+        """
+        try:
+            if not system_prompt:
+                system_prompt = get_persona_system_prompt()
+            
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ]
+            
+            model = model or self.default_model
+            temperature = temperature if temperature is not None else self.default_temperature
+            max_tokens = max_tokens or self.default_max_tokens
+            
+            logger.info("Streaming LLM response",
+                       model=model,
+                       temperature=temperature,
+                       max_tokens=max_tokens,
+                       prompt_length=len(prompt))
+            
+            start_time = datetime.utcnow()
+            first_token_time = None
+            
+            stream = self._stream(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+            
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if first_token_time is None:
+                        first_token_time = (datetime.utcnow() - start_time).total_seconds()
+                    yield delta
+            
+            logger.info("LLM stream completed",
+                       time_to_first_token=first_token_time,
+                       processing_time=(datetime.utcnow() - start_time).total_seconds())
+            
+        except openai.RateLimitError as e:
+            logger.error("OpenAI rate limit exceeded", error=str(e))
+            raise ExternalServiceError("تم تجاوز حد الاستخدام المسموح، يرجى المحاولة لاحقاً", "openai")
+            
+        except openai.AuthenticationError as e:
+            logger.error("OpenAI authentication failed", error=str(e))
+            raise ExternalServiceError("خطأ في المصادقة مع خدمة الذكاء الاصطناعي", "openai")
+            
+        except openai.APIError as e:
+            logger.error("OpenAI API error", error=str(e))
+            raise ExternalServiceError("خطأ في خدمة الذكاء الاصطناعي", "openai")
+            
+        except Exception as e:
+            logger.error("Unexpected error in LLM stream", error=str(e))
+            raise LLMError(f"فشل في توليد الإجابة: {str(e)}")
+    
+    async def _complete_once(self, **params: Any) -> Any:
+        """_complete, shared by concurrent callers with identical parameters"""
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await self._complete(**params)
+        key = hashlib.sha256(json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+        return await _completion_flights.do(key, lambda: self._complete(**params))
+    
+    async def _complete(self, **params: Any) -> Any:
+        """Create a chat completion once the governor admits it, retrying rate-limited attempts"""
+        governor = get_llm_governor()
+        estimated_tokens = self._estimate_tokens(params["messages"], params["model"], params["max_tokens"])
+        attempt = 0
+        while True:
+            async with governor.slot(estimated_tokens) as reservation:
+                try:
+                    raw = await self._calls.chat.completions.with_raw_response.create(**params)
+                except openai.RateLimitError as e:
+                    attempt = self._retry_rate_limited(e, attempt, reservation)
+                    continue
+                governor.observe_headers(raw.headers)
+                response = raw.parse()
+                reservation.reconcile(response.usage.total_tokens if response.usage else None)
+                self._record_usage(response.usage)
+                return response
+    
+    async def _stream(self, **params: Any) -> AsyncIterator[Any]:
+        """Stream a chat completion, holding its in-flight slot until the last chunk"""
+        governor = get_llm_governor()
+        estimated_tokens = self._estimate_tokens(params["messages"], params["model"], params["max_tokens"])
+        attempt = 0
+        while True:
+            async with governor.slot(estimated_tokens) as reservation:
+                try:
+                    raw = await self._calls.chat.completions.with_raw_response.create(
+                        stream=True,
+                        stream_options={"include_usage": True},
+                        **params
+                    )
+                except openai.RateLimitError as e:
+                    attempt = self._retry_rate_limited(e, attempt, reservation)
+                    continue
+                governor.observe_headers(raw.headers)
+                used_tokens = None
+                async for chunk in raw.parse():
+                    if chunk.usage:
+                        used_tokens = chunk.usage.total_tokens
+                        self._record_usage(chunk.usage)
+                    yield chunk
+                reservation.reconcile(used_tokens)
+                return
+    
+    @staticmethod
+    def _retry_rate_limited(error: openai.RateLimitError, attempt: int, reservation: Any) -> int:
+        """Hold the governor after a 429 and return the next attempt number, or re-raise when out of retries"""
+        # A rejected call used no tokens
+        reservation.reconcile(0)
+        if attempt >= settings.LLM_RATE_LIMIT_RETRIES:
+            raise error
+        delay = reservation.governor.rate_limited(error.response.headers if error.response is not None else None)
+        logger.warning("OpenAI rate limit hit; retrying", attempt=attempt + 1, retry_in=delay)
+        return attempt + 1
+    
+    @staticmethod
+    def _record_usage(usage: Any) -> None:
+        if not usage:
+            return
+        _usage_stats["completions"] += 1
+        _usage_stats["prompt_tokens"] += usage.prompt_tokens or 0
+        _usage_stats["cached_tokens"] += _cached_tokens(usage) or 0
+    
+    @staticmethod
+    def usage_stats() -> Dict[str, Any]:
+        """Prompt tokens sent and the share the provider's prompt cache served"""
+        prompt_tokens = _usage_stats["prompt_tokens"]
+        return {
+            **_usage_stats,
+            "cache_hit_rate": round(_usage_stats["cached_tokens"] / prompt_tokens, 4) if prompt_tokens else 0.0
+        }
+    
+    @staticmethod
+    def _estimate_tokens(messages: List[Dict[str, str]], model: str, max_tokens: int) -> int:
+        """Tokens the provider counts against the budget: the prompt plus the completion allowance"""
+        prompt_tokens = sum(get_tokenizer(model).count([message["content"] for message in messages]))
+        # Each message carries a few tokens of role and separator overhead
+        return prompt_tokens + 4 * len(messages) + max_tokens
+    
     async def generate_personalized_response(
         self,
         query: str,
@@ -0,0 +1,597 @@
+"""
+Quantised Vector Index - int8 and product-quantised candidate search with exact rescoring
+"""
+
+from typing import List, Optional, Dict, Any, Iterable, Tuple, Sequence
+import json
+import os
+import threading
+
+import numpy as np
+import structlog
+
+from app.services.vector_index import LocalVectorIndex, SearchHit
+
+logger = structlog.get_logger()
+
+# Rows scored per block, so code-to-float conversion never materialises the whole matrix
+SCAN_BLOCK = 4096
+# Centroids per PQ subspace, so each sub-code fits in one byte
+PQ_CENTROIDS = 256
+
+
+class QuantizedIndex:
+    """
+    Index that keeps compressed codes in memory and full-precision vectors on disk.
+
+    Candidates are found by scanning the codes: ``int8`` stores each vector
+    as signed bytes with a per-row scale (4x smaller than float32), ``pq``
+    stores one byte per subspace (``dimension * 4 / subquantizers`` times
+    smaller). The ``top_k * rescore_factor`` best candidates are then
+    rescored exactly against the float32 vectors.
+
+    Float32 vectors saved by ``save`` are memory-mapped from ``vectors.npy``
+    rather than loaded, so every worker process shares one page-cache copy
+    and only rescored rows are ever read. Vectors added since the last save
+    are held in memory until the next one. Until ``train_size`` vectors have
+    been added, ``pq`` scans the float32 vectors directly.
+    """
+
+    def __init__(
+        self,
+        dimension: Optional[int] = None,
+        mode: str = "int8",
+        subquantizers: int = 64,
+        rescore_factor: int = 4,
+        train_size: Optional[int] = None,
+        kmeans_iterations: int = 10,
+        initial_capacity: int = 1024,
+    ):
+        if mode not in ("int8", "pq"):
+            raise ValueError(f"Unknown quantisation mode '{mode}'; expected int8 or pq")
+        self._lock = threading.RLock()
+        self.mode = mode
+        self.subquantizers = subquantizers
+        self.rescore_factor = max(1, rescore_factor)
+        # Faiss' rule of thumb: at least ~39 training points per centroid
+        self.train_size = train_size or PQ_CENTROIDS * 39
+        self.kmeans_iterations = kmeans_iterations
+        self._initial_capacity = max(1, initial_capacity)
+        self._dimension = dimension
+
+        # Float32 vectors: the mapped file from the last save, then rows added since
+        self._base: Optional[np.ndarray] = None
+        self._extra: Optional[np.ndarray] = None
+        self._extra_size = 0
+
+        # Per-row state, indexed by code row
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._full_rows = np.zeros(0, dtype=np.int64)
+        self._dead = np.zeros(0, dtype=bool)
+        self._codebooks: Optional[np.ndarray] = None  # (subquantizers, 256, sub-dimension)
+        self._training = False
+        self._size = 0
+        self._tombstones = 0
+        self._ids: List[Optional[str]] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._size - self._tombstones
+
+    def __contains__(self, vector_id: str) -> bool:
+        return vector_id in self._positions
+
+    @property
+    def dimension(self) -> Optional[int]:
+        return self._dimension
+
+    @property
+    def is_trained(self) -> bool:
+        return self.mode == "int8" or self._codebooks is not None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in process memory: codes, row bookkeeping and unsaved float32 vectors"""
+        arrays = [self._codes, self._scales, self._full_rows, self._dead, self._codebooks, self._extra]
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    @property
+    def mapped_nbytes(self) -> int:
+        """Bytes of float32 vectors memory-mapped from disk"""
+        return self._base.nbytes if self._base is not None else 0
+
+    @property
+    def tombstones(self) -> int:
+        return self._tombstones
+
+    @property
+    def tombstone_ratio(self) -> float:
+        return self._tombstones / self._size if self._size else 0.0
+
+    def memory_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            vectors = len(self)
+            return {
+                "mode": self.mode,
+                "trained": self.is_trained,
+                "vectors": vectors,
+                "resident_bytes": self.nbytes,
+                "mapped_bytes": self.mapped_nbytes,
+                "code_bytes_per_vector": self._code_width(),
+                "float32_bytes_per_vector": (self._dimension or 0) * 4,
+            }
+
+    def upsert(self, vector_id: str, embedding: Sequence[float], metadata: Optional[Dict[str, Any]] = None) -> str:
+        self.upsert_batch([vector_id], [embedding], [metadata or {}])
+        return vector_id
+
+    def upsert_batch(
+        self,
+        vector_ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: Optional[Sequence[Optional[Dict[str, Any]]]] = None
+    ) -> List[str]:
+        if not vector_ids:
+            return []
+        if metadatas is None:
+            metadatas = [None] * len(vector_ids)
+        if not (len(vector_ids) == len(embeddings) == len(metadatas)):
+            raise ValueError("vector_ids, embeddings and metadatas must have the same length")
+
+        vectors = LocalVectorIndex._normalise(LocalVectorIndex._as_matrix(embeddings))
+
+        with self._lock:
+            self._ensure_dimension(vectors.shape[1])
+            # The last occurrence of a repeated ID wins
+            latest = {vector_id: position for position, vector_id in enumerate(vector_ids)}
+
+            appended = []
+            for vector_id, position in latest.items():
+                row = self._positions.get(vector_id)
+                full_row = None if row is None else int(self._full_rows[row])
+                if full_row is not None and full_row >= self._base_rows():
+                    # Unsaved rows are rewritten in place
+                    self._extra[full_row - self._base_rows()] = vectors[position]
+                    self._encode_rows(row, vectors[position:position + 1])
+                    self._metadata[row] = metadatas[position] or {}
+                else:
+                    if row is not None:
+                        # Saved rows are read-only, so the old row becomes a tombstone
+                        self.delete_batch([vector_id])
+                    appended.append(position)
+
+            if appended:
+                start = self._size
+                self._reserve(start + len(appended))
+                self._full_rows[start:start + len(appended)] = self._append_full(vectors[appended])
+                self._encode_rows(start, vectors[appended])
+                for offset, position in enumerate(appended):
+                    self._positions[vector_ids[position]] = start + offset
+                    self._ids.append(vector_ids[position])
+                    self._metadata.append(metadatas[position] or {})
+                self._size += len(appended)
+
+            train = not self.is_trained and not self._training and len(self) >= self.train_size
+            if train:
+                self._training = True
+
+        if train:
+            self._train()
+        return list(vector_ids)
+
+    def delete(self, vector_id: str) -> bool:
+        return self.delete_batch([vector_id]) == 1
+
+    def delete_batch(self, vector_ids: Iterable[str]) -> int:
+        with self._lock:
+            deleted = 0
+            for vector_id in vector_ids:
+                row = self._positions.pop(vector_id, None)
+                if row is None:
+                    continue
+                self._dead[row] = True
+                self._ids[row] = None
+                self._metadata[row] = {}
+                deleted += 1
+            self._tombstones += deleted
+            return deleted
+
+    def compact(self) -> int:
+        """Drop tombstoned code rows and unsaved float32 rows; saved rows are dropped by the next save"""
+        with self._lock:
+            reclaimed = self._tombstones
+            if not reclaimed:
+                return 0
+
+            live = np.flatnonzero(~self._dead[:self._size])
+            full_rows = self._full_rows[live]
+            base_rows = self._base_rows()
+            unsaved = full_rows >= base_rows
+            if self._extra is not None:
+                kept = full_rows[unsaved] - base_rows
+                extra = np.empty((max(len(kept), self._initial_capacity), self._dimension), dtype=np.float32)
+                extra[:len(kept)] = self._extra[kept]
+                self._extra, self._extra_size = extra, len(kept)
+                full_rows[unsaved] = base_rows + np.arange(len(kept))
+
+            self._rebuild_rows(live, full_rows)
+            return reclaimed
+
+    def get(self, vector_id: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._positions.get(vector_id)
+            return None if row is None else self._full(self._full_rows[row:row + 1])[0].copy()
+
+    def get_metadata(self, vector_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._positions.get(vector_id)
+            return None if row is None else self._metadata[row]
+
+    def search(self, query: Sequence[float], top_k: int = 10) -> List[SearchHit]:
+        return self.search_batch([query], top_k)[0]
+
+    def search_batch(self, queries: Sequence[Sequence[float]], top_k: int = 10) -> List[List[SearchHit]]:
+        """Shortlist candidates from the codes, then rank them by exact cosine similarity"""
+        query_matrix = LocalVectorIndex._normalise(LocalVectorIndex._as_matrix(queries))
+
+        with self._lock:
+            live = len(self)
+            if live == 0 or top_k <= 0:
+                return [[] for _ in range(len(query_matrix))]
+            if query_matrix.shape[1] != self._dimension:
+                raise ValueError(
+                    f"Query dimension {query_matrix.shape[1]} does not match index dimension {self._dimension}"
+                )
+
+            k = min(top_k, live)
+            shortlists = self._candidates(query_matrix, min(live, k * self.rescore_factor))
+
+            results = []
+            for query, rows in zip(query_matrix, shortlists):
+                exact = self._full(self._full_rows[rows]) @ query
+                order = np.argsort(-exact)[:k]
+                results.append([
+                    (self._ids[rows[position]], float(exact[position]), self._metadata[rows[position]])
+                    for position in order
+                ])
+            return results
+
+    def recall_at_k(self, queries: Sequence[Sequence[float]], top_k: int = 10) -> Dict[str, float]:
+        """
+        Share of the exact top_k found by the code scan alone ("candidates")
+        and after rescoring ("rescored"), averaged over queries.
+        """
+        query_matrix = LocalVectorIndex._normalise(LocalVectorIndex._as_matrix(queries))
+        with self._lock:
+            k = min(top_k, len(self))
+            if k == 0:
+                return {"candidates": 1.0, "rescored": 1.0}
+
+            exact = np.empty((len(query_matrix), self._size), dtype=np.float32)
+            for start in range(0, self._size, SCAN_BLOCK):
+                stop = min(start + SCAN_BLOCK, self._size)
+                exact[:, start:stop] = query_matrix @ self._full(self._full_rows[start:stop]).T
+            if self._tombstones:
+                exact[:, self._dead[:self._size]] = -np.inf
+            truth = [set(rows) for rows in self._top_rows(exact, k)]
+
+            candidates = [set(rows) for rows in self._candidates(query_matrix, k)]
+            rescored = [
+                {self._positions[vector_id] for vector_id, _, _ in hits}
+                for hits in self.search_batch(query_matrix, k)
+            ]
+            return {
+                "candidates": float(np.mean([len(found & rows) / k for found, rows in zip(candidates, truth)])),
+                "rescored": float(np.mean([len(found & rows) / k for found, rows in zip(rescored, truth)])),
+            }
+
+    def export(self) -> Tuple[List[str], np.ndarray, List[Dict[str, Any]]]:
+        with self._lock:
+            live = np.flatnonzero(~self._dead[:self._size])
+            vectors = self._full(self._full_rows[live]) if len(live) else np.zeros((0, self._dimension or 0), dtype=np.float32)
+            return [self._ids[row] for row in live], vectors, [self._metadata[row] for row in live]
+
+    def save(self, path: str) -> None:
+        """
+        Write live vectors in the layout of ``write_index_files`` plus the
+        codes, streaming rows so float32 vectors are never all in memory.
+        Afterwards the saved file backs the index and unsaved rows are released.
+        """
+        with self._lock:
+            os.makedirs(path, exist_ok=True)
+            live = np.flatnonzero(~self._dead[:self._size])
+            dimension = self._dimension or 0
+
+            vectors_tmp = os.path.join(path, "vectors.tmp.npy")
+            entries_tmp = os.path.join(path, "entries.tmp.json")
+            codes_tmp = os.path.join(path, "codes.tmp.npz")
+            out = np.lib.format.open_memmap(vectors_tmp, mode="w+", dtype=np.float32, shape=(len(live), dimension))
+            for start in range(0, len(live), SCAN_BLOCK):
+                rows = live[start:start + SCAN_BLOCK]
+                out[start:start + len(rows)] = self._full(self._full_rows[rows])
+            out.flush()
+            del out
+
+            with open(entries_tmp, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "dimension": self._dimension,
+                        "ids": [self._ids[row] for row in live],
+                        "metadata": [self._metadata[row] for row in live],
+                    },
+                    f,
+                    ensure_ascii=False
+                )
+            codes = self._codes[live] if self._codes is not None else np.zeros((0, 0), dtype=np.int8)
+            with open(codes_tmp, "wb") as f:
+                np.savez(
+                    f,
+                    mode=np.array(self.mode),
+                    codes=codes,
+                    scales=self._scales[live] if self.mode == "int8" and self._scales is not None else np.zeros(0, dtype=np.float32),
+                    codebooks=self._codebooks if self._codebooks is not None else np.zeros((0, 0, 0), dtype=np.float32),
+                )
+
+            os.replace(vectors_tmp, os.path.join(path, "vectors.npy"))
+            os.replace(entries_tmp, os.path.join(path, "entries.json"))
+            os.replace(codes_tmp, os.path.join(path, "codes.npz"))
+
+            self._base = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r") if len(live) else None
+            self._extra, self._extra_size = None, 0
+            if self._codes is not None:
+                self._rebuild_rows(live, np.arange(len(live), dtype=np.int64))
+
+        logger.info("Quantised index saved", path=path, vectors=len(live), mode=self.mode)
+
+    @classmethod
+    def load(cls, path: str, **params) -> "QuantizedIndex":
+        """Map vectors written by any local index type, reusing saved codes when they match"""
+        with open(os.path.join(path, "entries.json"), encoding="utf-8") as f:
+            entries = json.load(f)
+        ids = list(entries["ids"])
+        base = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r") if ids else None
+
+        index = cls(dimension=entries["dimension"], initial_capacity=max(len(ids), 1), **params)
+        if not ids:
+            return index
+        index._base = base
+        index._reserve(len(ids))
+        index._size = len(ids)
+        index._ids = ids
+        index._metadata = list(entries["metadata"])
+        index._positions = {vector_id: row for row, vector_id in enumerate(ids)}
+        index._full_rows[:len(ids)] = np.arange(len(ids))
+
+        if not index._load_codes(os.path.join(path, "codes.npz")):
+            if index.mode == "pq" and len(ids) >= index.train_size:
+                index._train()
+            else:
+                for start in range(0, len(ids), SCAN_BLOCK):
+                    index._encode_rows(start, np.asarray(base[start:start + SCAN_BLOCK]))
+
+        logger.info("Quantised index loaded", path=path, vectors=len(ids), mode=index.mode, trained=index.is_trained)
+        return index
+
+    def _load_codes(self, codes_path: str) -> bool:
+        """Adopt codes saved alongside the vectors if they were written for this mode and rows"""
+        if not os.path.exists(codes_path):
+            return False
+        with np.load(codes_path) as saved:
+            if str(saved["mode"]) != self.mode or len(saved["codes"]) != self._size:
+                return False
+            if self.mode == "int8":
+                self._codes[:self._size] = saved["codes"]
+                self._scales[:self._size] = saved["scales"]
+                return True
+            codebooks = saved["codebooks"]
+            if not codebooks.size:
+                return self._size < self.train_size
+            self._codebooks = codebooks
+            self._codes = np.zeros((len(self._dead), len(codebooks)), dtype=np.uint8)
+            self._codes[:self._size] = saved["codes"]
+            return True
+
+    def _candidates(self, query_matrix: np.ndarray, count: int) -> List[np.ndarray]:
+        """Code rows of the ``count`` best approximate scores per query"""
+        scores = np.empty((len(query_matrix), self._size), dtype=np.float32)
+        tables = self._pq_tables(query_matrix) if self.mode == "pq" and self._codebooks is not None else None
+        for start in range(0, self._size, SCAN_BLOCK):
+            stop = min(start + SCAN_BLOCK, self._size)
+            scores[:, start:stop] = self._approximate_scores(query_matrix, start, stop, tables)
+        if self._tombstones:
+            scores[:, self._dead[:self._size]] = -np.inf
+        return self._top_rows(scores, count)
+
+    @staticmethod
+    def _top_rows(scores: np.ndarray, count: int) -> List[np.ndarray]:
+        if count < scores.shape[1]:
+            rows = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+        else:
+            rows = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        # Tombstones only reach the shortlist when it covers every row
+        return [query_rows[np.isfinite(query_scores[query_rows])] for query_rows, query_scores in zip(rows, scores)]
+
+    def _approximate_scores(
+        self,
+        query_matrix: np.ndarray,
+        start: int,
+        stop: int,
+        tables: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        if self.mode == "int8":
+            return (self._codes[start:stop].astype(np.float32) @ query_matrix.T).T * self._scales[start:stop]
+        if tables is None:
+            return query_matrix @ self._full(self._full_rows[start:stop]).T
+
+        # Asymmetric distance: sum each code's entries in the query's flattened lookup table
+        lookups = self._codes[start:stop].astype(np.intp) + np.arange(tables.shape[1] // PQ_CENTROIDS) * PQ_CENTROIDS
+        return np.stack([table[lookups].sum(axis=1) for table in tables])
+
+    def _pq_tables(self, query_matrix: np.ndarray) -> np.ndarray:
+        """Per-query dot products of every subspace centroid, flattened to (queries, subquantizers * 256)"""
+        subquantizers, _, sub_dimension = self._codebooks.shape
+        tables = np.einsum("mcd,qmd->qmc", self._codebooks, query_matrix.reshape(len(query_matrix), subquantizers, sub_dimension))
+        return tables.reshape(len(query_matrix), -1)
+
+    def _encode_rows(self, start: int, vectors: np.ndarray) -> None:
+        """Write codes for vectors into rows starting at start"""
+        stop = start + len(vectors)
+        if self.mode == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            self._codes[start:stop] = np.round(vectors / scales[:, None]).astype(np.int8)
+            self._scales[start:stop] = scales
+        elif self._codebooks is not None:
+            self._codes[start:stop] = self._pq_encode(vectors)
+
+    def _pq_encode(self, vectors: np.ndarray) -> np.ndarray:
+        subquantizers, _, sub_dimension = self._codebooks.shape
+        codes = np.empty((len(vectors), subquantizers), dtype=np.uint8)
+        for subspace, centroids in enumerate(self._codebooks):
+            part = vectors[:, subspace * sub_dimension:(subspace + 1) * sub_dimension]
+            # argmin of squared distance, dropping the per-vector constant
+            distances = (centroids ** 2).sum(axis=1) - 2 * part @ centroids.T
+            codes[:, subspace] = np.argmin(distances, axis=1)
+        return codes
+
+    def _train(self) -> None:
+        """
+        Fit one k-means codebook per subspace on a sample, then encode every row.
+
+        The fit runs without the lock, so searches (scanning float32 vectors
+        until the codebooks exist) and writes carry on meanwhile; rows
+        written during the fit are encoded with the rest once it is done.
+        """
+        try:
+            rng = np.random.default_rng(0)
+            with self._lock:
+                live = np.flatnonzero(~self._dead[:self._size])
+                sample_rows = np.sort(rng.choice(live, min(len(live), PQ_CENTROIDS * 64), replace=False))
+                sample = self._full(self._full_rows[sample_rows])
+
+            subquantizers = self._subquantizer_count()
+            sub_dimension = self._dimension // subquantizers
+            centroids = min(PQ_CENTROIDS, len(sample))
+            codebooks = np.stack([
+                self._kmeans(sample[:, subspace * sub_dimension:(subspace + 1) * sub_dimension], centroids, rng)
+                for subspace in range(subquantizers)
+            ])
+
+            with self._lock:
+                self._codebooks = codebooks
+                self._codes = np.zeros((len(self._dead), subquantizers), dtype=np.uint8)
+                for start in range(0, self._size, SCAN_BLOCK):
+                    stop = min(start + SCAN_BLOCK, self._size)
+                    self._codes[start:stop] = self._pq_encode(self._full(self._full_rows[start:stop]))
+                vectors = len(self)
+        finally:
+            self._training = False
+
+        logger.info("PQ codebooks trained", vectors=vectors, subquantizers=subquantizers)
+
+    def _kmeans(self, points: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+        """Euclidean k-means for one subspace"""
+        centroids = points[rng.choice(len(points), count, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            assignment = np.argmin((centroids ** 2).sum(axis=1) - 2 * points @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, points)
+            counts = np.bincount(assignment, minlength=count)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+            # Re-seed empty clusters so every code stays usable
+            empty = np.flatnonzero(~filled)
+            if len(empty):
+                centroids[empty] = points[rng.choice(len(points), len(empty))]
+        return centroids.astype(np.float32)
+
+    def _subquantizer_count(self) -> int:
+        """Largest divisor of the dimension not above ``subquantizers``"""
+        for count in range(min(self.subquantizers, self._dimension), 0, -1):
+            if self._dimension % count == 0:
+                return count
+        return 1
+
+    def _code_width(self) -> int:
+        if self.mode == "int8":
+            return (self._dimension or 0) + 4  # codes plus the float32 scale
+        return self._codebooks.shape[0] if self._codebooks is not None else (self._dimension or 0) * 4
+
+    def _base_rows(self) -> int:
+        return len(self._base) if self._base is not None else 0
+
+    def _full(self, full_rows: np.ndarray) -> np.ndarray:
+        """Float32 vectors for full-storage rows, from the mapped file or unsaved rows"""
+        base_rows = self._base_rows()
+        if not base_rows:
+            return self._extra[full_rows]
+        if not len(full_rows) or full_rows.max() < base_rows:
+            return np.asarray(self._base[full_rows])
+        vectors = np.empty((len(full_rows), self._dimension), dtype=np.float32)
+        saved = full_rows < base_rows
+        vectors[saved] = self._base[full_rows[saved]]
+        vectors[~saved] = self._extra[full_rows[~saved] - base_rows]
+        return vectors
+
+    def _append_full(self, vectors: np.ndarray) -> np.ndarray:
+        """Keep unsaved float32 rows in memory; returns their full-storage rows"""
+        needed = self._extra_size + len(vectors)
+        current = 0 if self._extra is None else len(self._extra)
+        if needed > current:
+            extra = np.empty((max(needed, self._initial_capacity, current * 2), self._dimension), dtype=np.float32)
+            if self._extra is not None:
+                extra[:self._extra_size] = self._extra[:self._extra_size]
+            self._extra = extra
+        self._extra[self._extra_size:needed] = vectors
+        rows = self._base_rows() + np.arange(self._extra_size, needed)
+        self._extra_size = needed
+        return rows
+
+    def _rebuild_rows(self, live: np.ndarray, full_rows: np.ndarray) -> None:
+        """Keep only the given code rows, in order, pointing at full_rows"""
+        capacity = max(len(live), self._initial_capacity)
+        codes = np.zeros((capacity,) + self._codes.shape[1:], dtype=self._codes.dtype)
+        codes[:len(live)] = self._codes[live]
+        self._codes = codes
+        if self._scales is not None:
+            scales = np.zeros(capacity, dtype=np.float32)
+            scales[:len(live)] = self._scales[live]
+            self._scales = scales
+        self._full_rows = np.zeros(capacity, dtype=np.int64)
+        self._full_rows[:len(live)] = full_rows
+        self._dead = np.zeros(capacity, dtype=bool)
+        self._ids = [self._ids[row] for row in live]
+        self._metadata = [self._metadata[row] for row in live]
+        self._positions = {vector_id: row for row, vector_id in enumerate(self._ids)}
+        self._size = len(live)
+        self._tombstones = 0
+
+    def _ensure_dimension(self, dimension: int) -> None:
+        if self._dimension is None:
+            self._dimension = dimension
+        elif dimension != self._dimension:
+            raise ValueError(f"Embedding dimension {dimension} does not match index dimension {self._dimension}")
+
+    def _reserve(self, capacity: int) -> None:
+        """Grow per-row arrays geometrically so appends are amortised O(1)"""
+        current = len(self._dead)
+        if capacity <= current and self._codes is not None:
+            return
+        new_capacity = max(capacity, self._initial_capacity, current * 2)
+
+        def grow(array: Optional[np.ndarray], shape: tuple, dtype) -> np.ndarray:
+            grown = np.zeros((new_capacity,) + shape, dtype=dtype)
+            if array is not None:
+                grown[:self._size] = array[:self._size]
+            return grown
+
+        if self.mode == "int8":
+            self._codes = grow(self._codes, (self._dimension,), np.int8)
+            self._scales = grow(self._scales, (), np.float32)
+        else:
+            width = self._codebooks.shape[0] if self._codebooks is not None else 0
+            self._codes = grow(self._codes, (width,), np.uint8)
+        self._full_rows = grow(self._full_rows, (), np.int64)
+        self._dead = grow(self._dead, (), bool)
@@ -2,34 +2,96 @@
 RAG Service - Core RAG pipeline implementation
 """
 
-from typing import List, Optional
+from typing import List, Optional, AsyncIterator
+from functools import lru_cache
 import structlog
 from datetime import datetime
 import hashlib
 import asyncio
+import json
 
 from app.core.config import settings
-from app.models.schemas import QueryRequest, QueryResponse, Source, QueryOptions
+from app.models.schemas import QueryRequest, QueryResponse, Source, QueryOptions, StreamingChunk
+from app.services.chunker import get_tokenizer
+from app.services.context_packer import ContextPacker, PackedContext, context_window
 from app.services.retrieval_service import RetrievalService
 from app.services.llm_service import LLMService
-from app.services.embedding_service import EmbeddingService
+from app.services.embedding_service import EmbeddingService, normalize_query
+from app.services.response_cache import get_response_cache
+from app.core.cache import SingleFlight
 from app.core.exceptions import RetrievalError, LLMError
+from app.core.persona import get_persona_system_prompt
 
 logger = structlog.get_logger()
 
+# Pipeline runs in flight, by normalised query and options
+_query_flights = SingleFlight("queries")
+# Tokens of chat message framing, on top of the counted prompt texts
+PROMPT_MESSAGE_OVERHEAD = 16
+
+# Answering rules, appended to the persona in the system message so that every
+# query shares one byte-identical prompt prefix the provider can cache
+RAG_SYSTEM_RULES = """You are Amrikyy AI — an expert, concise, and careful assistant. ALWAYS follow these rules:
+1) When the user asks a factual or document-related question, first consult the provided SOURCES. Use only the information contained in those sources to answer factual claims.
+2) For each factual claim, include one or more bracketed citations like [Source 1] referencing the labelled retrieved passages. After the main answer, include a "Sources" list with full metadata and a short quoted snippet for each cited source.
+3) If the retrieved sources do not support the answer, do NOT fabricate. Say "I could not find a supporting source in the provided documents." Offer to search more sources or ask clarifying questions.
+4) If asked for opinion or synthesis beyond the sources, label your answer clearly as "Opinion:" and separate model knowledge from source-based facts.
+5) Keep responses concise (2-6 sentences) by default unless the user requests detail. Offer "more details" as an expandable option.
+6) Respect user privacy and do not disclose private or restricted content unless the user has explicit rights.
+7) If the user asks for the raw retrieved passages, show them in the "Retrieved Passages" block unchanged and cite them.
+
+Respond in Arabic when appropriate, and always maintain a helpful and professional tone."""
+
+
+@lru_cache(maxsize=64)
+def _static_prompt_tokens(model: str, text: str) -> int:
+    """Token count of a compiled prompt, which only changes with the persona"""
+    return get_tokenizer(model).count([text])[0]
+
 class RAGService:
     """RAG pipeline orchestrator"""
     
-    def __init__(self):
-        self.retrieval_service = RetrievalService()
-        self.llm_service = LLMService()
-        self.embedding_service = EmbeddingService()
+    def __init__(
+        self,
+        retrieval_service: Optional[RetrievalService] = None,
+        llm_service: Optional[LLMService] = None,
+        embedding_service: Optional[EmbeddingService] = None
+    ):
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.retrieval_service = retrieval_service or RetrievalService(embedding_service=self.embedding_service)
+        self.llm_service = llm_service or LLMService()
     
     async def process_query(
         self, 
         query: str, 
         conversation_id: Optional[str] = None,
         options: Optional[QueryOptions] = None
+    ) -> QueryResponse:
+        """
+        Answer a query, sharing one pipeline run between identical queries
+        asked while it is in progress
+        """
+        if not options:
+            options = QueryOptions()
+        
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await self._process_query(query, conversation_id, options)
+        
+        start_time = datetime.utcnow()
+        key = (normalize_query(query), self._options_key(options))
+        response = await _query_flights.do(key, lambda: self._process_query(query, None, options))
+        # Every caller gets its own response and conversation IDs
+        return response.copy(update={
+            "id": self._generate_response_id(query, response.content),
+            "conversation_id": conversation_id or self._generate_conversation_id(),
+            "processing_time": (datetime.utcnow() - start_time).total_seconds()
+        })
+    
+    async def _process_query(
+        self,
+        query: str,
+        conversation_id: Optional[str],
+        options: QueryOptions
     ) -> QueryResponse:
         """
         Process a query through the complete RAG pipeline
@@ -44,48 +106,44 @@ class RAGService:
         """
         start_time = datetime.utcnow()
         
-        if not options:
-            options = QueryOptions()
-        
         try:
             logger.info("Starting RAG pipeline", query=query[:100])
             
             # Step 1: Generate query embedding
             query_embedding = await self.embedding_service.embed_query(query)
             
-            # Step 2: Retrieve relevant documents
-            retrieved_docs = await self.retrieval_service.retrieve(
-                query_embedding=query_embedding,
-                query_text=query,
-                top_k=options.top_k or settings.RETRIEVAL_TOP_K
-            )
-            
-            logger.info("Retrieved documents", count=len(retrieved_docs))
+            # A paraphrase of an already answered query skips retrieval and the LLM
+            options_key = self._options_key(options)
+            if settings.RESPONSE_CACHE_ENABLED:
+                cached = get_response_cache().lookup(query_embedding, options_key)
+                if cached:
+                    processing_time = (datetime.utcnow() - start_time).total_seconds()
+                    logger.info("Semantic cache hit", response_id=cached.id, processing_time=processing_time)
+                    return cached.copy(update={
+                        "id": self._generate_response_id(query, cached.content),
+                        "conversation_id": conversation_id or self._generate_conversation_id(),
+                        "timestamp": datetime.utcnow(),
+                        "processing_time": processing_time
+                    })
             
-            # Step 3: Rerank if we have results
-            if retrieved_docs:
-                reranked_docs = await self.retrieval_service.rerank(
-                    query=query,
-                    documents=retrieved_docs,
-                    top_k=options.top_k or settings.RERANK_TOP_K
-                )
-            else:
-                reranked_docs = []
+            # Steps 2-3: Retrieve and rerank relevant documents
+            reranked_docs = await self._retrieve_documents(query, query_embedding, options)
             
             # Step 4: Build context and prompt
-            context = self._build_context(reranked_docs)
-            prompt = self._build_prompt(query, context)
+            context = self._build_context(query, reranked_docs, options)
+            prompt = self._build_prompt(query, context.text)
             
             # Step 5: Generate response
             response_content = await self.llm_service.generate_response(
                 prompt=prompt,
+                system_prompt=get_persona_system_prompt(RAG_SYSTEM_RULES),
                 temperature=options.temperature or settings.OPENAI_TEMPERATURE,
                 max_tokens=options.max_tokens or settings.OPENAI_MAX_TOKENS,
                 model=options.model or settings.OPENAI_MODEL
             )
             
             # Step 6: Extract sources and create response
-            sources = self._extract_sources(reranked_docs)
+            sources = self._extract_sources(context.documents)
             
             # Calculate processing time
             processing_time = (datetime.utcnow() - start_time).total_seconds()
@@ -101,6 +159,14 @@ class RAGService:
                 processing_time=processing_time
             )
             
+            if settings.RESPONSE_CACHE_ENABLED:
+                get_response_cache().store(
+                    query_embedding,
+                    options_key,
+                    response,
+                    [doc.get('metadata', {}).get('doc_id') for doc in reranked_docs]
+                )
+            
             logger.info("RAG pipeline completed", 
                        response_id=response.id, 
                        processing_time=processing_time,
@@ -112,41 +178,149 @@ class RAGService:
             logger.error("RAG pipeline failed", error=str(e), query=query[:100])
             raise LLMError(f"Failed to process query: {str(e)}")
     
-    def _build_context(self, documents: List[dict]) -> str:
-        """Build context string from retrieved documents"""
-        if not documents:
-            return ""
+    async def stream_query(
+        self,
+        query: str,
+        conversation_id: Optional[str] = None,
+        options: Optional[QueryOptions] = None
+    ) -> AsyncIterator[StreamingChunk]:
+        """
+        Process a query through the RAG pipeline, streaming the answer
         
-        context_parts = []
-        for i, doc in enumerate(documents, 1):
-            source_info = f"===SOURCE {i}==="
-            metadata = f"metadata: {doc.get('metadata', {})}"
-            passage = f"passage: \"{doc['content']}\""
-            end_marker = f"===END SOURCE {i}==="
+        Yields a "source" frame as soon as reranking finishes, "text" frames
+        as tokens arrive from the LLM, then "done". Failures end the stream
+        with an "error" frame.
+        """
+        start_time = datetime.utcnow()
+        
+        if not options:
+            options = QueryOptions()
+        conversation_id = conversation_id or self._generate_conversation_id()
+        
+        try:
+            logger.info("Starting streaming RAG pipeline", query=query[:100])
+            
+            query_embedding = await self.embedding_service.embed_query(query)
+            
+            options_key = self._options_key(options)
+            if settings.RESPONSE_CACHE_ENABLED:
+                cached = get_response_cache().lookup(query_embedding, options_key)
+                if cached:
+                    yield StreamingChunk(type="source", sources=cached.sources or [], conversation_id=conversation_id)
+                    yield StreamingChunk(type="text", content=cached.content)
+                    yield StreamingChunk(type="done", conversation_id=conversation_id)
+                    return
+            
+            reranked_docs = await self._retrieve_documents(query, query_embedding, options)
+            context = self._build_context(query, reranked_docs, options)
+            sources = self._extract_sources(context.documents)
+            yield StreamingChunk(
+                type="source",
+                sources=sources if options.sources else [],
+                conversation_id=conversation_id
+            )
             
-            context_parts.append(f"{source_info}\n{metadata}\n{passage}\n{end_marker}")
+            prompt = self._build_prompt(query, context.text)
+            
+            parts = []
+            async for delta in self.llm_service.stream_response(
+                prompt=prompt,
+                system_prompt=get_persona_system_prompt(RAG_SYSTEM_RULES),
+                temperature=options.temperature or settings.OPENAI_TEMPERATURE,
+                max_tokens=options.max_tokens or settings.OPENAI_MAX_TOKENS,
+                model=options.model or settings.OPENAI_MODEL
+            ):
+                parts.append(delta)
+                yield StreamingChunk(type="text", content=delta)
+            
+            response_content = "".join(parts)
+            processing_time = (datetime.utcnow() - start_time).total_seconds()
+            
+            if settings.RESPONSE_CACHE_ENABLED:
+                get_response_cache().store(
+                    query_embedding,
+                    options_key,
+                    QueryResponse(
+                        id=self._generate_response_id(query, response_content),
+                        content=response_content,
+                        sources=sources if options.sources else None,
+                        conversation_id=conversation_id,
+                        timestamp=datetime.utcnow(),
+                        model_used=options.model or settings.OPENAI_MODEL,
+                        processing_time=processing_time
+                    ),
+                    [doc.get('metadata', {}).get('doc_id') for doc in reranked_docs]
+                )
+            
+            logger.info("Streaming RAG pipeline completed",
+                       processing_time=processing_time,
+                       sources_count=len(sources))
+            
+            yield StreamingChunk(type="done", conversation_id=conversation_id)
+            
+        except Exception as e:
+            logger.error("Streaming RAG pipeline failed", error=str(e), query=query[:100])
+            yield StreamingChunk(type="error", error=f"Failed to process query: {str(e)}")
+    
+    async def _retrieve_documents(
+        self,
+        query: str,
+        query_embedding: List[float],
+        options: QueryOptions
+    ) -> List[dict]:
+        """Retrieve candidate documents and rerank them"""
+        retrieved_docs = await self.retrieval_service.retrieve(
+            query_embedding=query_embedding,
+            query_text=query,
+            top_k=options.top_k or settings.RETRIEVAL_TOP_K
+        )
+        
+        logger.info("Retrieved documents", count=len(retrieved_docs))
+        
+        if not retrieved_docs:
+            return []
+        
+        return await self.retrieval_service.rerank(
+            query=query,
+            documents=retrieved_docs,
+            top_k=options.top_k or settings.RERANK_TOP_K
+        )
+    
+    def _build_context(self, query: str, documents: List[dict], options: QueryOptions) -> PackedContext:
+        """Pack the reranked documents into the tokens the rest of the prompt leaves free"""
+        if not documents:
+            return PackedContext("", [], 0, 0, 0, 0)
+        
+        model = options.model or settings.OPENAI_MODEL
+        budget = self._context_budget(query, model, options.max_tokens or settings.OPENAI_MAX_TOKENS)
+        context = ContextPacker(model).pack(documents, budget)
         
-        return "\n\n".join(context_parts)
+        logger.info("Context packed",
+                   passages=len(context.documents),
+                   tokens=context.tokens,
+                   budget=budget,
+                   merged=context.merged,
+                   duplicates=context.duplicates,
+                   truncated=context.truncated)
+        return context
+    
+    def _context_budget(self, query: str, model: str, max_tokens: int) -> int:
+        """Context tokens that fit beside the prompt, the system message and the completion"""
+        # Any non-empty context selects the template used when sources were found
+        prompt_tokens = (
+            get_tokenizer(model).count([self._build_prompt(query, " ")])[0]
+            + _static_prompt_tokens(model, get_persona_system_prompt(RAG_SYSTEM_RULES))
+        )
+        budget = context_window(model) - max_tokens - prompt_tokens - PROMPT_MESSAGE_OVERHEAD
+        if settings.RAG_CONTEXT_MAX_TOKENS:
+            budget = min(budget, settings.RAG_CONTEXT_MAX_TOKENS)
+        return max(budget, 0)
     
     def _build_prompt(self, query: str, context: str) -> str:
-        """Build the complete prompt for the LLM"""
-        system_prompt = """System: You are Amrikyy AI — an expert, concise, and careful assistant. ALWAYS follow these rules:
-1) When the user asks a factual or document-related question, first consult the provided SOURCES. Use only the information contained in those sources to answer factual claims.
-2) For each factual claim, include one or more bracketed citations like [Source 1] referencing the labelled retrieved passages. After the main answer, include a "Sources" list with full metadata and a short quoted snippet for each cited source.
-3) If the retrieved sources do not support the answer, do NOT fabricate. Say "I could not find a supporting source in the provided documents." Offer to search more sources or ask clarifying questions.
-4) If asked for opinion or synthesis beyond the sources, label your answer clearly as "Opinion:" and separate model knowledge from source-based facts.
-5) Keep responses concise (2-6 sentences) by default unless the user requests detail. Offer "more details" as an expandable option.
-6) Respect user privacy and do not disclose private or restricted content unless the user has explicit rights.
-7) If the user asks for the raw retrieved passages, show them in the "Retrieved Passages" block unchanged and cite them.
-
-Respond in Arabic when appropriate, and always maintain a helpful and professional tone."""
-
+        """Build the user message: fixed instructions first, then the sources and the question"""
         if context:
-            full_prompt = f"{system_prompt}\n\n{context}\n\nINSTRUCTION: Answer using the retrieved sources. For each factual claim cite the source(s) like [Source 1]. If no supporting source: 'No source found.'\n\nUser Question: {query}\n\nAssistant:"
-        else:
-            full_prompt = f"{system_prompt}\n\nNo relevant sources were found in the knowledge base. Please provide a helpful response based on general knowledge while noting the lack of specific sources.\n\nUser Question: {query}\n\nAssistant:"
-        
-        return full_prompt
+            return f"INSTRUCTION: Answer using the retrieved sources below. For each factual claim cite the source(s) like [Source 1]. If no supporting source: 'No source found.'\n\n{context}\n\nUser Question: {query}\n\nAssistant:"
+        return f"No relevant sources were found in the knowledge base. Please provide a helpful response based on general knowledge while noting the lack of specific sources.\n\nUser Question: {query}\n\nAssistant:"
     
     def _extract_sources(self, documents: List[dict]) -> List[Source]:
         """Extract sources from retrieved documents"""
@@ -166,6 +340,10 @@ Respond in Arabic when appropriate, and always maintain a helpful and profession
         
         return sources
     
+    def _options_key(self, options: QueryOptions) -> str:
+        """Stable key for the options that change the generated answer"""
+        return json.dumps(options.dict(), sort_keys=True)
+    
     def _generate_response_id(self, query: str, response: str) -> str:
         """Generate a unique response ID"""
         content = f"{query}:{response}:{datetime.utcnow().isoformat()}"
@@ -0,0 +1,229 @@
+"""
+Rate Limiter - Client-side request and token budgets for LLM provider calls
+"""
+
+from typing import Any, AsyncIterator, Dict, Mapping, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import time
+import weakref
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+# Seconds to hold admissions after a 429 that carries no retry hint
+DEFAULT_BACKOFF = 1.0
+
+
+class TokenBucket:
+    """
+    A per-minute budget that refills continuously.
+
+    A limit of None means no limit is known yet. The level may go negative
+    when a call turns out to cost more than was reserved; later callers
+    then wait for the debt to be paid back.
+    """
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit: Optional[float] = float(limit) if limit else None
+        self.level = self.limit or 0.0
+        self._updated = time.monotonic()
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount can be taken"""
+        if self.limit is None:
+            return 0.0
+        self._refill()
+        # A single reservation larger than the whole budget waits for a full bucket
+        amount = min(amount, self.limit)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60.0 / self.limit
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= amount
+
+    def give_back(self, amount: float) -> None:
+        self._refill()
+        self.level = min(self.level + amount, self.limit or 0.0)
+
+    def set_limit(self, limit: float) -> None:
+        """Change the budget, keeping the fraction already used"""
+        self._refill()
+        if self.limit is None:
+            self.level = limit
+        elif limit != self.limit:
+            self.level = self.level * limit / self.limit
+        self.limit = limit
+
+    def cap(self, remaining: float) -> None:
+        """Lower the level to what the provider says is left"""
+        if self.limit is not None:
+            self._refill()
+            self.level = min(self.level, remaining)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.limit is not None:
+            self.level = min(self.limit, self.level + (now - self._updated) * self.limit / 60.0)
+        self._updated = now
+
+
+class LLMRateGovernor:
+    """
+    Admits LLM calls within requests-per-minute and tokens-per-minute budgets
+    and an in-flight limit, in arrival order.
+
+    Each call reserves one request and its estimated tokens before it is
+    sent, and the estimate is corrected from the response's usage. The
+    provider's rate-limit headers adjust the budgets: their limits replace
+    unknown or higher configured ones, and the remaining counts pull the
+    buckets down to what the provider (and any other process sharing the
+    key) has actually left. A 429 holds every admission until its retry
+    hint expires, so a burst is queued instead of failing.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_concurrency: int = 16
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._configured = {"requests": requests_per_minute or None, "tokens": tokens_per_minute or None}
+        self.max_concurrency = max(1, max_concurrency)
+        self._in_flight = asyncio.Semaphore(self.max_concurrency)
+        # asyncio.Lock wakes waiters first come, first served, which makes admission fair
+        self._admission = asyncio.Lock()
+        self._paused_until = 0.0
+        self._waiting = 0
+        self._active = 0
+        self._stats = {"admitted": 0, "rate_limited": 0, "queued_seconds": 0.0, "max_waiting": 0}
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int) -> AsyncIterator["Reservation"]:
+        """Wait for budget and a free in-flight slot, then hold the slot for one call"""
+        started = time.monotonic()
+        self._waiting += 1
+        self._stats["max_waiting"] = max(self._stats["max_waiting"], self._waiting)
+        try:
+            async with self._admission:
+                await self._in_flight.acquire()
+                try:
+                    while True:
+                        delay = max(
+                            self._paused_until - time.monotonic(),
+                            self.requests.wait_time(1),
+                            self.tokens.wait_time(estimated_tokens)
+                        )
+                        if delay <= 0:
+                            break
+                        await asyncio.sleep(delay)
+                except BaseException:
+                    self._in_flight.release()
+                    raise
+                self.requests.take(1)
+                self.tokens.take(estimated_tokens)
+        finally:
+            self._waiting -= 1
+
+        self._stats["admitted"] += 1
+        self._stats["queued_seconds"] += time.monotonic() - started
+        self._active += 1
+        try:
+            yield Reservation(self, estimated_tokens)
+        finally:
+            self._active -= 1
+            self._in_flight.release()
+
+    def observe_headers(self, headers: Mapping[str, str]) -> None:
+        """Adapt the budgets to the x-ratelimit-* headers of a response"""
+        for name, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            limit = _header_number(headers, f"x-ratelimit-limit-{name}")
+            if limit:
+                configured = self._configured[name]
+                limit = min(limit, configured) if configured else limit
+                if bucket.limit != limit:
+                    logger.info("LLM rate limit adapted", budget=name, limit=limit)
+                    bucket.set_limit(limit)
+            remaining = _header_number(headers, f"x-ratelimit-remaining-{name}")
+            if remaining is not None:
+                bucket.cap(remaining)
+
+    def rate_limited(self, headers: Optional[Mapping[str, str]]) -> float:
+        """Hold admissions after a 429; returns the seconds held"""
+        headers = headers or {}
+        retry_after_ms = _header_number(headers, "retry-after-ms")
+        # x-ratelimit-reset-* time a full refill, far longer than the next call needs;
+        # without a retry hint the remaining counts below set the pace instead
+        delay = (
+            (retry_after_ms / 1000 if retry_after_ms else None)
+            or _header_number(headers, "retry-after")
+            or DEFAULT_BACKOFF
+        )
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        self._stats["rate_limited"] += 1
+        self.observe_headers(headers)
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "queued_seconds": round(self._stats["queued_seconds"], 3),
+            "waiting": self._waiting,
+            "in_flight": self._active,
+            "requests_per_minute": self.requests.limit,
+            "tokens_per_minute": self.tokens.limit,
+        }
+
+
+class Reservation:
+    """Tokens reserved for one admitted call"""
+
+    def __init__(self, governor: LLMRateGovernor, estimated_tokens: int):
+        self.governor = governor
+        self.estimated_tokens = estimated_tokens
+
+    def reconcile(self, used_tokens: Optional[int]) -> None:
+        """Return unused tokens to the budget, or charge the overrun"""
+        if used_tokens is not None:
+            self.governor.tokens.give_back(self.estimated_tokens - used_tokens)
+            self.estimated_tokens = used_tokens
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+# One governor per event loop, since its lock and semaphore belong to a loop
+_governors: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, LLMRateGovernor]" = weakref.WeakKeyDictionary()
+
+
+def get_llm_governor() -> LLMRateGovernor:
+    """The governor shared by every LLMService on the running loop"""
+    loop = asyncio.get_running_loop()
+    governor = _governors.get(loop)
+    if governor is None:
+        governor = LLMRateGovernor(
+            requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY
+        )
+        _governors[loop] = governor
+    return governor
+
+
+def llm_governor_stats() -> Dict[str, Any]:
+    """Admission counters for the governor on the running loop"""
+    try:
+        governor = _governors.get(asyncio.get_running_loop())
+    except RuntimeError:
+        governor = None
+    return governor.stats() if governor else {"admitted": 0, "rate_limited": 0}
@@ -0,0 +1,161 @@
+"""
+Semantic Response Cache - Reuse answers for paraphrased queries
+"""
+
+from typing import List, Optional, Dict, Any, Iterable, Set
+from collections import OrderedDict
+import threading
+import time
+import uuid
+import structlog
+
+from app.core.config import settings
+from app.models.schemas import QueryResponse
+from app.services.vector_index import LocalVectorIndex
+
+logger = structlog.get_logger()
+
+# Answers built without sources depend on "nothing relevant was indexed yet"
+_UNSOURCED = "__unsourced__"
+
+
+class SemanticResponseCache:
+    """
+    Cache of answered queries looked up by embedding similarity.
+
+    Each entry records the document IDs its sources came from, so deleting
+    or reprocessing any of those documents evicts it.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1000, ttl: int = 3600):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._index = LocalVectorIndex(initial_capacity=64)
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._by_document: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, query_embedding: List[float], options_key: str) -> Optional[QueryResponse]:
+        """Return a cached response for a sufficiently similar query with the same options"""
+        with self._lock:
+            now = time.monotonic()
+            for entry_id, score, _ in self._index.search(query_embedding, top_k=5):
+                if score < self.threshold:
+                    break
+                entry = self._entries.get(entry_id)
+                if entry is None or entry["options_key"] != options_key:
+                    continue
+                if now - entry["created_at"] > self.ttl:
+                    self._evict(entry_id)
+                    continue
+                self._entries.move_to_end(entry_id)
+                self.hits += 1
+                return entry["response"]
+
+            self.misses += 1
+            return None
+
+    def store(
+        self,
+        query_embedding: List[float],
+        options_key: str,
+        response: QueryResponse,
+        document_ids: Iterable[str]
+    ) -> None:
+        document_ids = {doc_id for doc_id in document_ids if doc_id} or {_UNSOURCED}
+
+        with self._lock:
+            entry_id = uuid.uuid4().hex
+            self._index.upsert(entry_id, query_embedding)
+            self._entries[entry_id] = {
+                "options_key": options_key,
+                "response": response,
+                "document_ids": document_ids,
+                "created_at": time.monotonic(),
+            }
+            for doc_id in document_ids:
+                self._by_document.setdefault(doc_id, set()).add(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+
+    def invalidate_documents(self, document_ids: Iterable[str]) -> int:
+        """Evict every entry that cited one of the given documents"""
+        with self._lock:
+            entry_ids = set()
+            for doc_id in document_ids:
+                entry_ids |= self._by_document.get(str(doc_id), set())
+            for entry_id in entry_ids:
+                self._evict(entry_id)
+            self.invalidations += len(entry_ids)
+            return len(entry_ids)
+
+    def invalidate_unsourced(self) -> int:
+        """Evict answers that had no sources; new content may now answer them"""
+        return self.invalidate_documents([_UNSOURCED])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._index = LocalVectorIndex(initial_capacity=64)
+            self._entries.clear()
+            self._by_document.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+    def _evict(self, entry_id: str) -> None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        self._index.delete(entry_id)
+        if self._index.tombstone_ratio >= settings.VECTOR_COMPACTION_RATIO:
+            # The cache index is small, so compacting inline is cheap
+            self._index.compact()
+        for doc_id in entry["document_ids"]:
+            dependants = self._by_document.get(doc_id)
+            if dependants is not None:
+                dependants.discard(entry_id)
+                if not dependants:
+                    del self._by_document[doc_id]
+
+
+_response_cache: Optional[SemanticResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> SemanticResponseCache:
+    """Return the process-wide response cache"""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = SemanticResponseCache(
+                    threshold=settings.RESPONSE_CACHE_THRESHOLD,
+                    max_entries=settings.RESPONSE_CACHE_SIZE,
+                    ttl=settings.CACHE_TTL,
+                )
+    return _response_cache
+
+
+def invalidate_documents(document_ids: Iterable[str], include_unsourced: bool = False) -> None:
+    """Drop cached answers that depended on the given documents"""
+    if _response_cache is not None:
+        document_ids = [str(doc_id) for doc_id in document_ids]
+        if include_unsourced:
+            document_ids.append(_UNSOURCED)
+        evicted = _response_cache.invalidate_documents(document_ids)
+        if evicted:
+            logger.info("Response cache entries invalidated", count=evicted)
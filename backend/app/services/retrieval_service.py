@@ -0,0 +1,221 @@
+"""
+Retrieval Service - Vector search and result hydration for the RAG pipeline
+"""
+
+from typing import List, Optional, Dict, Any, Tuple
+import asyncio
+import structlog
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import RetrievalError
+from app.models.database import Document, DocumentChunk
+from app.services.embedding_service import EmbeddingService
+from app.services.lexical_index import get_lexical_index
+from app.services.vector_service import VectorService
+
+logger = structlog.get_logger()
+
+class RetrievalService:
+    """Service for retrieving relevant document chunks"""
+
+    def __init__(
+        self,
+        vector_service: Optional[VectorService] = None,
+        embedding_service: Optional[EmbeddingService] = None
+    ):
+        self.vector_service = vector_service or VectorService()
+        self.embedding_service = embedding_service or EmbeddingService()
+
+    async def retrieve(
+        self,
+        query_embedding: List[float],
+        query_text: Optional[str] = None,
+        top_k: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve the chunks most relevant to the query.
+
+        Every namespace in VECTOR_NAMESPACES is searched concurrently, and
+        vector hits are fused with BM25 hits over chunk content when
+        HYBRID_SEARCH_ENABLED is set and query_text is given.
+        """
+        top_k = top_k or settings.RETRIEVAL_TOP_K
+
+        if query_text and settings.HYBRID_SEARCH_ENABLED:
+            hits, lexical_hits = await asyncio.gather(
+                self._search_namespaces(query_embedding, top_k),
+                self._search_lexical(query_text, top_k)
+            )
+            hits = [hit for hit in hits if hit["score"] >= settings.MIN_CONFIDENCE_THRESHOLD]
+            hits = self._fuse(hits, lexical_hits, top_k)
+        else:
+            hits = await self._search_namespaces(query_embedding, top_k)
+            hits = [hit for hit in hits if hit["score"] >= settings.MIN_CONFIDENCE_THRESHOLD]
+
+        return await self._hydrate(hits)
+
+    async def retrieve_by_text(self, query_text: str, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Embed the query text and retrieve matching chunks"""
+        query_embedding = await self.embedding_service.embed_query(query_text)
+        return await self.retrieve(query_embedding=query_embedding, query_text=query_text, top_k=top_k)
+
+    async def rerank(self, query: str, documents: List[Dict[str, Any]], top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Order documents by retrieval score and keep the best top_k"""
+        top_k = top_k or settings.RERANK_TOP_K
+        ranked = sorted(documents, key=lambda doc: doc.get("score", doc.get("confidence") or 0.0), reverse=True)
+        return ranked[:top_k]
+
+    async def _search_namespaces(self, query_embedding: List[float], top_k: int) -> List[Dict[str, Any]]:
+        """
+        Query every namespace at once and merge whatever arrives before each
+        namespace's deadline, so one slow source cannot hold up the rest.
+        """
+        namespaces = settings.VECTOR_NAMESPACES
+        results = await asyncio.gather(
+            *(self._search_namespace(namespace, query_embedding, top_k) for namespace in namespaces),
+            return_exceptions=True
+        )
+
+        hits = []
+        errors = []
+        for namespace, result in zip(namespaces, results):
+            if isinstance(result, asyncio.TimeoutError):
+                logger.warning("Namespace search missed its deadline", namespace=namespace)
+            elif isinstance(result, Exception):
+                logger.error("Namespace search failed", namespace=namespace, error=str(result))
+                errors.append(result)
+            else:
+                hits.extend(result)
+
+        if errors and len(errors) == len(namespaces):
+            raise RetrievalError(f"Vector search failed: {str(errors[0])}")
+
+        hits.sort(key=lambda hit: hit["score"], reverse=True)
+        return hits[:top_k]
+
+    async def _search_namespace(self, namespace: str, query_embedding: List[float], top_k: int) -> List[Dict[str, Any]]:
+        timeout_ms = settings.NAMESPACE_SEARCH_TIMEOUTS_MS.get(namespace, settings.NAMESPACE_SEARCH_TIMEOUT_MS)
+        return await asyncio.wait_for(
+            self.vector_service.query(query_embedding, top_k, namespace=namespace),
+            timeout=timeout_ms / 1000
+        )
+
+    async def _search_lexical(self, query_text: str, top_k: int) -> List[Tuple[str, float]]:
+        """BM25 hits, or none if the scan misses the namespace search deadline"""
+
+        def search() -> List[Tuple[str, float]]:
+            return get_lexical_index().search(query_text, top_k)
+
+        try:
+            # Scoring every posting list is pure Python, so it runs in a worker thread
+            return await asyncio.wait_for(asyncio.to_thread(search), timeout=settings.NAMESPACE_SEARCH_TIMEOUT_MS / 1000)
+        except asyncio.TimeoutError:
+            logger.warning("Lexical search missed its deadline")
+            return []
+
+    def _fuse(
+        self,
+        vector_hits: List[Dict[str, Any]],
+        lexical_hits: List[Tuple[str, float]],
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """Combine vector and lexical rankings with RRF or min-max weighted fusion"""
+        if settings.HYBRID_FUSION == "weighted":
+            weight = settings.HYBRID_VECTOR_WEIGHT
+            contributions = [
+                (self._min_max({hit["id"]: hit["score"] for hit in vector_hits}), weight),
+                (self._min_max(dict(lexical_hits)), 1.0 - weight),
+            ]
+        else:
+            rrf_k = settings.HYBRID_RRF_K
+            contributions = [
+                ({hit["id"]: 1.0 / (rrf_k + rank) for rank, hit in enumerate(vector_hits, 1)}, 1.0),
+                ({doc_id: 1.0 / (rrf_k + rank) for rank, (doc_id, _) in enumerate(lexical_hits, 1)}, 1.0),
+            ]
+
+        fused: Dict[str, float] = {}
+        for scores, weight in contributions:
+            for doc_id, score in scores.items():
+                fused[doc_id] = fused.get(doc_id, 0.0) + weight * score
+
+        vector_by_id = {hit["id"]: hit for hit in vector_hits}
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [
+            {
+                "id": doc_id,
+                "score": score,
+                # Lexical-only hits have no similarity score to report
+                "confidence": vector_by_id[doc_id]["score"] if doc_id in vector_by_id else None,
+                "metadata": vector_by_id[doc_id]["metadata"] if doc_id in vector_by_id else {},
+            }
+            for doc_id, score in ranked
+        ]
+
+    @staticmethod
+    def _min_max(scores: Dict[str, float]) -> Dict[str, float]:
+        if not scores:
+            return {}
+        low, high = min(scores.values()), max(scores.values())
+        span = high - low
+        return {doc_id: (score - low) / span if span else 1.0 for doc_id, score in scores.items()}
+
+    async def _hydrate(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Attach chunk content and document details to search hits"""
+        if not hits:
+            return []
+
+        embedding_ids = [hit["id"] for hit in hits]
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(DocumentChunk, Document)
+                .join(Document, DocumentChunk.document_id == Document.id)
+                .where(DocumentChunk.embedding_id.in_(embedding_ids))
+            )
+            rows = result.all()
+
+        chunks = {chunk.embedding_id: (chunk, document) for chunk, document in rows}
+        results = []
+
+        for hit in hits:
+            metadata = hit.get("metadata") or {}
+            row = chunks.get(hit["id"])
+
+            if row:
+                chunk, document = row
+                results.append({
+                    "id": str(chunk.id),
+                    "title": document.title or document.original_filename,
+                    "content": chunk.content,
+                    "timestamp": document.created_at,
+                    "confidence": hit.get("confidence", hit["score"]),
+                    "score": hit["score"],
+                    # Position in the document, so the context packer can merge neighbouring chunks
+                    "chunk_index": chunk.chunk_index,
+                    "start_offset": chunk.start_offset,
+                    "end_offset": chunk.end_offset,
+                    "page_number": chunk.page_number,
+                    "metadata": {
+                        "doc_id": str(document.id),
+                        "chunk_id": str(chunk.id),
+                        "page_number": chunk.page_number,
+                        "section": chunk.section_title,
+                    }
+                })
+            else:
+                # Vector without a matching chunk row (e.g. seeded directly); use stored preview
+                results.append({
+                    "id": metadata.get("chunk_id", hit["id"]),
+                    "title": metadata.get("title", "Unknown Document"),
+                    "content": metadata.get("content") or metadata.get("preview", ""),
+                    "confidence": hit.get("confidence", hit["score"]),
+                    "score": hit["score"],
+                    "metadata": {
+                        "doc_id": metadata.get("document_id"),
+                        "chunk_id": metadata.get("chunk_id", hit["id"]),
+                        "section": metadata.get("title"),
+                    }
+                })
+
+        return results
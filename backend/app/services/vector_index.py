@@ -0,0 +1,287 @@
+"""
+Local Vector Index - In-process cosine similarity search over NumPy matrices
+"""
+
+from typing import List, Optional, Dict, Any, Iterable, Tuple, Sequence
+import json
+import os
+import threading
+
+import numpy as np
+import structlog
+
+logger = structlog.get_logger()
+
+# A single search hit: (vector_id, score, metadata)
+SearchHit = Tuple[str, float, Dict[str, Any]]
+
+
+def write_index_files(
+    path: str,
+    dimension: Optional[int],
+    ids: List[str],
+    matrix: np.ndarray,
+    metadata: List[Dict[str, Any]]
+) -> None:
+    """Atomically write an index dump (vectors.npy + entries.json) to ``path``"""
+    os.makedirs(path, exist_ok=True)
+    entries = {"dimension": dimension, "ids": ids, "metadata": metadata}
+
+    vectors_tmp = os.path.join(path, "vectors.tmp.npy")
+    entries_tmp = os.path.join(path, "entries.tmp.json")
+    np.save(vectors_tmp, matrix)
+    with open(entries_tmp, "w", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False)
+    os.replace(vectors_tmp, os.path.join(path, "vectors.npy"))
+    os.replace(entries_tmp, os.path.join(path, "entries.json"))
+
+
+def read_index_files(path: str) -> Tuple[Optional[int], List[str], np.ndarray, List[Dict[str, Any]]]:
+    """Read a dump written by ``write_index_files``"""
+    with open(os.path.join(path, "entries.json"), encoding="utf-8") as f:
+        entries = json.load(f)
+    matrix = np.load(os.path.join(path, "vectors.npy"))
+    return entries["dimension"], list(entries["ids"]), matrix, list(entries["metadata"])
+
+
+class LocalVectorIndex:
+    """
+    Exact nearest-neighbour index kept in one contiguous float32 matrix.
+
+    Rows are L2-normalised on insert so a single matrix product gives cosine
+    similarity for a whole batch of queries. Top-k selection uses
+    ``argpartition`` so only the k winners per query are fully sorted.
+
+    Deletes only tombstone their rows, which search masks out at once;
+    ``compact`` later rewrites the matrix without them to reclaim memory.
+    """
+
+    def __init__(self, dimension: Optional[int] = None, initial_capacity: int = 1024):
+        self._lock = threading.RLock()
+        self._dimension = dimension
+        self._initial_capacity = max(1, initial_capacity)
+        self._matrix: Optional[np.ndarray] = None
+        self._size = 0
+        self._ids: List[Optional[str]] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        self._dead = np.zeros(0, dtype=bool)
+        self._tombstones = 0
+
+    def __len__(self) -> int:
+        return self._size - self._tombstones
+
+    def __contains__(self, vector_id: str) -> bool:
+        return vector_id in self._positions
+
+    @property
+    def dimension(self) -> Optional[int]:
+        return self._dimension
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the vector matrix (including spare capacity)"""
+        return self._matrix.nbytes if self._matrix is not None else 0
+
+    @property
+    def tombstones(self) -> int:
+        """Deleted rows still occupying the matrix"""
+        return self._tombstones
+
+    @property
+    def tombstone_ratio(self) -> float:
+        """Share of occupied rows that are tombstones"""
+        return self._tombstones / self._size if self._size else 0.0
+
+    def upsert(self, vector_id: str, embedding: Sequence[float], metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Insert or replace a single vector"""
+        self.upsert_batch([vector_id], [embedding], [metadata or {}])
+        return vector_id
+
+    def upsert_batch(
+        self,
+        vector_ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: Optional[Sequence[Optional[Dict[str, Any]]]] = None
+    ) -> List[str]:
+        """Insert or replace many vectors with a single matrix write"""
+        if not vector_ids:
+            return []
+        if metadatas is None:
+            metadatas = [None] * len(vector_ids)
+        if not (len(vector_ids) == len(embeddings) == len(metadatas)):
+            raise ValueError("vector_ids, embeddings and metadatas must have the same length")
+
+        vectors = self._normalise(self._as_matrix(embeddings))
+
+        with self._lock:
+            self._ensure_dimension(vectors.shape[1])
+            for vector_id, vector, metadata in zip(vector_ids, vectors, metadatas):
+                row = self._positions.get(vector_id)
+                if row is None:
+                    row = self._size
+                    self._reserve(row + 1)
+                    self._positions[vector_id] = row
+                    self._ids.append(vector_id)
+                    self._metadata.append(metadata or {})
+                    self._size += 1
+                else:
+                    self._metadata[row] = metadata or {}
+                self._matrix[row] = vector
+
+        return list(vector_ids)
+
+    def delete(self, vector_id: str) -> bool:
+        """Remove a vector"""
+        return self.delete_batch([vector_id]) == 1
+
+    def delete_batch(self, vector_ids: Iterable[str]) -> int:
+        """Tombstone many vectors; returns how many were present"""
+        with self._lock:
+            deleted = 0
+            for vector_id in vector_ids:
+                row = self._positions.pop(vector_id, None)
+                if row is None:
+                    continue
+                self._dead[row] = True
+                self._ids[row] = None
+                self._metadata[row] = {}
+                deleted += 1
+            self._tombstones += deleted
+            return deleted
+
+    def compact(self) -> int:
+        """Rewrite the matrix without tombstoned rows; returns how many were reclaimed"""
+        with self._lock:
+            reclaimed = self._tombstones
+            if not reclaimed:
+                return 0
+
+            live = np.flatnonzero(~self._dead[:self._size])
+            capacity = max(len(live), self._initial_capacity)
+            matrix = np.empty((capacity, self._dimension), dtype=np.float32)
+            matrix[:len(live)] = self._matrix[live]
+
+            self._matrix = matrix
+            self._ids = [self._ids[row] for row in live]
+            self._metadata = [self._metadata[row] for row in live]
+            self._positions = {vector_id: row for row, vector_id in enumerate(self._ids)}
+            self._dead = np.zeros(capacity, dtype=bool)
+            self._size = len(live)
+            self._tombstones = 0
+            return reclaimed
+
+    def get(self, vector_id: str) -> Optional[np.ndarray]:
+        """Return a copy of the stored (normalised) vector"""
+        with self._lock:
+            row = self._positions.get(vector_id)
+            return None if row is None else self._matrix[row].copy()
+
+    def get_metadata(self, vector_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._positions.get(vector_id)
+            return None if row is None else self._metadata[row]
+
+    def search(self, query: Sequence[float], top_k: int = 10) -> List[SearchHit]:
+        """Return the top_k most similar vectors for one query"""
+        return self.search_batch([query], top_k)[0]
+
+    def search_batch(self, queries: Sequence[Sequence[float]], top_k: int = 10) -> List[List[SearchHit]]:
+        """Score a batch of queries with one matrix product"""
+        query_matrix = self._normalise(self._as_matrix(queries))
+
+        with self._lock:
+            live = self._size - self._tombstones
+            if live == 0 or top_k <= 0:
+                return [[] for _ in range(len(query_matrix))]
+            if query_matrix.shape[1] != self._dimension:
+                raise ValueError(
+                    f"Query dimension {query_matrix.shape[1]} does not match index dimension {self._dimension}"
+                )
+
+            scores = query_matrix @ self._matrix[:self._size].T
+            if self._tombstones:
+                # Tombstones sort last, and k never exceeds the live rows
+                scores[:, self._dead[:self._size]] = -np.inf
+            k = min(top_k, live)
+            if k < self._size:
+                candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                candidates = np.broadcast_to(np.arange(self._size), (len(scores), self._size))
+
+            results = []
+            for query_scores, rows in zip(scores, candidates):
+                ordered = rows[np.argsort(-query_scores[rows])]
+                results.append([
+                    (self._ids[row], float(query_scores[row]), self._metadata[row])
+                    for row in ordered
+                ])
+            return results
+
+    def export(self) -> Tuple[List[str], np.ndarray, List[Dict[str, Any]]]:
+        """Return (ids, normalised vectors, metadata) for every live row"""
+        with self._lock:
+            if self._matrix is None:
+                return [], np.zeros((0, self._dimension or 0), dtype=np.float32), []
+            if not self._tombstones:
+                return list(self._ids), self._matrix[:self._size].copy(), list(self._metadata)
+            live = np.flatnonzero(~self._dead[:self._size])
+            return [self._ids[row] for row in live], self._matrix[live], [self._metadata[row] for row in live]
+
+    def save(self, path: str) -> None:
+        """Persist vectors and entries to ``path`` (a directory)"""
+        ids, matrix, metadata = self.export()
+        write_index_files(path, self._dimension, ids, matrix, metadata)
+        logger.info("Local vector index saved", path=path, vectors=len(ids))
+
+    @classmethod
+    def load(cls, path: str, **params) -> "LocalVectorIndex":
+        """Load an index previously written by ``save``"""
+        dimension, ids, matrix, metadata = read_index_files(path)
+
+        index = cls(dimension=dimension, initial_capacity=max(len(matrix), 1))
+        if len(matrix):
+            index._matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+            index._size = len(matrix)
+            index._ids = ids
+            index._metadata = metadata
+            index._positions = {vector_id: row for row, vector_id in enumerate(ids)}
+            index._dead = np.zeros(len(matrix), dtype=bool)
+
+        logger.info("Local vector index loaded", path=path, vectors=index._size)
+        return index
+
+    def _ensure_dimension(self, dimension: int) -> None:
+        if self._dimension is None:
+            self._dimension = dimension
+        elif dimension != self._dimension:
+            raise ValueError(f"Embedding dimension {dimension} does not match index dimension {self._dimension}")
+
+    def _reserve(self, capacity: int) -> None:
+        """Grow the matrix geometrically so appends are amortised O(1)"""
+        current = 0 if self._matrix is None else self._matrix.shape[0]
+        if capacity <= current:
+            return
+        new_capacity = max(capacity, self._initial_capacity, current * 2)
+        matrix = np.empty((new_capacity, self._dimension), dtype=np.float32)
+        dead = np.zeros(new_capacity, dtype=bool)
+        if self._matrix is not None:
+            matrix[:self._size] = self._matrix[:self._size]
+            dead[:self._size] = self._dead[:self._size]
+        self._matrix = matrix
+        self._dead = dead
+
+    @staticmethod
+    def _as_matrix(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if matrix.ndim != 2:
+            raise ValueError("Embeddings must be a 1-D vector or a 2-D batch")
+        return matrix
+
+    @staticmethod
+    def _normalise(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
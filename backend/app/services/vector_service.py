@@ -0,0 +1,281 @@
+"""
+Vector Service - Storage and similarity search for chunk embeddings
+"""
+
+from typing import List, Optional, Dict, Any, Iterable, Sequence, Union
+import asyncio
+import fcntl
+import os
+import threading
+import time
+import structlog
+
+from app.core.config import settings
+from app.core.exceptions import RetrievalError
+from app.services.vector_index import LocalVectorIndex
+from app.services.ann_index import IVFIndex, HNSWIndex
+from app.services.quantized_index import QuantizedIndex
+
+logger = structlog.get_logger()
+
+LocalIndex = Union[LocalVectorIndex, IVFIndex, HNSWIndex, QuantizedIndex]
+
+# Uploaded documents live in the default namespace; seeded corpora get their own
+DEFAULT_NAMESPACE = "default"
+
+_local_indexes: Dict[str, LocalIndex] = {}
+_local_index_lock = threading.Lock()
+_compactions: Dict[str, asyncio.Task] = {}
+
+# Held for the life of the one process allowed to load and write the local index files
+OWNER_LOCK_FILE = ".owner.lock"
+_owner_lock = None
+
+
+def _local_index_class_and_params() -> tuple:
+    """Map LOCAL_INDEX_TYPE to an index class and its tuning parameters"""
+    index_type = settings.LOCAL_INDEX_TYPE
+    if index_type == "flat":
+        return LocalVectorIndex, {}
+    if index_type == "ivf":
+        return IVFIndex, {"nlist": settings.IVF_NLIST, "nprobe": settings.IVF_NPROBE}
+    if index_type == "hnsw":
+        return HNSWIndex, {
+            "m": settings.HNSW_M,
+            "ef_construction": settings.HNSW_EF_CONSTRUCTION,
+            "ef_search": settings.HNSW_EF_SEARCH,
+        }
+    if index_type in ("int8", "pq"):
+        return QuantizedIndex, {
+            "mode": index_type,
+            "subquantizers": settings.PQ_SUBQUANTIZERS,
+            "rescore_factor": settings.QUANTIZED_RESCORE_FACTOR,
+        }
+    raise RetrievalError(f"Unknown LOCAL_INDEX_TYPE '{index_type}'; expected flat, ivf, hnsw, int8 or pq")
+
+
+def _namespace_path(namespace: str) -> str:
+    """Directory holding a namespace's index files"""
+    if namespace == DEFAULT_NAMESPACE:
+        return settings.LOCAL_VECTOR_INDEX_PATH
+    return os.path.join(settings.LOCAL_VECTOR_INDEX_PATH, "namespaces", namespace)
+
+
+def claim_local_index() -> None:
+    """Take the exclusive lock on LOCAL_VECTOR_INDEX_PATH, raising RuntimeError if another process holds it
+
+    The local index lives in one process's memory and is written back on exit,
+    so a second writer (another API worker or a loading script) would be lost.
+    """
+    global _owner_lock
+    if _owner_lock is not None:
+        return
+    path = settings.LOCAL_VECTOR_INDEX_PATH
+    os.makedirs(path, exist_ok=True)
+    handle = open(os.path.join(path, OWNER_LOCK_FILE), "a+")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        handle.seek(0)
+        owner = handle.read().strip() or "unknown"
+        handle.close()
+        raise RuntimeError(
+            f"The local vector index at {path} is in use by process {owner}; "
+            "VECTOR_DB_TYPE=local supports one process, so run a single API worker "
+            "and stop the API before running scripts that write the index"
+        )
+    handle.seek(0)
+    handle.truncate()
+    handle.write(str(os.getpid()))
+    handle.flush()
+    _owner_lock = handle
+
+
+def release_local_index() -> None:
+    """Drop the lock taken by ``claim_local_index``"""
+    global _owner_lock
+    if _owner_lock is not None:
+        fcntl.flock(_owner_lock, fcntl.LOCK_UN)
+        _owner_lock.close()
+        _owner_lock = None
+
+
+def new_local_index() -> LocalIndex:
+    """An empty index of the configured LOCAL_INDEX_TYPE"""
+    index_class, params = _local_index_class_and_params()
+    return index_class(**params)
+
+
+def get_local_index(namespace: str = DEFAULT_NAMESPACE) -> LocalIndex:
+    """Return the process-wide local index for a namespace, loading it from disk on first use"""
+    index = _local_indexes.get(namespace)
+    if index is None:
+        with _local_index_lock:
+            index = _local_indexes.get(namespace)
+            if index is None:
+                index_class, params = _local_index_class_and_params()
+                path = _namespace_path(namespace)
+                if os.path.exists(os.path.join(path, "entries.json")):
+                    index = index_class.load(path, **params)
+                else:
+                    index = index_class(**params)
+                _local_indexes[namespace] = index
+    return index
+
+
+async def load_local_indexes() -> None:
+    """Load every VECTOR_NAMESPACES index from disk in a worker thread"""
+    for namespace in settings.VECTOR_NAMESPACES:
+        await asyncio.to_thread(get_local_index, namespace)
+
+
+def replace_local_index(namespace: str, index: LocalIndex) -> None:
+    """Swap in a rebuilt index for a namespace"""
+    with _local_index_lock:
+        _local_indexes[namespace] = index
+
+
+def schedule_compaction(namespace: str = DEFAULT_NAMESPACE) -> None:
+    """Compact a namespace index in the background once VECTOR_COMPACTION_RATIO of its rows are tombstones"""
+    index = _local_indexes.get(namespace)
+    if index is None or index.tombstone_ratio < settings.VECTOR_COMPACTION_RATIO:
+        return
+    running = _compactions.get(namespace)
+    if running is not None and not running.done():
+        return
+    _compactions[namespace] = asyncio.create_task(_compact(namespace, index))
+
+
+async def _compact(namespace: str, index: LocalIndex) -> None:
+    started = time.perf_counter()
+    try:
+        reclaimed = await asyncio.to_thread(index.compact)
+        logger.info(
+            "Local vector index compacted",
+            namespace=namespace,
+            reclaimed=reclaimed,
+            vectors=len(index),
+            duration=round(time.perf_counter() - started, 3)
+        )
+    except Exception as e:
+        logger.error("Local vector index compaction failed", namespace=namespace, error=str(e))
+
+
+def local_index_stats() -> Dict[str, Dict[str, Any]]:
+    """Size and memory of every loaded namespace index"""
+    stats = {}
+    for namespace, index in list(_local_indexes.items()):
+        stats[namespace] = {
+            "type": settings.LOCAL_INDEX_TYPE,
+            "vectors": len(index),
+            "resident_bytes": getattr(index, "nbytes", None),
+            "mapped_bytes": getattr(index, "mapped_nbytes", 0),
+        }
+    return stats
+
+
+def persist_local_index() -> None:
+    """Write every loaded namespace index under LOCAL_VECTOR_INDEX_PATH"""
+    claim_local_index()
+    for namespace, index in list(_local_indexes.items()):
+        index.save(_namespace_path(namespace))
+
+
+class VectorService:
+    """Vector store facade selected by VECTOR_DB_TYPE"""
+
+    def __init__(self):
+        self.db_type = settings.VECTOR_DB_TYPE
+
+    async def upsert_vector(
+        self,
+        vector_id: str,
+        embedding: List[float],
+        metadata: Optional[Dict[str, Any]] = None,
+        namespace: str = DEFAULT_NAMESPACE
+    ) -> str:
+        """Insert or replace a vector; returns the ID stored as DocumentChunk.embedding_id"""
+        await self.upsert_vectors([vector_id], [embedding], [metadata or {}], namespace)
+        return vector_id
+
+    async def upsert_vectors(
+        self,
+        vector_ids: Sequence[str],
+        embeddings: Sequence[List[float]],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        namespace: str = DEFAULT_NAMESPACE
+    ) -> List[str]:
+        """Insert or replace many vectors in one call"""
+        # An upsert can cross an ANN index's training threshold and run k-means,
+        # so it runs in a worker thread rather than stalling the event loop
+        index = await self._index(namespace)
+        return await asyncio.to_thread(index.upsert_batch, vector_ids, embeddings, metadatas)
+
+    async def delete_vector(self, vector_id: str, namespace: str = DEFAULT_NAMESPACE) -> bool:
+        """Delete a vector by its embedding ID"""
+        return await self.delete_vectors([vector_id], namespace) == 1
+
+    async def delete_vectors(self, vector_ids: Iterable[str], namespace: str = DEFAULT_NAMESPACE) -> int:
+        """Delete many vectors in one call; returns how many were present"""
+        # A running compaction holds the index lock, so wait for it off the event loop
+        index = await self._index(namespace)
+        deleted = await asyncio.to_thread(index.delete_batch, list(vector_ids))
+        if deleted:
+            # Deletes are tombstones that search skips; memory is reclaimed later
+            schedule_compaction(namespace)
+        return deleted
+
+    async def get_vectors(self, vector_ids: Sequence[str], namespace: str = DEFAULT_NAMESPACE) -> Dict[str, List[float]]:
+        """Stored (normalised) vectors for the IDs present in a namespace"""
+        index = await self._index(namespace)
+
+        def read() -> Dict[str, List[float]]:
+            vectors = {}
+            for vector_id in vector_ids:
+                vector = index.get(vector_id)
+                if vector is not None:
+                    vectors[vector_id] = vector.tolist()
+            return vectors
+
+        return await asyncio.to_thread(read)
+
+    async def query(
+        self,
+        embedding: List[float],
+        top_k: int = 10,
+        namespace: str = DEFAULT_NAMESPACE
+    ) -> List[Dict[str, Any]]:
+        """Return the top_k nearest vectors as ``{"id", "score", "metadata", "namespace"}`` dicts"""
+        return (await self.query_batch([embedding], top_k, namespace))[0]
+
+    async def query_batch(
+        self,
+        embeddings: Sequence[List[float]],
+        top_k: int = 10,
+        namespace: str = DEFAULT_NAMESPACE
+    ) -> List[List[Dict[str, Any]]]:
+        """Answer several queries with one batched search"""
+        index = await self._index(namespace)
+        try:
+            # NumPy releases the GIL during the matrix product, so a worker thread
+            # keeps large scans from stalling the event loop.
+            hits = await asyncio.to_thread(index.search_batch, embeddings, top_k)
+        except ValueError as e:
+            raise RetrievalError(f"Vector search failed: {str(e)}")
+
+        return [
+            [
+                {"id": vector_id, "score": score, "metadata": metadata, "namespace": namespace}
+                for vector_id, score, metadata in query_hits
+            ]
+            for query_hits in hits
+        ]
+
+    async def _index(self, namespace: str = DEFAULT_NAMESPACE) -> LocalIndex:
+        if self.db_type != "local":
+            raise RetrievalError(f"Vector store '{self.db_type}' is not supported; set VECTOR_DB_TYPE=local")
+        index = _local_indexes.get(namespace)
+        if index is None:
+            # Reading a large saved index takes seconds, so it stays off the event loop
+            index = await asyncio.to_thread(get_local_index, namespace)
+        return index
@@ -0,0 +1,73 @@
+"""
+Script to measure requests/s of database-backed API endpoints at fixed concurrency
+
+Run it against a server built from each revision to compare, e.g.:
+
+    python scripts/benchmark_db_endpoints.py --url http://localhost:8000 --concurrency 32 --requests 2000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+
+DEFAULT_PATHS = [
+    "/api/v1/chat/conversations",
+    "/api/v1/documents",
+    "/api/v1/health/detailed",
+]
+
+async def run_benchmark(base_url: str, path: str, concurrency: int, total_requests: int) -> dict:
+    """Issue total_requests GETs to path with at most `concurrency` in flight"""
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(total_requests))
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "path": path,
+        "requests": total_requests,
+        "errors": errors,
+        "requests_per_second": total_requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+async def main(args):
+    print(f"Benchmarking {args.url} with concurrency={args.concurrency}, requests={args.requests}")
+    for path in args.paths or DEFAULT_PATHS:
+        # Warm up connection pools before measuring
+        await run_benchmark(args.url, path, args.concurrency, args.concurrency)
+        result = await run_benchmark(args.url, path, args.concurrency, args.requests)
+        print(
+            f"{result['path']:<32} {result['requests_per_second']:>9.1f} req/s  "
+            f"p50 {result['p50_ms']:>7.1f} ms  p95 {result['p95_ms']:>7.1f} ms  errors {result['errors']}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--paths", nargs="*", help="Endpoints to benchmark (defaults to chat, documents and health)")
+    asyncio.run(main(parser.parse_args()))
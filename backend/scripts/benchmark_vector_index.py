@@ -0,0 +1,105 @@
+"""
+Script to compare memory, recall@k and latency of the local index types
+
+Builds each index over clustered synthetic vectors (or embeddings from the
+chunk_embeddings table with --from-store), saves it so quantised indexes
+map their float32 vectors from disk, and measures it against exact search, e.g.:
+
+    python scripts/benchmark_vector_index.py --vectors 100000 --dimension 3072 --types flat int8 pq
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.services.quantized_index import QuantizedIndex
+from app.services.vector_index import LocalVectorIndex
+
+def synthetic_vectors(count: int, dimension: int, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors around a few hundred topics, which is closer to real embeddings than pure noise"""
+    topics = rng.normal(size=(max(count // 200, 8), dimension)).astype(np.float32)
+    vectors = topics[rng.integers(len(topics), size=count)] + 0.6 * rng.normal(size=(count, dimension)).astype(np.float32)
+    return LocalVectorIndex._normalise(vectors)
+
+async def stored_vectors(limit: int) -> np.ndarray:
+    from app.core.database import AsyncSessionLocal, close_db_connections
+    from app.models.database import ChunkEmbedding
+    from app.services.embedding_store import EmbeddingStore
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(ChunkEmbedding.vector)
+            .where(ChunkEmbedding.model == settings.OPENAI_EMBEDDING_MODEL)
+            .limit(limit)
+        )
+        vectors = np.stack([EmbeddingStore.unpack(packed) for packed in result.scalars().all()])
+    await close_db_connections()
+    return LocalVectorIndex._normalise(vectors)
+
+def build(index_type: str, vectors: np.ndarray, args):
+    if index_type == "flat":
+        index = LocalVectorIndex(initial_capacity=len(vectors))
+    else:
+        index = QuantizedIndex(mode=index_type, subquantizers=args.subquantizers, rescore_factor=args.rescore_factor)
+    ids = [str(row) for row in range(len(vectors))]
+    for start in range(0, len(vectors), 10000):
+        index.upsert_batch(ids[start:start + 10000], vectors[start:start + 10000])
+    index.save(tempfile.mkdtemp())
+    return index
+
+def recall(index, queries: np.ndarray, truth: list, top_k: int) -> float:
+    found = index.search_batch(queries, top_k)
+    return float(np.mean([len({int(hit[0]) for hit in hits} & expected) / top_k for hits, expected in zip(found, truth)]))
+
+def main(args):
+    rng = np.random.default_rng(0)
+    if args.from_store:
+        vectors = asyncio.run(stored_vectors(args.vectors))
+    else:
+        vectors = synthetic_vectors(args.vectors, args.dimension, rng)
+    # Queries are perturbed corpus vectors, like paraphrases of indexed text
+    sample = vectors[rng.choice(len(vectors), args.queries, replace=False)]
+    queries = LocalVectorIndex._normalise(sample + 0.3 * rng.normal(size=sample.shape).astype(np.float32))
+    truth = [set(np.argsort(-(vectors @ query))[:args.top_k].tolist()) for query in queries]
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {args.queries} queries, recall@{args.top_k}")
+
+    for index_type in args.types:
+        started = time.perf_counter()
+        index = build(index_type, vectors, args)
+        build_seconds = time.perf_counter() - started
+
+        latencies = []
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query, args.top_k)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        resident = index.nbytes
+        mapped = getattr(index, "mapped_nbytes", 0)
+        line = (
+            f"{index_type:>5}  resident {resident / 1024 / 1024:>8.1f} MB  mapped {mapped / 1024 / 1024:>8.1f} MB  "
+            f"build {build_seconds:>6.1f} s  p50 {np.percentile(latencies, 50):>7.2f} ms  "
+        )
+        if isinstance(index, QuantizedIndex):
+            measured = index.recall_at_k(queries, args.top_k)
+            line += f"recall candidates {measured['candidates']:.3f}  rescored {measured['rescored']:.3f}"
+        else:
+            line += f"recall {recall(index, queries, truth, args.top_k):.3f}"
+        print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=100000, help="Vectors to index")
+    parser.add_argument("--dimension", type=int, default=1536, help="Dimension of synthetic vectors")
+    parser.add_argument("--queries", type=int, default=100, help="Queries to measure")
+    parser.add_argument("--top-k", type=int, default=10, help="k for recall@k")
+    parser.add_argument("--types", nargs="*", default=["flat", "int8", "pq"], choices=["flat", "int8", "pq"])
+    parser.add_argument("--subquantizers", type=int, default=settings.PQ_SUBQUANTIZERS, help="PQ bytes per vector")
+    parser.add_argument("--rescore-factor", type=int, default=settings.QUANTIZED_RESCORE_FACTOR, help="Candidates per result")
+    parser.add_argument("--from-store", action="store_true", help="Use stored embeddings instead of synthetic vectors")
+    main(parser.parse_args())
@@ -0,0 +1,65 @@
+"""
+Script to bulk-ingest a directory or zip archive of documents
+
+Markdown, text, PDF, Word, PowerPoint and Excel files are parsed, chunked,
+embedded and indexed with bounded parallelism, printing throughput as it goes, e.g.:
+
+    python scripts/bulk_ingest.py ~/exports/handbook.zip --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+
+from app.core.config import settings
+from app.core.database import create_tables, close_db_connections, init_redis, close_redis
+from app.services.bulk_ingestion import BulkIngestionService
+from app.services.document_parser import shutdown_parse_pool
+from app.services.vector_service import claim_local_index, persist_local_index
+
+async def print_progress(stats: dict):
+    done = stats["documents"] + stats["skipped"] + stats["failed"]
+    print(
+        f"{done:>6}/{stats['total']} files  {stats['docs_per_second']:>7.2f} docs/s  "
+        f"{stats['chunks_per_second']:>8.1f} chunks/s  {stats['embedding_requests']:>6} embedding calls  "
+        f"({stats['skipped']} skipped, {stats['failed']} failed)"
+    )
+
+async def main(args):
+    if settings.VECTOR_DB_TYPE == "local":
+        try:
+            claim_local_index()
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return
+
+    await create_tables()
+    await init_redis()
+
+    service = BulkIngestionService(concurrency=args.concurrency, skip_existing=not args.reingest)
+    try:
+        if os.path.isdir(args.path):
+            summary = await service.ingest_directory(args.path, on_progress=print_progress)
+        else:
+            summary = await service.ingest_archive(args.path, on_progress=print_progress)
+    finally:
+        # Save vectors written to the in-process index (VECTOR_DB_TYPE=local)
+        if settings.VECTOR_DB_TYPE == "local":
+            persist_local_index()
+        shutdown_parse_pool()
+        await close_db_connections()
+        await close_redis()
+
+    for error in summary["errors"]:
+        print(f"❌ {error}")
+    print(
+        f"✅ {summary['documents']} documents, {summary['chunks']} chunks in {summary['elapsed_seconds']}s "
+        f"({summary['embedding_requests']} embedding calls for {summary['embedded_texts']} texts)"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", help="Directory or .zip archive to import")
+    parser.add_argument("--concurrency", type=int, default=settings.BULK_INGEST_CONCURRENCY, help="Files in flight")
+    parser.add_argument("--reingest", action="store_true", help="Ingest files even if identical content already exists")
+    asyncio.run(main(parser.parse_args()))
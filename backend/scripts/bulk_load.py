@@ -0,0 +1,61 @@
+"""
+Script to bulk-load the seed datasets in data/*.json
+
+Safe to re-run: unchanged chunks are skipped, so only edits are embedded, e.g.:
+
+    python scripts/bulk_load.py --datasets bio coding --batch-size 100
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.core.config import settings
+from app.core.database import create_tables, close_db_connections, init_redis, close_redis
+from app.services.bulk_loader import (
+    DATA_DIR,
+    DATASETS,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CONCURRENCY,
+    BulkLoader,
+    unclaimed_files,
+)
+from app.services.vector_service import claim_local_index, persist_local_index
+
+async def main(args):
+    if settings.VECTOR_DB_TYPE == "local":
+        try:
+            claim_local_index()
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return
+
+    await create_tables()
+    await init_redis()
+
+    for filename in unclaimed_files():
+        print(f"⚠️  {DATA_DIR / filename} is not part of any dataset; skipping")
+
+    started = time.perf_counter()
+    results = await BulkLoader(args.batch_size, args.concurrency).load_datasets(args.datasets)
+    elapsed = time.perf_counter() - started
+
+    # Save vectors written to the in-process index (VECTOR_DB_TYPE=local)
+    if settings.VECTOR_DB_TYPE == "local":
+        persist_local_index()
+    await close_db_connections()
+    await close_redis()
+
+    for result in results:
+        print(
+            f"📄 {result.document_id}: {result.chunks_total} chunks, {result.chunks_inserted} inserted, "
+            f"{result.chunks_deleted} deleted, {result.chunks_embedded} embedded"
+        )
+    print(f"✅ Loaded {len(results)} documents in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--datasets", nargs="*", choices=sorted(DATASETS), help="Datasets to load (default: all)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Chunks per embedding request")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Embedding requests in flight")
+    asyncio.run(main(parser.parse_args()))
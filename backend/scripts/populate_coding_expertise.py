@@ -3,177 +3,27 @@ Script to populate Amrikyy AI with comprehensive coding expertise dataset
 """
 
 import asyncio
-import json
-import os
-from datetime import datetime
-from sqlalchemy.orm import Session
 
-from app.core.database import SessionLocal, Base, engine
-from app.models.database import Document, DocumentChunk
-from app.services.embedding_service import EmbeddingService
-from app.services.vector_service import VectorService
-
-async def load_coding_datasets():
-    """Load all coding expertise datasets"""
-    
-    datasets = []
-    data_dir = "/Users/cryptojoker710/amrikyy-ai/backend/data"
-    
-    # Load main coding dataset
-    coding_file = os.path.join(data_dir, "coding_expertise_dataset.json")
-    if os.path.exists(coding_file):
-        with open(coding_file, 'r', encoding='utf-8') as f:
-            datasets.extend(json.load(f))
-    
-    # Load advanced patterns dataset
-    patterns_file = os.path.join(data_dir, "advanced_programming_patterns.json")
-    if os.path.exists(patterns_file):
-        with open(patterns_file, 'r', encoding='utf-8') as f:
-            datasets.extend(json.load(f))
-    
-    return datasets
+from app.core.database import create_tables, close_db_connections, close_redis
+from app.services.bulk_loader import BulkLoader, SeedChunk, SeedDocument
+from app.services.vector_service import claim_local_index, persist_local_index
 
 async def create_coding_expertise_documents():
-    """Create comprehensive coding expertise documents"""
+    """Load data/coding_expertise_dataset.json and data/advanced_programming_patterns.json"""
     
     print("🚀 Loading coding expertise datasets...")
-    datasets = await load_coding_datasets()
+    loader = BulkLoader()
     
-    if not datasets:
-        print("❌ No datasets found!")
-        return
+    result, = await loader.load_datasets(["coding"])
+    await create_specialized_coding_docs(loader)
     
-    print(f"📚 Found {len(datasets)} coding topics")
+    print(f"🎉 Successfully populated coding expertise!")
+    print(f"📄 Main Document ID: {result.document_id}")
+    print(f"📦 Total chunks: {result.chunks_total} ({result.chunks_embedded} embedded)")
     
-    db = SessionLocal()
-    embedding_service = EmbeddingService()
-    vector_service = VectorService()
-    
-    try:
-        # Create main coding expertise document
-        full_content = "# Amrikyy's Coding Expertise Database\n\n"
-        full_content += "محمد عبدالعزيز (Amrikyy) - Expert Programming Knowledge Base\n\n"
-        
-        # Organize content by category
-        categories = {}
-        for item in datasets:
-            category = item.get('category', 'general')
-            if category not in categories:
-                categories[category] = []
-            categories[category].append(item)
-        
-        # Build comprehensive content
-        for category, items in categories.items():
-            full_content += f"## {category.upper()} Programming\n\n"
-            for item in items:
-                full_content += f"### {item['title']}\n"
-                full_content += f"**Difficulty**: {item.get('difficulty', 'intermediate')}\n"
-                full_content += f"**Language**: {item.get('language', 'python')}\n"
-                full_content += f"**Tags**: {', '.join(item.get('tags', []))}\n\n"
-                full_content += f"{item['content']}\n\n"
-                full_content += "---\n\n"
-        
-        # Create document record
-        document = Document(
-            filename="amrikyy_coding_expertise.md",
-            original_filename="amrikyy_coding_expertise.md",
-            content_type="text/markdown",
-            size=len(full_content.encode('utf-8')),
-            file_path="/virtual/coding/amrikyy_coding_expertise.md",
-            status="completed",
-            title="Amrikyy's Complete Coding Expertise",
-            author="محمد عبدالعزيز (Amrikyy)",
-            language="en",
-            processed_at=datetime.utcnow()
-        )
-        
-        db.add(document)
-        db.commit()
-        db.refresh(document)
-        
-        print(f"✅ Created main document: {document.id}")
-        
-        # Create detailed chunks for each coding topic
-        chunk_index = 0
-        
-        for item in datasets:
-            # Create comprehensive chunk content
-            chunk_content = f"""# {item['title']}
-
-**Category**: {item.get('category', 'general')}
-**Difficulty**: {item.get('difficulty', 'intermediate')} 
-**Language**: {item.get('language', 'python')}
-**Tags**: {', '.join(item.get('tags', []))}
-
-{item['content']}
-
----
-This is part of Amrikyy's programming expertise. محمد عبدالعزيز has extensive experience in {item.get('category', 'programming')} and specializes in {', '.join(item.get('tags', []))}.
-"""
-            
-            # Create document chunk
-            chunk = DocumentChunk(
-                document_id=document.id,
-                content=chunk_content,
-                chunk_index=chunk_index,
-                section_title=item['title'],
-                content_hash=hash(chunk_content)
-            )
-            
-            db.add(chunk)
-            db.commit()
-            db.refresh(chunk)
-            
-            # Generate embedding
-            try:
-                embedding = await embedding_service.embed_text(chunk_content)
-                
-                # Store in vector database
-                vector_id = await vector_service.upsert_vector(
-                    vector_id=str(chunk.id),
-                    embedding=embedding,
-                    metadata={
-                        "document_id": str(document.id),
-                        "chunk_id": str(chunk.id),
-                        "title": item['title'],
-                        "category": item.get('category', 'general'),
-                        "difficulty": item.get('difficulty', 'intermediate'),
-                        "language": item.get('language', 'python'),
-                        "tags": item.get('tags', []),
-                        "content_type": "coding_expertise",
-                        "author": "Amrikyy",
-                        "preview": chunk_content[:500]
-                    }
-                )
-                
-                # Update chunk with embedding ID
-                chunk.embedding_id = vector_id
-                db.commit()
-                
-                print(f"✅ Created coding chunk {chunk_index + 1}/{len(datasets)}: {item['title']}")
-                chunk_index += 1
-                
-            except Exception as e:
-                print(f"❌ Failed to create embedding for {item['title']}: {e}")
-                continue
-        
-        # Create additional specialized documents
-        await create_specialized_coding_docs(db, embedding_service, vector_service, document.id)
-        
-        print(f"🎉 Successfully populated coding expertise!")
-        print(f"📄 Main Document ID: {document.id}")
-        print(f"📦 Total chunks: {chunk_index}")
-        
-        return document.id
-        
-    except Exception as e:
-        print(f"❌ Error creating coding expertise: {e}")
-        db.rollback()
-        raise
-    finally:
-        db.close()
+    return result.document_id
 
-async def create_specialized_coding_docs(db, embedding_service, vector_service, parent_doc_id):
+async def create_specialized_coding_docs(loader: BulkLoader):
     """Create specialized coding documents"""
     
     # Best Practices Document
@@ -259,64 +109,28 @@ def process_user_registration(user_data):
 This represents Amrikyy's (محمد عبدالعزيز) approach to professional software development, gained through experience at Global Career Accelerator and various technical projects.
 """
     
-    # Create best practices document
-    bp_document = Document(
+    result = await loader.load_document(SeedDocument(
         filename="amrikyy_best_practices.md",
-        original_filename="amrikyy_best_practices.md",
-        content_type="text/markdown",
-        size=len(best_practices_content.encode('utf-8')),
-        file_path="/virtual/coding/amrikyy_best_practices.md",
-        status="completed",
         title="Amrikyy's Coding Best Practices",
         author="محمد عبدالعزيز (Amrikyy)",
         language="en",
-        processed_at=datetime.utcnow()
-    )
-    
-    db.add(bp_document)
-    db.commit()
-    db.refresh(bp_document)
-    
-    # Create chunk for best practices
-    bp_chunk = DocumentChunk(
-        document_id=bp_document.id,
-        content=best_practices_content,
-        chunk_index=0,
-        section_title="Amrikyy's Coding Best Practices"
-    )
-    
-    db.add(bp_chunk)
-    db.commit()
-    db.refresh(bp_chunk)
-    
-    # Create embedding
-    try:
-        embedding = await embedding_service.embed_text(best_practices_content)
-        
-        vector_id = await vector_service.upsert_vector(
-            vector_id=str(bp_chunk.id),
-            embedding=embedding,
+        namespace="coding",
+        chunks=[SeedChunk(
+            content=best_practices_content,
+            section_title="Amrikyy's Coding Best Practices",
             metadata={
-                "document_id": str(bp_document.id),
-                "chunk_id": str(bp_chunk.id),
                 "title": "Coding Best Practices",
                 "category": "best-practices",
                 "difficulty": "intermediate",
                 "language": "python",
                 "tags": ["clean-code", "best-practices", "code-review", "testing"],
                 "content_type": "coding_expertise",
-                "author": "Amrikyy",
-                "preview": best_practices_content[:500]
+                "author": "Amrikyy"
             }
-        )
-        
-        bp_chunk.embedding_id = vector_id
-        db.commit()
-        
-        print("✅ Created best practices document")
-        
-    except Exception as e:
-        print(f"❌ Failed to create best practices embedding: {e}")
+        )]
+    ))
+    
+    print(f"✅ Created best practices document: {result.document_id}")
 
 async def test_coding_expertise_retrieval():
     """Test retrieval of coding expertise"""
@@ -359,17 +173,33 @@ async def test_coding_expertise_retrieval():
         except Exception as e:
             print(f"❌ Query failed: {query} - {e}")
 
-if __name__ == "__main__":
-    print("🚀 Populating Amrikyy's coding expertise...")
-    
+async def main():
     # Create tables if they don't exist
-    Base.metadata.create_all(bind=engine)
+    await create_tables()
     
     # Run the population
-    asyncio.run(create_coding_expertise_documents())
+    await create_coding_expertise_documents()
+    
+    # Save vectors written to the in-process index (VECTOR_DB_TYPE=local)
+    persist_local_index()
     
     # Test retrieval
-    asyncio.run(test_coding_expertise_retrieval())
+    await test_coding_expertise_retrieval()
+    
+    await close_db_connections()
+    await close_redis()
+
+if __name__ == "__main__":
+    # Refuse to run while the API holds the local index; its copy would overwrite ours
+    try:
+        claim_local_index()
+    except RuntimeError as e:
+        raise SystemExit(f"❌ {e}")
+    
+    print("🚀 Populating Amrikyy's coding expertise...")
+    
+    # One event loop for the whole run; pooled async connections belong to it
+    asyncio.run(main())
     
     print("\n✅ Coding expertise population complete!")
     print("\n🎯 Amrikyy is now a coding expert! You can ask:")
@@ -0,0 +1,54 @@
+"""
+Script to rebuild the local vector indexes from stored embeddings
+
+Run after changing LOCAL_INDEX_TYPE or its IVF/HNSW parameters, or to
+recover lost index files. Vectors come from the chunk_embeddings table, so
+only chunks it does not hold yet are sent to the provider. The API must be
+stopped first; the script refuses to run while it holds the index, e.g.:
+
+    LOCAL_INDEX_TYPE=hnsw python scripts/rebuild_vector_index.py
+"""
+
+import argparse
+import asyncio
+
+from app.core.config import settings
+from app.core.database import create_tables, close_db_connections, init_redis, close_redis
+from app.services.index_rebuild import REBUILD_BATCH_SIZE, IndexRebuilder
+from app.services.vector_service import claim_local_index
+
+async def main(args):
+    if settings.VECTOR_DB_TYPE != "local":
+        print(f"❌ VECTOR_DB_TYPE is '{settings.VECTOR_DB_TYPE}'; only the local index can be rebuilt")
+        return
+    try:
+        claim_local_index()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return
+
+    await create_tables()
+    await init_redis()
+
+    try:
+        stats = await IndexRebuilder(args.batch_size, reuse_index=not args.no_index_vectors).rebuild()
+    finally:
+        await close_db_connections()
+        await close_redis()
+
+    for namespace, count in stats["vectors"].items():
+        print(f"📦 {namespace}: {count} vectors")
+    print(
+        f"✅ Rebuilt {stats['chunks']} chunks in {stats['elapsed_seconds']}s "
+        f"({stats['from_store']} from the store, {stats['from_index']} from the old index, {stats['embedded']} embedded)"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=REBUILD_BATCH_SIZE, help="Chunks read per batch")
+    parser.add_argument(
+        "--no-index-vectors",
+        action="store_true",
+        help="Do not copy vectors from the current index (use after changing OPENAI_EMBEDDING_MODEL)"
+    )
+    asyncio.run(main(parser.parse_args()))